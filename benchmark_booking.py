@@ -0,0 +1,83 @@
+'''
+Benchmark_Booking Script
+------------------------
+
+This script runs many cashier sessions (threads) booking single places through one BookingService
+and reports the bookings per second for an increasing number of distinct screenings:
+    -without saving (the bookings only hold the GIL, so the threads can not run in parallel)
+    -saving each booking with save_csv_data() while the screening is locked
+    -saving each booking to a storage with save_latency seconds of latency (waiting does not hold the GIL)
+It also checks that no place has been booked twice
+'''
+
+
+from booking import BookingService, BookingError
+from load_save_data import save_csv_data
+import numpy as np
+import threading
+import tempfile
+import random
+import time
+import os
+
+# Number of cashier sessions (threads) and bookings tried by each of them
+sessions = 8
+bookings = 100
+# Numbers of distinct screenings shared by the sessions
+screening_counts = [1, 2, 4, 8]
+# Hall size in format (rows, seats)
+hall_size = (20, 40)
+# Seconds of waiting for the simulated storage
+save_latency = 0.002
+
+
+def run_sessions(num_screenings, save=None):
+    '''Returns (bookings per second, number of booked places) of the sessions booking num_screenings screenings'''
+
+    service = BookingService(save=save)
+    row_indices = {f'{i}': i for i in range(hall_size[0])}
+    movies = [f'screening {i}' for i in range(num_screenings)]
+    for movie in movies:
+        service.add_screening(movie, np.zeros(hall_size, np.int8), row_indices)
+    booked = []
+
+    def session(seed):
+        rng = random.Random(seed)
+        movie = movies[seed % num_screenings]
+        for _ in range(bookings):
+            place = (f'{rng.randrange(hall_size[0])}', rng.randint(1, hall_size[1]))
+            try:
+                service.book(movie, [place])
+                booked.append((movie, place))
+            except BookingError:
+                pass
+
+    threads = [threading.Thread(target=session, args=(seed,)) for seed in range(sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+
+    # Every place is booked once and is taken in the seats of its screening
+    assert len(booked) == len(set(booked))
+    assert len(booked) == sum(int(service.get_seats(movie).sum()) for movie in movies)
+    return sessions * bookings / seconds, len(booked)
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as directory:
+        def save_csv(movie, seats_array):
+            save_csv_data(movie, seats_array, os.path.join(directory, f'{movie}.csv'))
+
+        def save_storage(movie, seats_array):
+            time.sleep(save_latency)
+
+        print(f'{"screenings":>10} {"no save [1/s]":>14} {"csv save [1/s]":>15} {"storage save [1/s]":>19} '
+              f'{"booked":>7}')
+        for num_screenings in screening_counts:
+            memory_rate, booked = run_sessions(num_screenings)
+            csv_rate, _ = run_sessions(num_screenings, save_csv)
+            storage_rate, _ = run_sessions(num_screenings, save_storage)
+            print(f'{num_screenings:>10} {memory_rate:>14.0f} {csv_rate:>15.0f} {storage_rate:>19.0f} {booked:>7}')
@@ -0,0 +1,57 @@
+'''
+Benchmark_Loading Script
+------------------------
+
+This script compares loading cinema hall csv files with np.genfromtxt
+and with load_save_data.parse_csv_data for halls of increasing size
+'''
+
+
+from load_save_data import parse_csv_data, create_txt_info
+import numpy as np
+import tempfile
+import time
+import os
+
+# Hall sizes in format (rows, seats)
+hall_sizes = [(7, 30), (50, 120), (200, 500), (1000, 1000)]
+# Number of runs of each loader, the best time is reported
+repeats = 5
+
+
+def best_time(function, *args):
+    '''Returns the shortest time of repeats calls of function in seconds'''
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def load_genfromtxt(path):
+    return np.genfromtxt(path, delimiter=',', skip_header=4)
+
+
+def load_parse_csv_data(path):
+    with open(path, 'rb') as file:
+        return parse_csv_data(file.read())
+
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(0)
+    print(f'{"hall":>12} {"genfromtxt [ms]":>16} {"parse_csv_data [ms]":>20} {"speedup":>8}')
+    with tempfile.TemporaryDirectory() as directory:
+        for rows, seats in hall_sizes:
+            seats_array = (rng.random([rows, seats]) < 0.3).astype(np.int8)
+            path = os.path.join(directory, f'{rows}x{seats}.csv')
+            np.savetxt(path, seats_array, delimiter=',', fmt='%1d', header=create_txt_info('benchmark', seats_array))
+
+            # Both loaders have to return the same array
+            assert np.array_equal(load_genfromtxt(path), load_parse_csv_data(path)[0])
+
+            genfromtxt_time = best_time(load_genfromtxt, path)
+            parse_time = best_time(load_parse_csv_data, path)
+            print(f'{f"{rows}x{seats}":>12} {genfromtxt_time * 1000:>16.2f} {parse_time * 1000:>20.2f} '
+                  f'{genfromtxt_time / parse_time:>7.1f}x')
@@ -0,0 +1,199 @@
+'''
+Benchmark_Rendering Script
+--------------------------
+
+This script renders synthetic cinema halls of increasing size and occupancy headless
+and measures each stage of the visualisation pipeline:
+    -wall time (the best of repeats runs)
+    -number of OpenCV drawing calls
+    -peak memory allocated during the stage (tracemalloc)
+
+The results are compared with a baseline saved in baseline_path by an earlier run,
+the script exits with status 1 if a stage got slower, draws more or needs more memory
+'''
+
+
+import visualisation
+from visualisation import (show_seats, render_seats, create_row, display_text_info, get_screen_size, HallLayout,
+                           render_layout, clear_layer_cache, clear_frame_cache, clear_encoded_cache,
+                           clear_sprite_cache)
+import numpy as np
+import tracemalloc
+import json
+import time
+import sys
+import os
+
+# Hall sizes in format (rows, seats) and the part of taken seats
+hall_sizes = [(7, 30), (16, 40), (50, 120)]
+occupancies = [0.0, 0.5, 1.0]
+# Number of runs of each stage, the best time is reported
+repeats = 5
+# Baseline file, created if it does not exist or if update_baseline is True
+# LINUX
+baseline_path = './benchmark_rendering.json'
+# WINDOWS
+# baseline_path = '.\benchmark_rendering.json'
+update_baseline = False
+# A stage is a regression if it is slower than time_tolerance * baseline time + time_margin seconds,
+# or needs more than memory_tolerance * baseline memory
+time_tolerance = 1.5
+time_margin = 0.002
+memory_tolerance = 1.25
+
+# OpenCV functions counted as drawing calls
+DRAW_FUNCTIONS = {'putText', 'rectangle', 'line', 'circle', 'imencode'}
+
+
+class DrawCounter:
+    '''Replaces the cv2 module of visualisation and counts the calls of DRAW_FUNCTIONS'''
+
+    def __init__(self, module):
+        self.module = module
+        self.calls = 0
+
+    def __getattr__(self, attribute):
+        value = getattr(self.module, attribute)
+        if attribute not in DRAW_FUNCTIONS:
+            return value
+
+        def counted(*args, **kwargs):
+            self.calls += 1
+            return value(*args, **kwargs)
+        return counted
+
+
+def clear_caches():
+    clear_layer_cache()
+    clear_frame_cache()
+    clear_encoded_cache()
+    clear_sprite_cache()
+
+
+def create_stages(seats_array, row_indices):
+    '''Returns the benchmarked stages in format {stage: function}'''
+
+    screen_height, screen_width = get_screen_size(seats_array)
+    screen = np.zeros([screen_height, screen_width, 3], np.uint8)
+    font = visualisation.cv2.FONT_HERSHEY_DUPLEX
+    layout = HallLayout.fit(*seats_array.shape, 900, 1600)
+    layout_screen = np.zeros([layout.screen_height, layout.screen_width, 3], np.uint8)
+
+    def canvas():
+        # The screen allocated by run.main()
+        return np.zeros([screen_height, screen_width, 3], np.uint8)
+
+    def create_rows_by_seat():
+        new_screen = screen.copy()
+        for j, row in enumerate(seats_array):
+            create_row(row, j, new_screen, font, screen_height // 5, 110, 6)
+
+    def text_info():
+        display_text_info(screen, 'benchmark', font, seats_array, screen_height // 5)
+
+    def render_cold():
+        clear_caches()
+        render_seats(screen, seats_array, row_indices, 'benchmark', screen_height, screen_width)
+
+    def render_cached():
+        render_seats(screen, seats_array, row_indices, 'benchmark', screen_height, screen_width)
+
+    def show_headless():
+        # One place changes between the calls, like after a booking
+        seats_array[0, 0] = 1 - seats_array[0, 0]
+        show_seats(screen, seats_array, row_indices, 'benchmark', screen_height, screen_width, headless=True)
+
+    def show_png():
+        clear_encoded_cache()
+        show_seats(screen, seats_array, row_indices, 'benchmark', screen_height, screen_width,
+                   headless=True, image_format='png')
+
+    def render_fitted():
+        render_layout(layout_screen, seats_array, row_indices, 'benchmark', layout)
+
+    return {'canvas': canvas, 'create_row': create_rows_by_seat, 'display_text_info': text_info,
+            'render_seats_cold': render_cold, 'render_seats_cached': render_cached,
+            'show_seats_headless': show_headless, 'show_seats_png': show_png, 'render_layout': render_fitted}
+
+
+def measure(function):
+    '''Returns {'seconds': float, 'draw_calls': int, 'peak_bytes': int} of the function'''
+
+    function()  # warming up
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    # Counting calls and memory in a separate run, both slow the function down
+    counter = DrawCounter(visualisation.cv2)
+    visualisation.cv2 = counter
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        visualisation.cv2 = counter.module
+    return {'seconds': min(times), 'draw_calls': counter.calls, 'peak_bytes': peak}
+
+
+def run_benchmark():
+    '''Returns the results in format {'rowsxseats@occupancy': {stage: measure()}}'''
+
+    rng = np.random.default_rng(0)
+    results = {}
+    for rows, seats in hall_sizes:
+        row_indices = {f'{i}': i for i in range(rows)}
+        for occupancy in occupancies:
+            seats_array = (rng.random([rows, seats]) < occupancy).astype(np.int8)
+            clear_caches()
+            results[f'{rows}x{seats}@{occupancy}'] = {stage: measure(function)
+                                                      for stage, function in create_stages(seats_array,
+                                                                                           row_indices).items()}
+    return results
+
+
+def find_regressions(results, baseline):
+    '''Returns a list of messages about stages worse than in the baseline'''
+
+    regressions = []
+    for hall, stages in results.items():
+        for stage, result in stages.items():
+            base = baseline.get(hall, {}).get(stage)
+            if base is None:
+                continue
+            if result['seconds'] > base['seconds'] * time_tolerance + time_margin:
+                regressions.append(f'{hall} {stage}: {result["seconds"] * 1000:.2f} ms '
+                                   f'(baseline {base["seconds"] * 1000:.2f} ms)')
+            if result['draw_calls'] > base['draw_calls']:
+                regressions.append(f'{hall} {stage}: {result["draw_calls"]} draw calls '
+                                   f'(baseline {base["draw_calls"]})')
+            if result['peak_bytes'] > base['peak_bytes'] * memory_tolerance:
+                regressions.append(f'{hall} {stage}: {result["peak_bytes"] / 2 ** 20:.1f} MB '
+                                   f'(baseline {base["peak_bytes"] / 2 ** 20:.1f} MB)')
+    return regressions
+
+
+if __name__ == '__main__':
+    results = run_benchmark()
+
+    print(f'{"hall":>16} {"stage":>20} {"time [ms]":>10} {"draw calls":>11} {"peak [MB]":>10}')
+    for hall, stages in results.items():
+        for stage, result in stages.items():
+            print(f'{hall:>16} {stage:>20} {result["seconds"] * 1000:>10.2f} {result["draw_calls"]:>11} '
+                  f'{result["peak_bytes"] / 2 ** 20:>10.2f}')
+
+    if update_baseline or not os.path.exists(baseline_path):
+        with open(baseline_path, 'w') as file:
+            json.dump(results, file, indent=1)
+        print(f'Baseline saved in {baseline_path}')
+    else:
+        with open(baseline_path) as file:
+            regressions = find_regressions(results, json.load(file))
+        for regression in regressions:
+            print(f'Regression: {regression}')
+        if regressions:
+            sys.exit(1)
+        print('No regressions')
@@ -0,0 +1,875 @@
+'''
+Booking Module
+--------------
+
+This module allows booking seats without the interactive booking process of visualisation:
+    -checking a whole list of places (row label, place number) against the seat array at once
+    -booking all of the places or none of them, every rejected place has its reason
+    -keeping the number of free places and the longest run of adjacent free places of each row (SeatMap),
+     updated by each booking instead of summing the whole array
+    -holding places for a limited time (HELD places), the lapsed holds are released by a HoldScheduler
+    -booking from many threads of one process (BookingService), each screening has its own lock
+
+It does not print, wait or display anything, so it can be used by services and scripts
+'''
+
+
+from load_save_data import IncorrectArrayType, IncorrectArrayData, IncorrectShape
+import numpy as np
+import threading
+import heapq
+import time
+
+
+# Value of a held place in the seat array, free places are 0 and taken places are 1
+HELD = 2
+# Seconds after which a hold lapses if its ttl is not given
+HOLD_TTL = 600
+
+# Reasons of rejecting a place
+UNKNOWN_ROW = 'unknown row'
+INCORRECT_PLACE = 'incorrect place number'
+ALREADY_TAKEN = 'already taken'
+DUPLICATED = 'chosen more than once'
+NOT_TAKEN = 'not taken'
+ON_HOLD = 'on hold'
+NOT_HELD = 'not held'
+
+
+class BookingError(Exception):
+    def __init__(self, message, rejected=None, movie=None):
+        super().__init__(message)
+        self.message = message
+        self.rejected = rejected
+        self.movie = movie
+
+
+def _place_number(place):
+    # Returns the place as an integer, 0 (an incorrect place) if it is not an integer like validate_place()
+    if isinstance(place, (bool, np.bool_)):
+        return 0
+    if isinstance(place, str):
+        place = place.strip()
+        return int(place) if place.lstrip('-').isdigit() else 0
+    if isinstance(place, (int, np.integer)):
+        return int(place)
+    return 0
+
+
+def check_places(seats_array, row_indices, places):
+    '''Checks all places at once and returns the reason of rejecting each of them
+
+    Parameters
+    ----------
+    :param seats_array: numpy array
+        a 2 dimensional numpy array representing a cinema hall in format [[row], [row]]
+        where row is a 1 dimensional array containing zeros (free place) or ones (taken seat) ex. [1, 0, 0, 0, 1]
+    :param row_indices: dict
+        dictionary representing row indices in format {row_label: index} ex. {'A':0, 'B':1}
+    :param places: list
+        places to check in format [(row_label, place), (row_label, place)], places are numbered from 1
+
+    Returns
+    -------
+    :returns: list
+        reasons in the order of places, None if the place can be booked, else one of:
+        UNKNOWN_ROW, INCORRECT_PLACE, ALREADY_TAKEN, ON_HOLD,
+        DUPLICATED (the second and next choice of the same place)
+
+    Raises
+    ------
+    :raises IncorrectArrayType:
+        if the seats_array is not a numpy array or a place is not a pair (row, place)
+    :raises IncorrectArrayData:
+        if the array contains illegal characters (numeric values required)
+    '''
+
+    if not isinstance(seats_array, np.ndarray):
+        raise IncorrectArrayType('Incorrect array type, numpy array required')
+    seats_array = np.atleast_2d(seats_array)
+    try:
+        rows = np.array([row_indices.get(row.strip().upper() if isinstance(row, str) else row, -1)
+                         for row, _ in places], np.int64)
+        numbers = np.array([_place_number(place) for _, place in places], np.int64)
+    except (TypeError, ValueError):
+        raise IncorrectArrayType('Incorrect places, list of pairs (row, place) required')
+    if len(places) == 0:
+        return []
+
+    # Bounds of the rows and places, only the places inside the array are looked up
+    known_row = (rows >= 0) & (rows < seats_array.shape[0])
+    correct_place = (numbers >= 1) & (numbers <= seats_array.shape[1])
+    inside = known_row & correct_place
+    try:
+        values = np.zeros(len(places), seats_array.dtype)
+        values[inside] = seats_array[rows[inside], numbers[inside] - 1]
+        taken = values != 0
+        held = values == HELD
+    except (TypeError, ValueError):
+        raise IncorrectArrayData('Incorrect data type in array, numeric required')
+
+    # Duplicates, the first choice of a place keeps its own reason
+    flat = np.where(inside, rows * seats_array.shape[1] + numbers - 1, -1 - np.arange(len(places)))
+    order = np.argsort(flat, kind='stable')
+    duplicated = np.zeros(len(places), bool)
+    duplicated[order[1:]] = flat[order[1:]] == flat[order[:-1]]
+
+    reasons = np.select([~known_row, ~correct_place, duplicated, held, taken],
+                        [UNKNOWN_ROW, INCORRECT_PLACE, DUPLICATED, ON_HOLD, ALREADY_TAKEN], '')
+    return [reason or None for reason in reasons.tolist()]
+
+
+def book_places(seats_array, row_indices, places, movie=None):
+    '''Books all places or none of them, the places are checked by check_places()
+
+    Parameters
+    ----------
+    :param seats_array: numpy array
+        a 2 dimensional numpy array representing a cinema hall in format [[row], [row]]
+        where row is a 1 dimensional array containing zeros (free place) or ones (taken seat) ex. [1, 0, 0, 0, 1]
+    :param row_indices: dict
+        dictionary representing row indices in format {row_label: index} ex. {'A':0, 'B':1}
+    :param places: list
+        places to book in format [(row_label, place), (row_label, place)], places are numbered from 1
+    :param movie: optional
+        the chosen movie, added to the BookingError (default is None)
+
+    Returns
+    -------
+    :returns: numpy array
+        returns a modified seats_array
+
+    Raises
+    ------
+    :raises BookingError:
+        if any of the places can not be booked (no place is booked),
+        its rejected attribute is a list of the rejected places in format [(row_label, place, reason)]
+        or if no places are given
+    :raises IncorrectArrayType, IncorrectArrayData:
+        if it occurs in check_places()
+    '''
+
+    rows, numbers = _checked_indices(seats_array, row_indices, places, movie)
+    seats_array[rows, numbers] = 1
+    return seats_array
+
+
+def _checked_indices(seats_array, row_indices, places, movie=None):
+    # Returns the indices of rows and places counted from 0 if all places can be booked, else raises BookingError
+    if len(places) == 0:
+        raise BookingError('No seats have been chosen', [], movie)
+    reasons = check_places(seats_array, row_indices, places)
+    rejected = [(row, place, reason) for (row, place), reason in zip(places, reasons) if reason is not None]
+    if rejected:
+        raise BookingError(f'{len(rejected)} of {len(places)} places can not be booked', rejected, movie)
+
+    rows = [row_indices[row.strip().upper() if isinstance(row, str) else row] for row, _ in places]
+    numbers = [_place_number(place) - 1 for _, place in places]
+    return rows, numbers
+
+
+def _reason(value):
+    # Returns the reason of rejecting a place with the value
+    if value == 0:
+        return NOT_TAKEN
+    return ON_HOLD if value == HELD else ALREADY_TAKEN
+
+
+def _longest_runs(free):
+    # Returns the longest run of adjacent True values in each row of a 2 dimensional bool array
+    padded = np.zeros([free.shape[0], free.shape[1] + 2], np.int8)
+    padded[:, 1:-1] = free
+    edges = np.diff(padded, axis=1)
+    # Runs start where the difference is 1 and end where it is -1, in the same order in each row
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    runs = np.zeros(free.shape[0], np.int64)
+    np.maximum.at(runs, rows, ends - starts)
+    return runs
+
+
+class SeatMap:
+    '''Seat array of a cinema hall with the number of free places and the longest run of adjacent free places
+    of each row, the counters are updated by book() and release() only for the changed rows
+
+    Parameters
+    ----------
+    :param seats_array: numpy array
+        a 2 dimensional numpy array representing a cinema hall in format [[row], [row]]
+        where row is a 1 dimensional array containing zeros (free place) or ones (taken seat) ex. [1, 0, 0, 0, 1],
+        the array is not copied, changes made without the SeatMap have to be followed by update_rows()
+
+    Raises
+    ------
+    :raises IncorrectArrayType:
+        if the seats_array is not a numpy array
+    :raises IncorrectArrayData:
+        if the array is not numeric
+    '''
+
+    def __init__(self, seats_array):
+        if not isinstance(seats_array, np.ndarray):
+            raise IncorrectArrayType('Incorrect array type, numpy array required')
+        if seats_array.dtype.kind not in 'biuf':
+            raise IncorrectArrayData('Incorrect data type in array, numeric required')
+        self.seats = np.atleast_2d(seats_array)
+        free = self.seats == 0
+        self.row_free = free.sum(axis=1)
+        self.longest_runs = _longest_runs(free)
+        self.free_seats = int(self.row_free.sum())
+
+    @property
+    def seats_taken(self):
+        return self.seats.size - self.free_seats
+
+    @property
+    def is_full(self):
+        return self.free_seats == 0
+
+    def has_room(self, num_places, adjacent=True):
+        '''Checks if num_places can be booked without looking at the seats
+
+        Parameters
+        ----------
+        :param num_places: int
+            number of places
+        :param adjacent: bool, optional
+            if True the places have to be adjacent places in one row (default is True)
+
+        Returns
+        -------
+        :returns: bool
+        '''
+
+        if num_places > self.free_seats:
+            return False
+        return not adjacent or num_places <= 0 or int(self.longest_runs.max()) >= num_places
+
+    def update_rows(self, rows):
+        '''Counts again the free places of the changed rows, each row takes O(row) time
+
+        Parameters
+        ----------
+        :param rows: list
+            indices of the changed rows
+        '''
+
+        rows = np.unique(np.asarray(rows, np.int64))
+        if len(rows) == 0:
+            return
+        free = self.seats[rows] == 0
+        self.free_seats += int(free.sum() - self.row_free[rows].sum())
+        self.row_free[rows] = free.sum(axis=1)
+        self.longest_runs[rows] = _longest_runs(free)
+
+    def _set_places(self, places, value, allowed):
+        # Sets all places to the value or none of them if any of them has a value other than allowed
+        # or is given twice, returns the indices of rows and places
+        try:
+            rows, numbers = np.array(places, np.int64).reshape(-1, 2).T
+        except (TypeError, ValueError):
+            raise IncorrectArrayType('Incorrect places, list of pairs (row, place) required')
+        if ((rows < 0) | (rows >= self.seats.shape[0]) | (numbers < 0) | (numbers >= self.seats.shape[1])).any():
+            raise IncorrectShape('Place out of the seat array')
+
+        current = self.seats[rows, numbers]
+        wrong = ~np.isin(current, allowed)
+        flat = rows * self.seats.shape[1] + numbers
+        order = np.argsort(flat, kind='stable')
+        duplicated = np.zeros(len(flat), bool)
+        duplicated[order[1:]] = flat[order[1:]] == flat[order[:-1]]
+        if (wrong | duplicated).any():
+            rejected = [(int(rows[i]), int(numbers[i]), DUPLICATED if duplicated[i] else _reason(current[i]))
+                        for i in np.flatnonzero(wrong | duplicated)]
+            raise BookingError(f'{len(rejected)} of {len(flat)} places can not be changed', rejected)
+        self.seats[rows, numbers] = value
+        self.update_rows(rows)
+        return rows, numbers
+
+    def book(self, places):
+        '''Books all places or none of them
+
+        Parameters
+        ----------
+        :param places: list
+            indices of places in format [(row, place), (row, place)] counted from 0
+
+        Raises
+        ------
+        :raises BookingError:
+            if any of the places is not free or is given twice (no place is booked)
+        :raises IncorrectShape:
+            if any of the places is out of the seat array
+        :raises IncorrectArrayType:
+            if the places are not pairs of integers
+        '''
+
+        self._set_places(places, 1, [0])
+
+    def hold(self, places):
+        '''Holds all free places or none of them, use HoldScheduler.hold() to release them after a time
+
+        Parameters
+        ----------
+        :param places: list
+            indices of places in format [(row, place), (row, place)] counted from 0
+
+        Raises
+        ------
+        :raises BookingError:
+            if any of the places is not free or is given twice (no place is held)
+        :raises IncorrectShape, IncorrectArrayType:
+            like book()
+        '''
+
+        self._set_places(places, HELD, [0])
+
+    def confirm(self, places):
+        '''Books all held places or none of them
+
+        Parameters
+        ----------
+        :param places: list
+            indices of places in format [(row, place), (row, place)] counted from 0
+
+        Raises
+        ------
+        :raises BookingError:
+            if any of the places is not held or is given twice (no place is booked)
+        :raises IncorrectShape, IncorrectArrayType:
+            like book()
+        '''
+
+        self._set_places(places, 1, [HELD])
+
+    def release(self, places):
+        '''Frees all places or none of them
+
+        Parameters
+        ----------
+        :param places: list
+            indices of places in format [(row, place), (row, place)] counted from 0
+
+        Raises
+        ------
+        :raises BookingError:
+            if any of the places is free or given twice (no place is freed)
+        :raises IncorrectShape, IncorrectArrayType:
+            like book()
+        '''
+
+        self._set_places(places, 0, [1, HELD])
+
+
+class HoldScheduler:
+    '''Holds places of screenings for a limited time and releases the lapsed holds
+
+    The deadlines are kept in a heap, so expire() looks only at the lapsed holds and not at the halls.
+    Confirmed and released holds are removed from the heap when their deadline comes
+
+    Parameters
+    ----------
+    :param ttl: float, optional
+        seconds after which a hold lapses (default is HOLD_TTL)
+    :param clock: function, optional
+        function returning the current time in seconds (default is time.monotonic)
+    '''
+
+    def __init__(self, ttl=HOLD_TTL, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        # Screenings in format {movie: SeatMap}
+        self._halls = {}
+        # Deadlines of held places in format {(movie, row, place): deadline}
+        self._deadlines = {}
+        # Heap of (deadline, number of the hold, movie, row, place), the number keeps equal deadlines in order
+        self._heap = []
+        self._holds = 0
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def add_hall(self, movie, seats):
+        '''Adds the seats of a screening, the places are held, confirmed and released in the seats
+
+        Parameters
+        ----------
+        :param movie:
+            the screening (movie title)
+        :param seats: numpy array or SeatMap
+            a 2 dimensional numpy array representing a cinema hall or its SeatMap
+
+        Returns
+        -------
+        :returns: SeatMap
+            SeatMap of the seats
+        '''
+
+        seat_map = seats if isinstance(seats, SeatMap) else SeatMap(seats)
+        self._halls[movie] = seat_map
+        return seat_map
+
+    def _get_hall(self, movie):
+        if movie not in self._halls:
+            raise BookingError(f'Unknown screening {movie}', movie=movie)
+        return self._halls[movie]
+
+    def _check_held(self, movie, places):
+        # Raises BookingError if any of the places is not held by the scheduler
+        rejected = [(row, place, NOT_HELD) for row, place in places if (movie, row, place) not in self._deadlines]
+        if rejected:
+            raise BookingError(f'{len(rejected)} of {len(places)} places are not held', rejected, movie)
+
+    def hold(self, movie, places, ttl=None):
+        '''Holds all places or none of them until the returned deadline
+
+        Parameters
+        ----------
+        :param movie:
+            the screening added by add_hall()
+        :param places: list
+            indices of places in format [(row, place), (row, place)] counted from 0
+        :param ttl: float, optional
+            seconds after which the hold lapses (default is None - the ttl of the scheduler)
+
+        Returns
+        -------
+        :returns: float
+            the deadline of the hold in the time of the clock
+
+        Raises
+        ------
+        :raises BookingError:
+            if the screening is unknown or if it occurs in SeatMap.hold()
+        :raises IncorrectShape, IncorrectArrayType:
+            if it occurs in SeatMap.hold()
+        '''
+
+        now = self.clock()
+        self.expire(now)
+        rows, numbers = self._get_hall(movie)._set_places(places, HELD, [0])
+        deadline = now + (self.ttl if ttl is None else ttl)
+        for row, place in zip(rows.tolist(), numbers.tolist()):
+            self._deadlines[movie, row, place] = deadline
+            heapq.heappush(self._heap, (deadline, self._holds, movie, row, place))
+            self._holds += 1
+        return deadline
+
+    def confirm(self, movie, places, save=None):
+        '''Books all held places or none of them
+
+        Parameters
+        ----------
+        :param movie:
+            the screening added by add_hall()
+        :param places: list
+            indices of places in format [(row, place), (row, place)] counted from 0
+        :param save: function, optional
+            function called without arguments after the places are booked,
+            if it raises an exception the places are held again until the same deadline (default is None)
+
+        Raises
+        ------
+        :raises BookingError:
+            if the screening is unknown, any of the places is not held (ex. the hold has lapsed)
+            or if it occurs in SeatMap.confirm()
+        '''
+
+        self.expire()
+        hall = self._get_hall(movie)
+        self._check_held(movie, places)
+        rows, numbers = hall._set_places(places, 1, [HELD])
+        if save is not None:
+            try:
+                save()
+            except BaseException:
+                hall._set_places(list(zip(rows, numbers)), HELD, [1])
+                raise
+        for row, place in zip(rows.tolist(), numbers.tolist()):
+            del self._deadlines[movie, row, place]
+
+    def release(self, movie, places):
+        '''Frees all held places or none of them before their deadline
+
+        Parameters
+        ----------
+        :param movie:
+            the screening added by add_hall()
+        :param places: list
+            indices of places in format [(row, place), (row, place)] counted from 0
+
+        Raises
+        ------
+        :raises BookingError:
+            like confirm()
+        '''
+
+        self.expire()
+        hall = self._get_hall(movie)
+        self._check_held(movie, places)
+        rows, numbers = hall._set_places(places, 0, [HELD])
+        for row, place in zip(rows.tolist(), numbers.tolist()):
+            del self._deadlines[movie, row, place]
+
+    def next_deadline(self):
+        '''Returns the deadline of the hold which lapses first, None if there are no holds'''
+
+        self._drop_removed()
+        return self._heap[0][0] if self._heap else None
+
+    def _drop_removed(self):
+        # Removes the confirmed and released holds from the top of the heap
+        while self._heap:
+            deadline, _, movie, row, place = self._heap[0]
+            if self._deadlines.get((movie, row, place)) == deadline:
+                return
+            heapq.heappop(self._heap)
+
+    def expire(self, now=None):
+        '''Frees the places whose holds have lapsed
+
+        Parameters
+        ----------
+        :param now: float, optional
+            the current time (default is None - the time of the clock)
+
+        Returns
+        -------
+        :returns: list
+            the freed places in format [(movie, row, place)]
+        '''
+
+        if now is None:
+            now = self.clock()
+        lapsed = {}
+        while self._heap and self._heap[0][0] <= now:
+            deadline, _, movie, row, place = heapq.heappop(self._heap)
+            if self._deadlines.get((movie, row, place)) == deadline:
+                del self._deadlines[movie, row, place]
+                lapsed.setdefault(movie, []).append((row, place))
+
+        for movie, places in lapsed.items():
+            hall = self._halls[movie]
+            # Places changed without the scheduler meanwhile are left as they are
+            places[:] = [(row, place) for row, place in places if hall.seats[row, place] == HELD]
+            if places:
+                hall._set_places(places, 0, [HELD])
+        return [(movie, row, place) for movie, places in lapsed.items() for row, place in places]
+
+
+class BookingService:
+    '''Keeps the seats of screenings in memory and books them for many cashier sessions (threads) at once
+
+    Each screening has its own lock, so sessions of different screenings do not wait for each other.
+    Places are given as (row_label, place) pairs numbered from 1 like in book_places()
+
+    Parameters
+    ----------
+    :param ttl: float, optional
+        seconds after which a hold lapses (default is HOLD_TTL)
+    :param clock: function, optional
+        function returning the current time in seconds (default is time.monotonic)
+    :param save: function, optional
+        function called as save(movie, seats_array) after each booking (book() and confirm()),
+        while the screening is still locked, ex. to write the csv file (default is None).
+        Held places are free in the saved seats_array, a hold is never written to a file,
+        so it can not outlive the service which would release it
+    '''
+
+    def __init__(self, ttl=HOLD_TTL, clock=time.monotonic, save=None):
+        self.ttl = ttl
+        self.clock = clock
+        self.save = save
+        # Screenings in format {movie: (lock, row_indices, SeatMap, HoldScheduler)},
+        # the lock of the service guards only adding screenings to the dict
+        self._screenings = {}
+        self._lock = threading.Lock()
+        # The first deadline of each screening with holds (HoldScheduler.next_deadline()) in a heap of
+        # (deadline, number of the entry, movie) and in format {movie: deadline}, entries which are not there are old
+        self._expiry = []
+        self._scheduled = {}
+        self._expiry_lock = threading.Lock()
+        self._entries = 0
+
+    def __contains__(self, movie):
+        return movie in self._screenings
+
+    def titles(self):
+        '''Returns a list of the screenings'''
+
+        with self._lock:
+            return list(self._screenings)
+
+    def add_screening(self, movie, seats_array, row_indices):
+        '''Adds a screening, its seats are copied
+
+        Parameters
+        ----------
+        :param movie:
+            the screening (movie title)
+        :param seats_array: numpy array
+            a 2 dimensional numpy array representing a cinema hall in format [[row], [row]]
+            where row is a 1 dimensional array containing zeros (free place) or ones (taken seat) ex. [1, 0, 0, 0, 1]
+        :param row_indices: dict
+            dictionary representing row indices in format {row_label: index} ex. {'A':0, 'B':1}
+
+        Raises
+        ------
+        :raises BookingError:
+            if the screening has already been added
+        :raises IncorrectArrayType, IncorrectArrayData:
+            if it occurs in SeatMap()
+        '''
+
+        if not isinstance(seats_array, np.ndarray):
+            raise IncorrectArrayType('Incorrect array type, numpy array required', movie)
+        seat_map = SeatMap(np.array(seats_array, np.int8))
+        holds = HoldScheduler(self.ttl, self.clock)
+        holds.add_hall(movie, seat_map)
+        with self._lock:
+            if movie in self._screenings:
+                raise BookingError(f'The screening {movie} has already been added', movie=movie)
+            self._screenings[movie] = (threading.Lock(), dict(row_indices), seat_map, holds)
+
+    def _get_screening(self, movie):
+        screening = self._screenings.get(movie)
+        if screening is None:
+            raise BookingError(f'Unknown screening {movie}', movie=movie)
+        return screening
+
+    def get_seats(self, movie):
+        '''Returns a copy of the seats of the screening with the held places free, like the seats passed to save()
+
+        Raises
+        ------
+        :raises BookingError:
+            if the screening is unknown
+        '''
+
+        lock, _, seat_map, holds = self._get_screening(movie)
+        with lock:
+            holds.expire()
+            return _without_holds(seat_map.seats)
+
+    def get_display_seats(self, movie):
+        '''Returns a copy of the seats of the screening with the held places (HELD), ex. for show_seats()
+
+        Raises
+        ------
+        :raises BookingError:
+            if the screening is unknown
+        '''
+
+        lock, _, seat_map, holds = self._get_screening(movie)
+        with lock:
+            holds.expire()
+            return seat_map.seats.copy()
+
+    def free_seats(self, movie):
+        '''Returns the number of free places of the screening
+
+        Raises
+        ------
+        :raises BookingError:
+            if the screening is unknown
+        '''
+
+        lock, _, seat_map, holds = self._get_screening(movie)
+        with lock:
+            holds.expire()
+            return seat_map.free_seats
+
+    def has_room(self, movie, num_places, adjacent=True):
+        '''Checks if num_places can be booked for the screening, like SeatMap.has_room()
+
+        Raises
+        ------
+        :raises BookingError:
+            if the screening is unknown
+        '''
+
+        lock, _, seat_map, holds = self._get_screening(movie)
+        with lock:
+            holds.expire()
+            return seat_map.has_room(num_places, adjacent)
+
+    def check(self, movie, places):
+        '''Returns the reason of rejecting each of the places, like check_places()
+
+        Raises
+        ------
+        :raises BookingError:
+            if the screening is unknown
+        :raises IncorrectArrayType:
+            if it occurs in check_places()
+        '''
+
+        lock, row_indices, seat_map, holds = self._get_screening(movie)
+        with lock:
+            holds.expire()
+            return check_places(seat_map.seats, row_indices, places)
+
+    def book(self, movie, places):
+        '''Checks and books all places or none of them, no other session books the screening meanwhile
+
+        Parameters
+        ----------
+        :param movie:
+            the screening
+        :param places: list
+            places to book in format [(row_label, place), (row_label, place)], places are numbered from 1
+
+        Raises
+        ------
+        :raises BookingError:
+            if the screening is unknown or any of the places can not be booked (with the rejected places)
+        :raises IncorrectArrayType:
+            if it occurs in check_places()
+        :raises Exception:
+            any exception raised by save(), the places are not booked then
+        '''
+
+        lock, row_indices, seat_map, holds = self._get_screening(movie)
+        with lock:
+            holds.expire()
+            indices = list(zip(*_checked_indices(seat_map.seats, row_indices, places, movie)))
+            seat_map.book(indices)
+            if self.save is not None:
+                try:
+                    self.save(movie, _without_holds(seat_map.seats))
+                except BaseException:
+                    # The places are booked only if they are saved
+                    seat_map.release(indices)
+                    raise
+
+    def hold(self, movie, places, ttl=None):
+        '''Checks and holds all places or none of them, like book()
+
+        Parameters
+        ----------
+        :param movie:
+            the screening
+        :param places: list
+            places to hold in format [(row_label, place), (row_label, place)], places are numbered from 1
+        :param ttl: float, optional
+            seconds after which the hold lapses (default is None - the ttl of the service)
+
+        Returns
+        -------
+        :returns: float
+            the deadline of the hold in the time of the clock
+
+        Raises
+        ------
+        :raises BookingError, IncorrectArrayType:
+            like book()
+        '''
+
+        lock, row_indices, seat_map, holds = self._get_screening(movie)
+        with lock:
+            holds.expire()
+            indices = list(zip(*_checked_indices(seat_map.seats, row_indices, places, movie)))
+            deadline = holds.hold(movie, indices, ttl)
+            self._schedule(movie, holds)
+        return deadline
+
+    def _schedule(self, movie, holds):
+        # Adding the first deadline of the screening to the heap of the service, called with the screening locked
+        deadline = holds.next_deadline()
+        if deadline is None:
+            return
+        with self._expiry_lock:
+            scheduled = self._scheduled.get(movie)
+            if scheduled is None or deadline < scheduled:
+                self._scheduled[movie] = deadline
+                heapq.heappush(self._expiry, (deadline, self._entries, movie))
+                self._entries += 1
+
+    def confirm(self, movie, places):
+        '''Books all held places or none of them
+
+        Parameters
+        ----------
+        :param movie:
+            the screening
+        :param places: list
+            held places in format [(row_label, place), (row_label, place)], places are numbered from 1
+
+        Raises
+        ------
+        :raises BookingError:
+            if the screening is unknown or any of the places is not held (ex. the hold has lapsed)
+        :raises Exception:
+            any exception raised by save(), the places stay held then
+        '''
+
+        lock, row_indices, seat_map, holds = self._get_screening(movie)
+
+        def save():
+            self.save(movie, _without_holds(seat_map.seats))
+
+        with lock:
+            _change_holds(holds.confirm, movie, row_indices, places, None if self.save is None else save)
+
+    def release(self, movie, places):
+        '''Frees all held places or none of them
+
+        Raises
+        ------
+        :raises BookingError:
+            like confirm()
+        '''
+
+        lock, row_indices, _, holds = self._get_screening(movie)
+        with lock:
+            _change_holds(holds.release, movie, row_indices, places)
+
+    def expire(self):
+        '''Frees the lapsed holds of all screenings
+
+        The service keeps only the first deadline of each screening, taken from its HoldScheduler,
+        so only the screenings whose first hold has lapsed are locked, the other screenings are not scanned
+
+        Returns
+        -------
+        :returns: list
+            the freed places in format [(movie, row, place)] counted from 0
+        '''
+
+        now = self.clock()
+        lapsed = []
+        with self._expiry_lock:
+            while self._expiry and self._expiry[0][0] <= now:
+                deadline, _, movie = heapq.heappop(self._expiry)
+                if self._scheduled.get(movie) == deadline:
+                    del self._scheduled[movie]
+                    lapsed.append(movie)
+
+        expired = []
+        for movie in lapsed:
+            lock, _, _, holds = self._screenings[movie]
+            with lock:
+                # Holds freed meanwhile by another call (or confirmed or released) are not freed again
+                expired += holds.expire(now)
+                self._schedule(movie, holds)
+        return expired
+
+
+def _without_holds(seats_array):
+    # Returns a copy of the seats with the held places free
+    return np.where(seats_array == HELD, 0, seats_array).astype(seats_array.dtype, copy=False)
+
+
+def _change_holds(change, movie, row_indices, places, *args):
+    # Calls HoldScheduler.confirm() or release() with places given as (row_label, place) pairs numbered from 1
+    # and the other arguments args, the rejected places of BookingError are given back in the same format
+    labels = {index: label for label, index in row_indices.items()}
+    indices = []
+    for row, place in places:
+        row = row_indices.get(row.strip().upper() if isinstance(row, str) else row, -1)
+        indices.append((row, _place_number(place) - 1))
+    try:
+        change(movie, indices, *args)
+    except BookingError as e:
+        rejected = [(labels.get(row, row), place + 1, reason) for row, place, reason in e.rejected or []]
+        raise BookingError(e.message, rejected, movie)
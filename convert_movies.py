@@ -0,0 +1,26 @@
+'''
+Convert_Movies Script
+---------------------
+
+This script converts the csv files with cinema halls
+into the compact binary format and into a single store file
+'''
+
+
+from load_save_data import convert_csv_to_bin, convert_csv_to_store
+
+# Directory with csv files, the output directory for binary files and the store file
+# LINUX
+csv_dir = './movies/'
+bin_dir = './movies_bin/'
+store_path = './movies.seats'
+# WINDOWS
+# csv_dir = '.\movies\'
+# bin_dir = '.\movies_bin\'
+# store_path = '.\movies.seats'
+
+converted = convert_csv_to_bin(csv_dir, bin_dir)
+print(f'Converted {len(converted)} files into {bin_dir}')
+
+converted = convert_csv_to_store(csv_dir, store_path)
+print(f'Stored {len(converted)} screenings in {store_path}')
@@ -7,13 +7,16 @@ and creating a csv file for each movie
 '''
 
 
-from load_save_data import create_seats_array
+from load_save_data import create_seats_arrays
 from meta_data import get_movie_titles
 
-# Setting the cinema hall size
+# Setting the default cinema hall size
 rows = 7
 seats = 30
 
+# Hall sizes for specific movies in format {movie: (rows, seats)}
+hall_sizes = {}
+
 # Creating empty report files
 # URL with movie data
 url = 'https://gist.githubusercontent.com/tiangechen/b68782efa49a16edaf07dc2cdaa855ea/raw/0c794a9717f18b094eabab2cd6a6b9a226903577/movies.csv'
@@ -22,4 +25,6 @@ url = 'https://gist.githubusercontent.com/tiangechen/b68782efa49a16edaf07dc2cdaa
 movie_list = get_movie_titles(url)
 if movie_list is not None:
     # Creating an zeros array for each movie
-    create_seats_array(movie_list, rows, seats)
+    halls = [(movie, *hall_sizes.get(movie, (rows, seats))) for movie in movie_list]
+    report = create_seats_arrays(halls)
+    print(f'Created {report["files"]} files in {report["seconds"]:.2f} s ({report["files_per_second"]:.0f} files/s)')
@@ -6,15 +6,71 @@ This module allows:
     -creating numpy arrays representing seats in a cinema hall
     -loading csv files into numpy arrays representing seats in a cinema hall
     -saving numpy arrays representing seats in a cinema hall into csv files
+    -loading and saving the same arrays in a compact binary format
+    -converting csv files into the binary format
+    -loading and saving the arrays through a single memory-mapped store file (seat_store module)
+    -appending bookings to a journal file and compacting it into the csv snapshot
+    -saving files atomically and detecting conflicting saves from other processes
+    -caching the loaded csv files in memory
+    -creating many csv files at once from a pool of threads
+    -parsing csv files without np.genfromtxt
 
 '''
 
 
+from seat_store import StoreError, create_store, open_store
+from contextlib import contextmanager, suppress
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+import threading
 import numpy as np
+import tempfile
+import io
 import string
+import struct
+import shutil
+import json
+import time
 import os
 
 
+# Binary seat map format:
+# magic, format version, number of rows, number of seats, seats taken, title length (little endian)
+# followed by the utf-8 encoded title and rows * seats int8 values
+BIN_MAGIC = b'KINO'
+BIN_VERSION = 1
+BIN_HEADER = struct.Struct('<4sBxHHIH')
+
+# Supported storage formats and their file extensions
+DATA_FORMATS = {
+    'csv': '.csv',
+    'bin': '.bin',
+    'store': '.seats',
+    'journal': '.csv',
+    'sqlite': '.sqlite',
+}
+
+# Journal of bookings kept next to a csv snapshot (snapshot path + JOURNAL_EXTENSION)
+JOURNAL_EXTENSION = '.journal'
+# Number of journal records after which the journal is folded into the snapshot
+JOURNAL_COMPACT_SIZE = 100
+# File keeping the number of records in the journal (journal path + JOURNAL_COUNT_EXTENSION)
+JOURNAL_COUNT_EXTENSION = '.count'
+
+# Lock file taken while a csv file is being saved (file path + LOCK_EXTENSION)
+LOCK_EXTENSION = '.lock'
+# Seconds to wait for the lock and the age after which a lock left by a dead process is removed
+LOCK_TIMEOUT = 10
+LOCK_STALE_TIME = 30
+
+# Maximum number of csv files kept in the cache of get_csv_data()
+CACHE_SIZE = 32
+# path: (file signatures, array), the least recently used entry first
+_csv_cache = OrderedDict()
+_cache_stats = {'hits': 0, 'misses': 0}
+_cache_lock = threading.Lock()
+
+
 class IncorrectArrayType(Exception):
     def __init__(self, message, movie=None):
         super().__init__(message)
@@ -40,8 +96,14 @@ class FileError(Exception):
         self.movie = movie
 
 
-def create_txt_info(movie, seats_array: np.ndarray):
-    '''Creates text info about a specific movie containing its title and number of taken seats (sum of seats_array)
+class SaveConflict(FileError):
+    def __init__(self, message, seats=None, movie=None):
+        super().__init__(message, movie=movie)
+        self.seats = seats
+
+
+def create_txt_info(movie, seats_array: np.ndarray, version=None):
+    '''Creates text info about a specific movie containing its title and number of taken seats (non zero seats)
 
     Parameters
     ----------
@@ -50,10 +112,12 @@ def create_txt_info(movie, seats_array: np.ndarray):
     :param seats_array: numpy array
         a 2 dimensional numpy array representing a cinema hall in format [[row], [row]]
         where row is a 1 dimensional array containing zeros (free place) or ones (taken seat) ex. [1, 0, 0, 0, 1]
+    :param version: int, optional
+        version of the file, added to the text info if it is not None (default is None)
 
     Returns
     -------
-    :return: text info about the move and seats taken (sum of the seats_array)
+    :return: text info about the move and seats taken (number of non zero seats in the seats_array)
 
     Raises
     ------
@@ -66,7 +130,10 @@ def create_txt_info(movie, seats_array: np.ndarray):
     if not isinstance(seats_array, np.ndarray):
         raise IncorrectArrayType('Incorrect array type, numpy array required', movie)
     try:
-        return f'Title: {movie}\n' + '+'*45 + f'\nSeats taken: {int(seats_array.sum())}\n'
+        txt_info = f'Title: {movie}\n' + '+'*45 + f'\nSeats taken: {int(np.minimum(seats_array, 1).sum())}\n'
+        if version is not None:
+            txt_info += f'Version: {version}\n'
+        return txt_info
     except (TypeError, ValueError):
         raise IncorrectArrayData('Incorrect data type in array, integer required', movie)
 
@@ -126,9 +193,263 @@ def create_seats_array(movies, num_rows: int, num_seats: int):
         return
 
 
+def create_seats_arrays(halls, directory='./movies/', workers=8):
+    '''Creates a csv file with a free cinema hall for each hall in halls, writing the files from a pool of threads
+
+    The file content of an empty hall is the same for every hall of the same size,
+    so it is prepared once for each size and only the title is added for each file.
+    Each file is locked and written atomically, like in save_csv_data()
+
+    Parameters
+    ----------
+    :param halls: list
+        list of halls in format [(movie, num_rows, num_seats), (movie, num_rows, num_seats)]
+    :param directory: str, optional
+        path to the directory for the csv files (default is './movies/')
+    :param workers: int, optional
+        number of threads writing the files (default is 8)
+
+    Returns
+    -------
+    :return: dict
+        created files, elapsed time and throughput in format
+        {'files': int, 'seconds': float, 'files_per_second': float}
+
+    Raises
+    ------
+    :raises IncorrectShape:
+        if num_rows or num_seats of a hall is not a positive integer or a hall is not in format (movie, rows, seats)
+    :raises FileError:
+        if the directory could not be found, a file could not be written or is locked by another process
+    '''
+
+    start = time.perf_counter()
+    # File content of an empty hall for each hall size
+    bodies = {}
+    files = []
+    try:
+        for movie, num_rows, num_seats in halls:
+            if (not isinstance(num_rows, int)) or (not isinstance(num_seats, int)) or num_rows <= 0 or num_seats <= 0:
+                raise IncorrectShape(f'The number of rows and seats must be a positive integer ({movie})')
+            if (num_rows, num_seats) not in bodies:
+                bodies[num_rows, num_seats] = (','.join(['0'] * num_seats) + '\n') * num_rows
+            files.append((movie, bodies[num_rows, num_seats]))
+    except (TypeError, ValueError):
+        raise IncorrectShape('Halls have to be in format (movie, rows, seats)')
+
+    # Only the title line differs between the headers
+    header_tail = '# ' + '+'*45 + '\n# Seats taken: 0\n# \n'
+
+    def write_file(movie_body):
+        movie, body = movie_body
+        path = os.path.join(directory, repair_title(str(movie)) + DATA_FORMATS['csv'])
+        # Locked and written atomically like save_csv_data(), a terminal never reads a partially written file
+        with _file_lock(movie, path), _atomic_file(path) as file:
+            file.write(f'# Title: {movie}\n' + header_tail + body)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Consuming the results to raise the exceptions from the threads
+            for _ in executor.map(write_file, files):
+                pass
+    except (OSError, TypeError) as e:
+        raise FileError('Could not create the files, directory could not be found', e)
+
+    seconds = time.perf_counter() - start
+    return {'files': len(files), 'seconds': seconds,
+            'files_per_second': len(files) / seconds if seconds > 0 else float('inf')}
+
+
+class CsvBackend:
+    '''Storage backend keeping each cinema hall in a csv file, the default backend of get_csv_data() and save_csv_data()
+
+    A storage backend is an object with the methods:
+        load(chosen_movie, path) - returns the cinema hall array
+        save(chosen_movie, seats_array, path, version=None, original_array=None) - saves the cinema hall array
+    '''
+
+    def load(self, chosen_movie, path):
+        '''Loads the cinema hall array from a csv file, see get_csv_data()'''
+
+        try:
+            file_stat = os.stat(path)
+            if file_stat.st_size == 0:
+                raise FileError(f'File for {chosen_movie} is empty', movie=chosen_movie)
+            # The cached array is valid as long as neither the file nor its journal has changed
+            signature = (_stat_signature(file_stat), _file_signature(get_journal_path(path)))
+            movie_array = _cache_get(path, signature)
+            if movie_array is None:
+                with open(path, 'rb') as file:
+                    movie_array, _ = parse_csv_data(file.read(), chosen_movie)
+                # Applying the bookings appended to the journal after the last snapshot
+                replay_journal(chosen_movie, movie_array, get_journal_path(path))
+                _cache_put(path, signature, movie_array)
+            return movie_array
+        except OSError as e:  # if the file does not exist
+            raise FileError(f'File or directory could not be found for {chosen_movie}', e, chosen_movie)
+        except TypeError as e:
+            raise FileError(f'Incorrect path for {chosen_movie}', e, chosen_movie)
+
+    def save(self, chosen_movie, seats_array, path, version=None, original_array=None):
+        '''Saves the cinema hall array into a csv file, see save_csv_data()'''
+
+        try:
+            # Validating the array before taking the lock
+            create_txt_info(chosen_movie, seats_array)
+
+            with _file_lock(chosen_movie, path):
+                current_version = get_csv_version(path)
+                changed = (version is not None) and (version != current_version)
+                if (version is not None) and not changed and os.path.exists(get_journal_path(path)):
+                    # Appending to the journal does not change the version, the bookings are compared instead
+                    current_array = self.load(chosen_movie, path)
+                    changed = (original_array is None or current_array.shape != original_array.shape
+                               or ((current_array != 0) != (original_array != 0)).any())
+                if changed:
+                    seats_array = _merge_bookings(chosen_movie, seats_array, original_array, path)
+                version = _write_csv_file(chosen_movie, seats_array, path, current_version + 1)
+                # The journal is already applied to the saved array, replaying it would book the released seats again
+                _remove_journal(path)
+                return version
+        except IncorrectArrayType as e:
+            raise FileError(f'Could not create an array for {e.movie}, ({e})', e, e.movie)
+        except IncorrectArrayData as e:
+            raise FileError(f'Could not save the file for {e.movie}, ({e})', e, e.movie)
+        except FileNotFoundError as e:
+            raise FileError('Directory could not be found', e)
+        except TypeError as e:
+            raise FileError(f'Incorrect path for {chosen_movie}', e, chosen_movie)
+
+
+def parse_csv_data(data, chosen_movie=None):
+    '''Parses the content of a csv file with a cinema hall into a numpy array and the header info
+
+    The header is made of the lines starting with '#' at the beginning of the file.
+    A body made of single digits separated with commas is parsed directly from the bytes,
+    any other body is parsed with np.genfromtxt
+
+    Parameters
+    ----------
+    :param data: bytes
+        content of the csv file
+    :param chosen_movie: str, optional
+        chosen movie title, used in error messages (default is None)
+
+    Returns
+    -------
+    :return: tuple
+        (seats_array, info) where seats_array is a 2 dimensional numpy array of int8
+        and info is a dictionary with the header values in format {'title': str, 'seats_taken': int, 'version': int},
+        values missing in the header are not in info
+
+    Raises
+    ------
+    :raises FileError:
+        if the body has rows of different length, contains no seats or is not made of integers (-127 to 127)
+        or if the number of seats taken in the header does not match the body
+    '''
+
+    # Reading the header lines
+    info = {}
+    body_start = 0
+    while data.startswith(b'#', body_start):
+        line_end = data.find(b'\n', body_start)
+        if line_end == -1:
+            line_end = len(data)
+        line = data[body_start + 1:line_end].decode('utf-8', 'replace').strip()
+        key, _, value = line.partition(':')
+        try:
+            if key == 'Title':
+                info['title'] = value.strip()
+            elif key == 'Seats taken':
+                info['seats_taken'] = int(value)
+            elif key == 'Version':
+                info['version'] = int(value)
+        except ValueError:
+            pass
+        body_start = line_end + 1
+
+    body = np.frombuffer(data, dtype=np.uint8, offset=min(body_start, len(data)))
+    seats_array = _parse_digits(body)
+    if seats_array is None:
+        # Not a body of single digits, using the general parser
+        try:
+            seats_array = np.atleast_2d(np.genfromtxt(io.BytesIO(body.tobytes()), delimiter=','))
+        except ValueError as e:
+            raise FileError(f'Incorrect rows in the file for {chosen_movie}', e, chosen_movie)
+        if np.isnan(seats_array).any():
+            raise FileError(f'Incorrect data in the file for {chosen_movie}, numbers required', movie=chosen_movie)
+        # The array has the same dtype whichever parser read it
+        if (seats_array != np.round(seats_array)).any() or (np.abs(seats_array) > 127).any():
+            raise FileError(f'Incorrect data in the file for {chosen_movie}, integers required', movie=chosen_movie)
+        seats_array = seats_array.astype(np.int8)
+    if seats_array.size == 0:
+        raise FileError(f'No seats in the file for {chosen_movie}', movie=chosen_movie)
+
+    if 'seats_taken' in info and info['seats_taken'] != int(np.minimum(seats_array, 1).sum()):
+        raise FileError(f'Seats taken in the header do not match the seats in the file for {chosen_movie}',
+                        movie=chosen_movie)
+    return seats_array, info
+
+
+def _parse_digits(body):
+    # Returns an int8 array of a body made of single digits separated with commas, or None for any other body
+    body = body[body != ord('\r')]
+    digits = (body >= ord('0')) & (body <= ord('9'))
+    commas = body == ord(',')
+    newlines = body == ord('\n')
+    if not (digits | commas | newlines).all():
+        return None
+    # Every value is one digit and every comma is between two digits
+    if (digits[1:] & digits[:-1]).any():
+        return None
+    comma_positions = np.flatnonzero(commas)
+    if len(comma_positions) and (comma_positions[0] == 0 or comma_positions[-1] == len(body) - 1):
+        return None
+    if not (digits[comma_positions - 1] & digits[comma_positions + 1]).all():
+        return None
+
+    # Number of digits in each non empty line
+    line_ends = np.flatnonzero(np.append(newlines, True))
+    digits_before = np.concatenate(([0], np.cumsum(digits)))[line_ends]
+    row_lengths = np.diff(np.concatenate(([0], digits_before)))
+    row_lengths = row_lengths[row_lengths > 0]
+    if len(row_lengths) == 0:
+        return np.zeros([0, 0], dtype=np.int8)
+    if (row_lengths != row_lengths[0]).any():
+        return None
+    return (body[digits] - ord('0')).astype(np.int8).reshape(len(row_lengths), row_lengths[0])
+
+
+# Backend used by get_csv_data() and save_csv_data()
+_csv_backend = CsvBackend()
+_storage_backend = _csv_backend
+
+
+def set_storage_backend(backend=None):
+    '''Sets the storage backend used by get_csv_data() and save_csv_data()
+
+    Parameters
+    ----------
+    :param backend: object, optional
+        an object with the load() and save() methods of CsvBackend, None - csv files (default is None)
+    '''
+
+    global _storage_backend
+    _storage_backend = _csv_backend if backend is None else backend
+
+
+def get_storage_backend():
+    '''Returns the storage backend used by get_csv_data() and save_csv_data()'''
+
+    return _storage_backend
+
+
 def get_csv_data(chosen_movie, path):
     '''Loads the cinema hall array from a csv file and returns it as a numpy array
 
+    The array is loaded by the storage backend set with set_storage_backend() (CsvBackend by default)
+
     Parameters
     ----------
     :param chosen_movie: str
@@ -139,6 +460,7 @@ def get_csv_data(chosen_movie, path):
     Returns
     -------
     :return: numpy array representing a cinema hall array
+        (served from the cache if the file has not changed since it was last loaded or saved)
 
     Raises
     ------
@@ -146,24 +468,26 @@ def get_csv_data(chosen_movie, path):
         if the chosen_movie csv file is empty
         or if OSError is raised (file or directory could not be found)
         or if TypeError is raised (incorrect path)
+        or if the journal of the file contains an incorrect record
     '''
 
     if chosen_movie is None:
         return
-    try:
-        if os.stat(path).st_size == 0:
-            raise FileError(f'File for {chosen_movie} is empty', movie=chosen_movie)
-        movie_array = np.genfromtxt(path, delimiter=',', skip_header=4)
-        return movie_array
-    except OSError as e:  # if the file does not exist
-        raise FileError(f'File or directory could not be found for {chosen_movie}', e, chosen_movie)
-    except TypeError as e:
-        raise FileError(f'Incorrect path for {chosen_movie}', e, chosen_movie)
+    return _storage_backend.load(chosen_movie, path)
 
 
-def save_csv_data(chosen_movie, seats_array, path):
+def save_csv_data(chosen_movie, seats_array, path, version=None, original_array=None):
     '''Saves the cinema hall array into a csv file
 
+    The array is saved by the storage backend set with set_storage_backend() (CsvBackend by default).
+    The file is written to a temporary file and renamed, so it is never left partially written.
+    Each save increments the version stored in the file header. If version is given and the file
+    has been saved by someone else since it was loaded, the seats booked in seats_array
+    (taken in seats_array, free in original_array) are merged into the saved file,
+    or the save is rejected if original_array is not given or if one of the seats has been taken meanwhile.
+    A journal of the file is folded into the saved file and removed (the bookings appended to it
+    since loading are merged like a save made by someone else)
+
     Parameters
     ----------
     :param chosen_movie: str
@@ -173,9 +497,20 @@ def save_csv_data(chosen_movie, seats_array, path):
         where row is a 1 dimensional array containing zeros (free place) or ones (taken seat) ex. [1, 0, 0, 0, 1]
     :param path: str
         path to chosen_movie csv file
+    :param version: int, optional
+        version of the file returned by get_csv_version() before loading it (default is None - no check)
+    :param original_array: numpy array, optional
+        the cinema hall array as it was loaded, used for merging (default is None)
+
+    Returns
+    -------
+    :return: int
+        version of the saved file
 
     Raises
     ------
+    :raises SaveConflict:
+        if the file has been saved by someone else and the bookings could not be merged
     :raises FileError:
         if one of the following exceptions is raised:
         IncorrectArrayType,
@@ -187,20 +522,186 @@ def save_csv_data(chosen_movie, seats_array, path):
     if (chosen_movie is not None) and (seats_array is not None):
         if not isinstance(seats_array, np.ndarray):
             raise IncorrectArrayType('Incorrect array type, numpy array required', chosen_movie)
+        return _storage_backend.save(chosen_movie, seats_array, path, version, original_array)
+
+
+def get_csv_version(path):
+    '''Returns the version stored in the header of a csv file
+
+    Parameters
+    ----------
+    :param path: str
+        path to a csv file
+
+    Returns
+    -------
+    :return: int
+        the version of the file, 0 if the file does not exist or has no version in its header
+    '''
+
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            for line in file:
+                if not line.startswith('#'):
+                    break
+                if line.startswith('# Version:'):
+                    return int(line.split(':', 1)[1])
+    except (OSError, TypeError, ValueError):
+        pass
+    return 0
+
+
+def _merge_bookings(chosen_movie, seats_array, original_array, path, load=None):
+    # Applying the seats booked since loading (taken in seats_array, free in original_array) to the saved array
+    # loaded with load(chosen_movie, path) (the csv file by default)
+    if original_array is None:
+        raise SaveConflict(f'The file for {chosen_movie} has been changed by someone else', movie=chosen_movie)
+    current_array = (load or _csv_backend.load)(chosen_movie, path)
+    if current_array.shape != seats_array.shape or original_array.shape != seats_array.shape:
+        raise SaveConflict(f'Array shape does not match the file for {chosen_movie}', movie=chosen_movie)
+
+    booked = (seats_array == 1) & (original_array == 0)
+    taken = booked & (current_array != 0)
+    if taken.any():
+        raise SaveConflict(f'Seats have been taken by someone else for {chosen_movie}',
+                           [tuple(seat) for seat in np.argwhere(taken).tolist()], chosen_movie)
+    current_array[booked] = 1
+    return current_array
+
+
+@contextmanager
+def _file_lock(chosen_movie, path):
+    # Creating the lock file is atomic, only one process can hold it
+    lock_path = f'{path}{LOCK_EXTENSION}'
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while True:
         try:
-            # Adding report info to the file
-            txt_info = create_txt_info(chosen_movie, seats_array)
+            lock = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                # Removing a lock left by a process which died while saving
+                lock_stat = os.stat(lock_path)
+                if time.time() - lock_stat.st_mtime > LOCK_STALE_TIME:
+                    _remove_stale_lock(lock_path, lock_stat)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.monotonic() > deadline:
+                raise FileError(f'The file for {chosen_movie} is locked by another process', movie=chosen_movie)
+            time.sleep(0.01)
+    try:
+        yield
+    finally:
+        # The lock is removed only if it is still this one (a lock taken for too long may have been broken)
+        with suppress(FileNotFoundError):
+            if os.stat(lock_path).st_ino == os.fstat(lock).st_ino:
+                os.remove(lock_path)
+        os.close(lock)
 
-            # Saving the zeros array
-            np.savetxt(path, seats_array, delimiter=',', fmt='%1d', header=txt_info)
-        except IncorrectArrayType as e:
-            raise FileError(f'Could not create an array for {e.movie}, ({e})', e, e.movie)
-        except IncorrectArrayData as e:
-            raise FileError(f'Could not save the file for {e.movie}, ({e})', e, e.movie)
-        except FileNotFoundError as e:
-            raise FileError('Directory could not be found', e)
-        except TypeError as e:
-            raise FileError(f'Incorrect path for {chosen_movie}', e, chosen_movie)
+
+def _remove_stale_lock(lock_path, lock_stat):
+    # Moving the lock away under a unique name first, so only one process breaks it,
+    # a lock taken meanwhile by another process (a different file) is put back
+    stale_path = f'{lock_path}.{os.getpid()}.{threading.get_ident()}.stale'
+    os.rename(lock_path, stale_path)
+    moved_stat = os.stat(stale_path)
+    if (moved_stat.st_ino, moved_stat.st_mtime_ns) != (lock_stat.st_ino, lock_stat.st_mtime_ns):
+        with suppress(FileExistsError):
+            os.link(stale_path, lock_path)
+    os.remove(stale_path)
+
+
+@contextmanager
+def _atomic_file(path, mode='w'):
+    # Writing into a temporary file in the same directory and renaming it over path
+    directory, file_name = os.path.split(path)
+    descriptor, temp_path = tempfile.mkstemp(prefix=f'.{file_name}.', suffix='.tmp', dir=directory or '.')
+    try:
+        with os.fdopen(descriptor, mode) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        if os.path.exists(path):
+            shutil.copymode(path, temp_path)
+        else:
+            os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def _write_csv_file(chosen_movie, seats_array, path, version):
+    # Adding report info to the file
+    txt_info = create_txt_info(chosen_movie, seats_array, version)
+
+    # Saving the array
+    with _atomic_file(path) as file:
+        np.savetxt(file, seats_array, delimiter=',', fmt='%1d', header=txt_info)
+
+    # Updating the cache, unless a journal will still be replayed over the saved file
+    journal_signature = _file_signature(get_journal_path(path))
+    if journal_signature is None and seats_array.ndim == 2:
+        _cache_put(path, (_file_signature(path), None), np.array(seats_array, dtype=np.int8))
+    return version
+
+
+def _stat_signature(file_stat):
+    return file_stat.st_ino, file_stat.st_mtime_ns, file_stat.st_size
+
+
+def _file_signature(path):
+    # Identifies the current content of a file, None if the file does not exist
+    try:
+        return _stat_signature(os.stat(path))
+    except FileNotFoundError:
+        return None
+
+
+def _cache_get(path, signature):
+    # Returns a copy of the cached array (the caller may modify it) or None
+    key = os.path.abspath(path)
+    with _cache_lock:
+        entry = _csv_cache.get(key)
+        if entry is None or entry[0] != signature:
+            _cache_stats['misses'] += 1
+            return None
+        _csv_cache.move_to_end(key)
+        _cache_stats['hits'] += 1
+        return entry[1].copy()
+
+
+def _cache_put(path, signature, seats_array):
+    key = os.path.abspath(path)
+    with _cache_lock:
+        _csv_cache[key] = (signature, seats_array.copy())
+        _csv_cache.move_to_end(key)
+        while len(_csv_cache) > CACHE_SIZE:
+            _csv_cache.popitem(last=False)
+
+
+def get_cache_info():
+    '''Returns statistics of the cache used by get_csv_data()
+
+    Returns
+    -------
+    :return: dict
+        dictionary in format {'hits': int, 'misses': int, 'size': int, 'max_size': int}
+    '''
+
+    with _cache_lock:
+        return {'hits': _cache_stats['hits'], 'misses': _cache_stats['misses'],
+                'size': len(_csv_cache), 'max_size': CACHE_SIZE}
+
+
+def clear_cache():
+    '''Removes all arrays from the cache used by get_csv_data() and resets its statistics'''
+
+    with _cache_lock:
+        _csv_cache.clear()
+        _cache_stats['hits'] = 0
+        _cache_stats['misses'] = 0
 
 
 def repair_title(chosen_movie):
@@ -229,3 +730,527 @@ def repair_title(chosen_movie):
         return valid_chosen_movie
     except (ValueError, TypeError):
         raise FileError(f'Incorrect movie title: {chosen_movie}', chosen_movie)
+
+
+def get_bin_data(chosen_movie, path):
+    '''Loads the cinema hall array from a binary file and returns it as a numpy array
+
+    Parameters
+    ----------
+    :param chosen_movie: str
+        chosen movie title
+    :param path: str
+        path to chosen_movie binary file
+
+    Returns
+    -------
+    :return: numpy array (int8) representing a cinema hall array
+
+    Raises
+    ------
+    :raises FileError:
+        if the chosen_movie file is empty or is not a valid binary seat map
+        or if OSError is raised (file or directory could not be found)
+        or if TypeError is raised (incorrect path)
+    '''
+
+    if chosen_movie is None:
+        return
+    try:
+        with open(path, 'rb') as file:
+            header = file.read(BIN_HEADER.size)
+            if len(header) == 0:
+                raise FileError(f'File for {chosen_movie} is empty', movie=chosen_movie)
+            if len(header) != BIN_HEADER.size:
+                raise FileError(f'Incorrect file header for {chosen_movie}', movie=chosen_movie)
+            magic, version, num_rows, num_seats, _, title_len = BIN_HEADER.unpack(header)
+            if magic != BIN_MAGIC or version != BIN_VERSION:
+                raise FileError(f'Incorrect file format for {chosen_movie}', movie=chosen_movie)
+            # Skipping the title, the seats are stored right after it
+            file.seek(title_len, os.SEEK_CUR)
+            movie_array = np.fromfile(file, dtype=np.int8, count=num_rows * num_seats)
+        if movie_array.size != num_rows * num_seats:
+            raise FileError(f'File for {chosen_movie} is truncated', movie=chosen_movie)
+        return movie_array.reshape(num_rows, num_seats)
+    except OSError as e:  # if the file does not exist
+        raise FileError(f'File or directory could not be found for {chosen_movie}', e, chosen_movie)
+    except TypeError as e:
+        raise FileError(f'Incorrect path for {chosen_movie}', e, chosen_movie)
+
+
+def save_bin_data(chosen_movie, seats_array, path, original_array=None):
+    '''Saves the cinema hall array into a binary file
+
+    The file is locked while it is saved and written to a temporary file which is renamed.
+    The binary format has no version, so if original_array is given, the seats booked in seats_array
+    (taken in seats_array, free in original_array) are always merged into the file as it is on disk,
+    or the save is rejected if one of them has been taken meanwhile
+
+    Parameters
+    ----------
+    :param chosen_movie: str
+        chosen movie title
+    :param seats_array: numpy array
+        a 2 dimensional numpy array representing a cinema hall in format [[row], [row]]
+        where row is a 1 dimensional array containing zeros (free place) or ones (taken seat) ex. [1, 0, 0, 0, 1]
+    :param path: str
+        path to chosen_movie binary file
+    :param original_array: numpy array, optional
+        the cinema hall array as it was loaded, used for merging (default is None - the file is overwritten)
+
+    Raises
+    ------
+    :raises IncorrectArrayType:
+        if the seats_array is not a numpy array
+    :raises SaveConflict:
+        if one of the seats booked in seats_array has been taken by someone else
+    :raises FileError:
+        if one of the following exceptions is raised:
+        IncorrectArrayData,
+        IncorrectShape,
+        FileNotFoundError
+        TypeError
+    '''
+
+    if (chosen_movie is None) or (seats_array is None):
+        return
+    if not isinstance(seats_array, np.ndarray):
+        raise IncorrectArrayType('Incorrect array type, numpy array required', chosen_movie)
+    try:
+        if seats_array.ndim != 2:
+            raise IncorrectShape('A 2 dimensional array required')
+        try:
+            data = seats_array.astype(np.int8)
+        except (TypeError, ValueError):
+            raise IncorrectArrayData('Incorrect data type in array, integer required', chosen_movie)
+
+        with _file_lock(chosen_movie, path):
+            if (original_array is not None) and os.path.exists(path):
+                data = _merge_bookings(chosen_movie, data, original_array, path, get_bin_data)
+            seats_taken = int(np.minimum(data, 1).sum())
+            title = str(chosen_movie).encode('utf-8')
+            header = BIN_HEADER.pack(BIN_MAGIC, BIN_VERSION, data.shape[0], data.shape[1], seats_taken, len(title))
+            with _atomic_file(path, 'wb') as file:
+                file.write(header)
+                file.write(title)
+                file.write(data.tobytes())
+    except IncorrectArrayData as e:
+        raise FileError(f'Could not save the file for {e.movie}, ({e})', e, e.movie)
+    except (IncorrectShape, struct.error) as e:
+        raise FileError(f'Incorrect array shape for {chosen_movie}', e, chosen_movie)
+    except FileNotFoundError as e:
+        raise FileError('Directory could not be found', e)
+    except TypeError as e:
+        raise FileError(f'Incorrect path for {chosen_movie}', e, chosen_movie)
+
+
+def get_seats_data(chosen_movie, path, data_format='csv'):
+    '''Loads the cinema hall array stored in the chosen format
+
+    Parameters
+    ----------
+    :param chosen_movie: str
+        chosen movie title
+    :param path: str
+        path to chosen_movie file, or to the store file for the 'store' format
+    :param data_format: str, optional
+        one of the DATA_FORMATS keys (default is 'csv')
+
+    Returns
+    -------
+    :return: numpy array representing a cinema hall array
+        (for the 'store' format a copy of the screening, changing it does not change the store file)
+
+    Raises
+    ------
+    :raises FileError:
+        if the data_format is not supported
+        or if get_csv_data() or get_bin_data() raised FileError
+        or if the store could not be read
+    '''
+
+    if data_format in ('csv', 'journal', 'sqlite'):
+        return get_csv_data(chosen_movie, path)
+    elif data_format == 'bin':
+        return get_bin_data(chosen_movie, path)
+    elif data_format == 'store':
+        if chosen_movie is None:
+            return
+        try:
+            return np.array(open_store(path).get(chosen_movie))
+        except StoreError as e:
+            raise FileError(e.message, e, chosen_movie)
+    raise FileError(f'Unsupported data format: {data_format}', movie=chosen_movie)
+
+
+def save_seats_data(chosen_movie, seats_array, path, data_format='csv', version=None, original_array=None):
+    '''Saves the cinema hall array in the chosen format
+
+    Parameters
+    ----------
+    :param chosen_movie: str
+        chosen movie title
+    :param seats_array: numpy array
+        a 2 dimensional numpy array representing a cinema hall in format [[row], [row]]
+        where row is a 1 dimensional array containing zeros (free place) or ones (taken seat) ex. [1, 0, 0, 0, 1]
+    :param path: str
+        path to chosen_movie file, or to the store file for the 'store' format
+    :param data_format: str, optional
+        one of the DATA_FORMATS keys (default is 'csv')
+    :param version: int, optional
+        version of the csv file passed to save_csv_data() and save_journal_data() (default is None)
+    :param original_array: numpy array, optional
+        the array as it was loaded, passed to save_csv_data(), save_journal_data() and save_bin_data(),
+        for the 'store' format the seats booked since loading are merged into the store like in save_bin_data()
+        (default is None - the screening is overwritten)
+
+    Raises
+    ------
+    :raises SaveConflict:
+        if one of the booked seats has been taken by someone else
+    :raises FileError:
+        if the data_format is not supported
+        or if save_csv_data(), save_journal_data() or save_bin_data() raised FileError
+        or if the store could not be written
+    '''
+
+    if data_format in ('csv', 'sqlite'):
+        return save_csv_data(chosen_movie, seats_array, path, version, original_array)
+    elif data_format == 'journal':
+        return save_journal_data(chosen_movie, seats_array, path, version, original_array)
+    elif data_format == 'bin':
+        return save_bin_data(chosen_movie, seats_array, path, original_array)
+    elif data_format == 'store':
+        if (chosen_movie is None) or (seats_array is None):
+            return
+        try:
+            store = open_store(path)
+            # The store file holds every screening, so it is locked as a whole while a screening is saved
+            with _file_lock(chosen_movie, path):
+                if original_array is not None:
+                    seats_array = _merge_bookings(chosen_movie, seats_array, original_array, path,
+                                                  lambda movie, _: np.array(store.get(movie)))
+                return store.save(chosen_movie, seats_array)
+        except StoreError as e:
+            raise FileError(e.message, e, chosen_movie)
+        except (OSError, TypeError) as e:
+            raise FileError(f'Could not lock the store for {chosen_movie}', e, chosen_movie)
+    raise FileError(f'Unsupported data format: {data_format}', movie=chosen_movie)
+
+
+def convert_csv_to_bin(csv_dir, bin_dir):
+    '''Converts every csv file in csv_dir into a binary file with the same name in bin_dir
+
+    Parameters
+    ----------
+    :param csv_dir: str
+        path to a directory with csv files
+    :param bin_dir: str
+        path to a directory for binary files, created if it does not exist
+
+    Returns
+    -------
+    :return: list
+        titles of the converted movies
+
+    Raises
+    ------
+    :raises FileError:
+        if one of the directories could not be opened or created
+    '''
+
+    try:
+        os.makedirs(bin_dir, exist_ok=True)
+        file_names = sorted(os.listdir(csv_dir))
+    except (OSError, TypeError) as e:
+        raise FileError('Directory could not be found', e)
+
+    converted = []
+    for file_name in file_names:
+        movie, extension = os.path.splitext(file_name)
+        if extension != DATA_FORMATS['csv']:
+            continue
+        try:
+            seats_array = _csv_backend.load(movie, os.path.join(csv_dir, file_name))
+            save_bin_data(movie, seats_array.astype(np.int8), os.path.join(bin_dir, movie + DATA_FORMATS['bin']))
+            converted.append(movie)
+        except FileError as e:
+            print(f'Could not convert the file for {movie} ({e.message})')
+    return converted
+
+
+def convert_csv_to_store(csv_dir, store_path, capacity=1024):
+    '''Creates a store file at store_path holding a screening for every csv file in csv_dir
+
+    Parameters
+    ----------
+    :param csv_dir: str
+        path to a directory with csv files
+    :param store_path: str
+        path to the store file (an existing file is overwritten)
+    :param capacity: int, optional
+        maximum number of screenings in the store (default is 1024)
+
+    Returns
+    -------
+    :return: list
+        titles of the converted movies
+
+    Raises
+    ------
+    :raises FileError:
+        if the directory could not be opened or the store could not be created
+    '''
+
+    try:
+        file_names = sorted(os.listdir(csv_dir))
+        store = create_store(store_path, capacity)
+    except (OSError, TypeError) as e:
+        raise FileError('Directory could not be found', e)
+    except StoreError as e:
+        raise FileError(e.message, e)
+
+    converted = []
+    for file_name in file_names:
+        movie, extension = os.path.splitext(file_name)
+        if extension != DATA_FORMATS['csv']:
+            continue
+        try:
+            store.add_screening(movie, _csv_backend.load(movie, os.path.join(csv_dir, file_name)))
+            converted.append(movie)
+        except FileError as e:
+            print(f'Could not convert the file for {movie} ({e.message})')
+        except StoreError as e:
+            print(f'Could not add {movie} to the store ({e.message})')
+    return converted
+
+
+def get_journal_path(path):
+    '''Returns the path to the journal of the csv snapshot at path'''
+
+    return f'{path}{JOURNAL_EXTENSION}'
+
+
+def replay_journal(chosen_movie, seats_array, journal_path):
+    '''Marks every seat recorded in the journal as taken in seats_array (in place)
+
+    A record which could not be decoded (ex. written partially when a process died) is skipped
+
+    Parameters
+    ----------
+    :param chosen_movie: str
+        chosen movie title
+    :param seats_array: numpy array
+        a 2 dimensional numpy array representing a cinema hall loaded from the snapshot
+    :param journal_path: str
+        path to the journal file
+
+    Returns
+    -------
+    :return: int
+        number of replayed records, 0 if the journal does not exist
+
+    Raises
+    ------
+    :raises FileError:
+        if a record points outside of the seats_array
+    '''
+
+    replayed = 0
+    for line, row, place in _journal_records(journal_path):
+        try:
+            if row < 0 or place < 0:
+                raise IndexError
+            seats_array[row, place] = 1
+        except IndexError as e:
+            raise FileError(f'Incorrect journal record for {chosen_movie}: {line.strip()}', e, chosen_movie)
+        replayed += 1
+    return replayed
+
+
+def _journal_records(journal_path):
+    # Yields (line, row, place) for each record which could be decoded, nothing if the journal does not exist
+    try:
+        with open(journal_path, 'r', encoding='utf-8') as journal:
+            lines = journal.readlines()
+    except FileNotFoundError:
+        return
+    for line in lines:
+        try:
+            record = json.loads(line)
+            yield line, int(record['row']), int(record['place'])
+        except (ValueError, KeyError, TypeError):
+            continue
+
+
+def _journal_size(journal_path):
+    # Returns the number of records in the journal, counted from the journal only if the count file is missing
+    try:
+        with open(journal_path + JOURNAL_COUNT_EXTENSION, 'r') as count_file:
+            return int(count_file.read())
+    except (OSError, ValueError):
+        pass
+    try:
+        with open(journal_path, 'rb') as journal:
+            return sum(1 for line in journal if line.endswith(b'\n'))
+    except FileNotFoundError:
+        return 0
+
+
+def append_journal(chosen_movie, places, path):
+    '''Appends a record for each booked place to the journal of the csv snapshot at path
+
+    Parameters
+    ----------
+    :param chosen_movie: str
+        chosen movie title
+    :param places: list or numpy array
+        indices of booked seats in format [(row, place), (row, place)] counted from 0
+    :param path: str
+        path to chosen_movie csv file (the snapshot)
+
+    Returns
+    -------
+    :return: int
+        number of records in the journal after appending
+
+    Raises
+    ------
+    :raises FileError:
+        if the journal could not be written
+    '''
+
+    timestamp = time.time()
+    records = ''.join(json.dumps({'movie': chosen_movie, 'row': int(row), 'place': int(place), 'time': timestamp}) + '\n'
+                      for row, place in places).encode('utf-8')
+    journal_path = get_journal_path(path)
+    try:
+        journal_size = _journal_size(journal_path) + len(places)
+        # Only the last byte of the journal is read, the records are appended at its end
+        with open(journal_path, 'a+b') as journal:
+            if journal.seek(0, os.SEEK_END) > 0:
+                journal.seek(-1, os.SEEK_END)
+                # Starting from a new line if the last record was written partially
+                if journal.read(1) != b'\n':
+                    records = b'\n' + records
+            journal.write(records)
+            journal.flush()
+            os.fsync(journal.fileno())
+        with open(journal_path + JOURNAL_COUNT_EXTENSION, 'w') as count_file:
+            count_file.write(str(journal_size))
+        return journal_size
+    except (OSError, TypeError) as e:
+        raise FileError(f'Could not write the journal for {chosen_movie}', e, chosen_movie)
+
+
+def compact_journal(chosen_movie, path):
+    '''Folds the journal into the csv snapshot and removes the journal
+
+    Parameters
+    ----------
+    :param chosen_movie: str
+        chosen movie title
+    :param path: str
+        path to chosen_movie csv file (the snapshot)
+
+    Raises
+    ------
+    :raises FileError:
+        if get_csv_data() or save_csv_data() raised FileError
+    '''
+
+    # The snapshot is written before the journal is removed,
+    # replaying the same journal again over the new snapshot does not change it
+    try:
+        with _file_lock(chosen_movie, path):
+            seats_array = _csv_backend.load(chosen_movie, path)
+            _write_csv_file(chosen_movie, seats_array, path, get_csv_version(path) + 1)
+            _remove_journal(path)
+    except (IncorrectArrayType, IncorrectArrayData) as e:
+        raise FileError(f'Could not save the file for {chosen_movie}, ({e})', e, chosen_movie)
+    except (OSError, TypeError) as e:
+        raise FileError(f'Could not compact the journal for {chosen_movie}', e, chosen_movie)
+
+
+def _remove_journal(path):
+    # Removing the journal and its record count, once they are folded into the snapshot
+    for journal_file in (get_journal_path(path), get_journal_path(path) + JOURNAL_COUNT_EXTENSION):
+        with suppress(FileNotFoundError):
+            os.remove(journal_file)
+
+
+def save_journal_data(chosen_movie, seats_array, path, version=None, original_array=None):
+    '''Saves the cinema hall array by appending its new bookings to the journal of the csv snapshot
+
+    The new bookings are the seats taken in seats_array, but free in original_array (or in the snapshot
+    with its journal if original_array is not given), so only those seats are written.
+    The save is rejected if one of them has been taken by someone else since original_array was loaded.
+    If version is given and the snapshot has not been rewritten since it was loaded, the seats taken meanwhile
+    are read from the journal records only and the snapshot is not loaded.
+    The journal is compacted after JOURNAL_COMPACT_SIZE records
+
+    Parameters
+    ----------
+    :param chosen_movie: str
+        chosen movie title
+    :param seats_array: numpy array
+        a 2 dimensional numpy array representing a cinema hall in format [[row], [row]]
+        where row is a 1 dimensional array containing zeros (free place) or ones (taken seat) ex. [1, 0, 0, 0, 1]
+    :param path: str
+        path to chosen_movie csv file (the snapshot)
+    :param version: int, optional
+        version of the snapshot returned by get_csv_version() before loading it (default is None)
+    :param original_array: numpy array, optional
+        the cinema hall array as it was loaded (default is None - no check)
+
+    Raises
+    ------
+    :raises IncorrectArrayType:
+        if the seats_array is not a numpy array
+    :raises SaveConflict:
+        if one of the new bookings has been taken by someone else
+    :raises FileError:
+        if the shape of seats_array does not match the snapshot
+        or if get_csv_data(), append_journal() or compact_journal() raised FileError
+    '''
+
+    if (chosen_movie is None) or (seats_array is None):
+        return
+    if not isinstance(seats_array, np.ndarray):
+        raise IncorrectArrayType('Incorrect array type, numpy array required', chosen_movie)
+    if original_array is not None and original_array.shape != seats_array.shape:
+        raise FileError(f'Array shape does not match the file for {chosen_movie}', movie=chosen_movie)
+
+    try:
+        with _file_lock(chosen_movie, path):
+            if original_array is None:
+                current_array = _csv_backend.load(chosen_movie, path)
+                if current_array.shape != seats_array.shape:
+                    raise FileError(f'Array shape does not match the file for {chosen_movie}', movie=chosen_movie)
+                new_places = np.argwhere((seats_array == 1) & (current_array == 0))
+                taken = []
+            else:
+                # Only the few changed seats are compared, not the whole hall
+                changed = np.flatnonzero(seats_array != original_array)
+                changed = changed[(seats_array.flat[changed] == 1) & (original_array.flat[changed] == 0)]
+                new_places = np.column_stack(np.unravel_index(changed, seats_array.shape))
+                if (version is not None) and (version == get_csv_version(path)):
+                    # The snapshot is the one which was loaded, the seats taken since then are in the journal
+                    journal = {(row, place) for _, row, place in _journal_records(get_journal_path(path))}
+                    taken = [seat for seat in map(tuple, new_places.tolist()) if seat in journal]
+                else:
+                    current_array = _csv_backend.load(chosen_movie, path)
+                    if current_array.shape != seats_array.shape:
+                        raise FileError(f'Array shape does not match the file for {chosen_movie}',
+                                        movie=chosen_movie)
+                    taken = [tuple(seat) for seat in new_places[current_array[tuple(new_places.T)] != 0].tolist()]
+            if taken:
+                raise SaveConflict(f'Seats have been taken by someone else for {chosen_movie}', taken, chosen_movie)
+            if len(new_places) == 0:
+                return
+            journal_size = append_journal(chosen_movie, new_places, path)
+    except (OSError, TypeError) as e:
+        raise FileError(f'Could not lock the file for {chosen_movie}', e, chosen_movie)
+
+    if journal_size >= JOURNAL_COMPACT_SIZE:
+        compact_journal(chosen_movie, path)
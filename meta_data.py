@@ -3,21 +3,44 @@ Meta_Data Module
 -----------------
 
 This module contains functions, which allow getting titles of movies from csv files
+and from a seat store file, and keeping an index (catalog) of the movie files in a directory
 '''
 
 
+from load_save_data import (BIN_HEADER, BIN_MAGIC, DATA_FORMATS, JOURNAL_EXTENSION, JOURNAL_COUNT_EXTENSION,
+                            LOCK_EXTENSION, FileError, parse_csv_data, get_journal_path, replay_journal)
+from seat_store import open_store, StoreError
 import pandas as pd
 import numpy as np
+import hashlib
+import sqlite3
+import json
 import os
 
 
-def get_movie_titles(url: str):
+# Number of rows of the movie data parsed at once
+CHUNK_SIZE = 10000
+# Directory with the titles parsed from local files, named by the hash of the file content
+TITLES_CACHE_DIR = './.titles_cache/'
+# Extensions of the files kept next to the movie files while they are saved (journals, locks, temporary files)
+SIDE_EXTENSIONS = (JOURNAL_EXTENSION, JOURNAL_COUNT_EXTENSION, LOCK_EXTENSION, '.stale', '.tmp')
+
+
+def get_movie_titles(url: str, chunk_size=CHUNK_SIZE, cache_dir=TITLES_CACHE_DIR):
     '''Returns a numpy array with titles of movies
 
+    The data is read in chunks of chunk_size rows and only the 'Film' column is parsed.
+    Titles read from a local file are cached by the hash of its content,
+    so an unchanged file is not parsed again
+
     Parameters
     ----------
     :param url: str
         path or url to a data frame (csv file)
+    :param chunk_size: int, optional
+        number of rows parsed at once (default is CHUNK_SIZE)
+    :param cache_dir: str, optional
+        directory with the cached titles, None - no cache (default is TITLES_CACHE_DIR)
 
     Returns
     -------
@@ -26,14 +49,29 @@ def get_movie_titles(url: str):
     '''
 
     try:
-        # Loading movie data
-        movies_df = pd.read_csv(url)
-        # Getting only the titles column and some rows
-        movie_titles = movies_df.loc[60:, 'Film']
-        # Dropping duplicate rows
-        movie_titles = movie_titles.drop_duplicates()
+        cache_path = None
+        if cache_dir is not None and isinstance(url, str) and os.path.isfile(url):
+            cache_path = os.path.join(cache_dir, _hash_file(url) + '.json')
+            cached_titles = _read_cached_titles(cache_path)
+            if cached_titles is not None:
+                return cached_titles
+
+        titles = []
+        seen = set()
+        # Loading movie data, only the titles column
+        for chunk in pd.read_csv(url, usecols=['Film'], chunksize=chunk_size):
+            # Getting only some rows (the index continues between the chunks)
+            movie_titles = chunk.loc[chunk.index >= 60, 'Film']
+            # Dropping duplicate rows, also the ones seen in the previous chunks
+            movie_titles = movie_titles.drop_duplicates()
+            movie_titles = movie_titles[~movie_titles.isin(seen)]
+            seen.update(movie_titles)
+            titles.extend(movie_titles)
+
         # Transforming it to a numpy array
-        movie_titles_array = movie_titles.values
+        movie_titles_array = np.array(titles, dtype=object)
+        if cache_path is not None:
+            _write_cached_titles(cache_path, titles)
         return movie_titles_array
     except FileNotFoundError:
         print('File or URL could not be found')
@@ -41,6 +79,33 @@ def get_movie_titles(url: str):
         print('Incorrect path')
 
 
+def _hash_file(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _read_cached_titles(cache_path):
+    # Returns the cached titles or None if they are not cached
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as file:
+            titles = json.load(file)
+    except (OSError, ValueError):
+        return None
+    return np.array([np.nan if title is None else title for title in titles], dtype=object)
+
+
+def _write_cached_titles(cache_path, titles):
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, 'w', encoding='utf-8') as file:
+            json.dump([None if pd.isna(title) else title for title in titles], file)
+    except OSError:
+        print('Could not cache the movie titles')
+
+
 def get_titles_dir(path=None):
     '''Returns an array with titles of movies from a specific directory
 
@@ -58,9 +123,206 @@ def get_titles_dir(path=None):
     if path is None:
         return
     try:
-        movies = [''.join(movie.split('.')[:-1]) for movie in np.array(os.listdir(path))]
+        movies = [''.join(movie.split('.')[:-1]) for movie in os.listdir(path)
+                  if not movie.startswith('.') and not movie.endswith(SIDE_EXTENSIONS)]
         return movies
     except PermissionError:
         print('Could not open the directory')
     except OSError:
         print('Incorrect path')
+
+
+def get_titles_store(path=None):
+    '''Returns a list with titles of movies kept in a seat store file
+
+    Parameters
+    ----------
+    :param path: str
+        path to a store file, None - no store
+
+    Returns
+    -------
+    :return: list
+        list with titles of movies
+    '''
+
+    if path is None:
+        return
+    try:
+        return open_store(path).titles()
+    except StoreError:
+        print('Could not open the store file')
+
+
+def get_catalog(path=None, index_path=None, extension=DATA_FORMATS['csv']):
+    '''Returns the catalog of movie files in a directory, kept in an SQLite index file
+
+    The index is updated only if the modification time of the directory has changed
+    and then only the added, changed and removed files are read again
+    (files with a journal are checked every time, as appending to the journal does not change the directory).
+    The seats booked in the journal of a csv file are counted as taken.
+    Files with other extensions and files without a correct seat map are skipped,
+    a title found in more than one file is listed as 'title (file name)' for every file after the first one
+
+    Parameters
+    ----------
+    :param path: str
+        path to a directory with movie files, None - no directory
+    :param index_path: str, optional
+        path to the index file (default is None - the directory path with the '.catalog' extension)
+    :param extension: str, optional
+        extension of the movie files, '.csv' or '.bin' (default is '.csv')
+
+    Returns
+    -------
+    :return: dict
+        dictionary in format {title: {'title': str, 'path': str, 'rows': int, 'seats': int, 'seats_taken': int}}
+        sorted by title, where 'title' is the title of the movie in the file
+    '''
+
+    if path is None:
+        return
+    try:
+        if index_path is None:
+            index_path = os.path.normpath(path) + '.catalog'
+        directory_mtime = os.stat(path).st_mtime_ns
+        connection = sqlite3.connect(index_path)
+    except PermissionError:
+        print('Could not open the directory')
+        return
+    except (OSError, TypeError, sqlite3.Error):
+        print('Incorrect path')
+        return
+
+    try:
+        with connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS directory (path TEXT PRIMARY KEY, mtime INTEGER)')
+            connection.execute('''CREATE TABLE IF NOT EXISTS halls (file_name TEXT PRIMARY KEY, title TEXT,
+                                  path TEXT, rows INTEGER, seats INTEGER, seats_taken INTEGER,
+                                  mtime INTEGER, size INTEGER)''')
+            connection.execute('CREATE TABLE IF NOT EXISTS journals (file_name TEXT PRIMARY KEY)')
+            key = os.path.abspath(path) + extension
+            stored = connection.execute('SELECT mtime FROM directory WHERE path = ?', (key,)).fetchone()
+            if stored is None or stored[0] != directory_mtime:
+                _update_catalog(connection, path, extension)
+                connection.execute('INSERT OR REPLACE INTO directory VALUES (?, ?)', (key, directory_mtime))
+            else:
+                _update_journaled(connection, path, extension)
+
+            catalog = {}
+            for file_name, title, file_path, rows, seats, seats_taken in connection.execute(
+                    'SELECT file_name, title, path, rows, seats, seats_taken FROM halls WHERE rows > 0 ORDER BY title, file_name'):
+                if os.path.splitext(file_name)[1] != extension:
+                    continue
+                key = title
+                if key in catalog:
+                    key = f'{title} ({file_name})'
+                    print(f'The title {title} is already used by {catalog[title]["path"]}, listed as {key}')
+                catalog[key] = {'title': title, 'path': file_path, 'rows': rows, 'seats': seats,
+                                'seats_taken': seats_taken}
+            return catalog
+    except PermissionError:
+        print('Could not open the directory')
+    except (OSError, sqlite3.Error):
+        print('Could not update the catalog')
+    finally:
+        connection.close()
+
+
+def get_titles_index(path=None, index_path=None, extension=DATA_FORMATS['csv']):
+    '''Returns a list with titles of movies from a specific directory, read from the catalog index
+
+    Parameters
+    ----------
+    :param path: str
+        path to a directory with movie files, None - no directory
+    :param index_path: str, optional
+        path to the index file (default is None - the directory path with the '.catalog' extension)
+    :param extension: str, optional
+        extension of the movie files, '.csv' or '.bin' (default is '.csv')
+
+    Returns
+    -------
+    :return: list
+        list with titles of movies sorted alphabetically
+    '''
+
+    catalog = get_catalog(path, index_path, extension)
+    if catalog is not None:
+        return list(catalog)
+
+
+def _update_catalog(connection, path, extension):
+    # Reading again only the files added or changed since the last update
+    known = {file_name: (mtime, size) for file_name, mtime, size in
+             connection.execute('SELECT file_name, mtime, size FROM halls')
+             if os.path.splitext(file_name)[1] == extension}
+    entries = {entry.name: entry for entry in os.scandir(path) if entry.is_file()}
+    present = set()
+    for name, entry in entries.items():
+        if os.path.splitext(name)[1] != extension:
+            continue
+        present.add(name)
+        journal = entries.get(name + JOURNAL_EXTENSION) if extension == DATA_FORMATS['csv'] else None
+        _update_hall(connection, entry.path, entry.stat(), journal.stat() if journal else None,
+                     extension, known.get(name))
+    connection.executemany('DELETE FROM halls WHERE file_name = ?', [(name,) for name in set(known) - present])
+    if extension == DATA_FORMATS['csv']:
+        # Remembering the files with a journal, they are checked even if the directory does not change
+        connection.execute('DELETE FROM journals')
+        connection.executemany('INSERT INTO journals VALUES (?)',
+                               [(name,) for name in present if name + JOURNAL_EXTENSION in entries])
+
+
+def _update_journaled(connection, path, extension):
+    # Reading again the files whose journal has changed since the last update
+    if extension != DATA_FORMATS['csv']:
+        return
+    for file_name, mtime, size in connection.execute(
+            'SELECT file_name, mtime, size FROM halls WHERE file_name IN (SELECT file_name FROM journals)').fetchall():
+        file_path = os.path.join(path, file_name)
+        try:
+            file_stat = os.stat(file_path)
+            journal_stat = os.stat(get_journal_path(file_path))
+        except FileNotFoundError:
+            # A removed file or journal changes the directory, so it is handled by the next full update
+            continue
+        _update_hall(connection, file_path, file_stat, journal_stat, extension, (mtime, size))
+
+
+def _update_hall(connection, file_path, file_stat, journal_stat, extension, known):
+    # The journal is a part of the stored modification time and size, so appending to it is noticed
+    mtime, size = file_stat.st_mtime_ns, file_stat.st_size
+    if journal_stat is not None:
+        mtime, size = max(mtime, journal_stat.st_mtime_ns), size + journal_stat.st_size
+    if known == (mtime, size):
+        return
+    # A file which is not a seat map is stored with 0 rows, so it is not read again until it changes
+    title, rows, seats, seats_taken = _read_hall_info(file_path, extension) or (None, 0, 0, 0)
+    connection.execute('INSERT OR REPLACE INTO halls VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                       (os.path.basename(file_path), title, file_path, rows, seats, seats_taken, mtime, size))
+
+
+def _read_hall_info(file_path, extension):
+    # Returns (title, rows, seats, seats taken) of a movie file or None if it is not a correct seat map
+    with open(file_path, 'rb') as file:
+        data = file.read()
+    if extension == DATA_FORMATS['bin']:
+        if len(data) < BIN_HEADER.size:
+            return None
+        magic, _, rows, seats, seats_taken, title_len = BIN_HEADER.unpack_from(data)
+        if magic != BIN_MAGIC:
+            return None
+        title = data[BIN_HEADER.size:BIN_HEADER.size + title_len].decode('utf-8', 'replace')
+        return title, rows, seats, seats_taken
+
+    title = os.path.splitext(os.path.basename(file_path))[0]
+    try:
+        seats_array, info = parse_csv_data(data)
+        title = info.get('title', title)
+        # The seats booked since the last snapshot are kept in the journal
+        seats_array = np.array(seats_array)
+        replay_journal(title, seats_array, get_journal_path(file_path))
+    except FileError:
+        return None
+    return title, seats_array.shape[0], seats_array.shape[1], int(np.minimum(seats_array, 1).sum())
@@ -0,0 +1,24 @@
+'''
+Render_Halls Script
+-------------------
+
+This script renders an image of the cinema hall for every movie
+without displaying it (no display is needed), ex. for lobby displays and reports
+'''
+
+
+from visualisation import render_halls
+
+# Directory with movie files and the output directory for images
+# LINUX
+movies_dir = './movies/'
+output_dir = './halls/'
+# WINDOWS
+# movies_dir = '.\movies\'
+# output_dir = '.\halls\'
+
+if __name__ == '__main__':
+    report = render_halls(movies_dir, output_dir, image_format='png')
+    for movie, error in report['failed'].items():
+        print(f'Could not render the hall for {movie} ({error})')
+    print(f'Rendered {report["halls"]} halls in {report["seconds"]:.2f} s ({report["halls_per_second"]:.0f} halls/s)')
@@ -6,12 +6,14 @@ Module used for running the whole program
 '''
 
 
-from load_save_data import get_csv_data, save_csv_data, repair_title, FileError, IncorrectArrayData, IncorrectArrayType, IncorrectShape
-from meta_data import get_movie_titles, get_titles_dir
-from visualisation import show_seats, IncorrectFont, IncorrectCoordinates
+from load_save_data import get_seats_data, save_seats_data, get_csv_version, set_storage_backend, DATA_FORMATS, FileError, SaveConflict, IncorrectArrayData, IncorrectArrayType, IncorrectShape
+from meta_data import get_movie_titles, get_catalog, get_titles_store
+from sqlite_backend import SqliteBackend
+from visualisation import (show_seats, get_screen_size, get_layout, acquire_frame, release_frame, IncorrectFont,
+                           IncorrectCoordinates)
+from terminal_view import show_seats_terminal
 import curses
 from menu import main_menu, TooSmallScreen
-import numpy as np
 
 
 def main():
@@ -54,8 +56,43 @@ def main():
     # WINDOWS
     # path = '.\movies\'
 
-    # Getting all movie titles from a specific directory
-    movie_list = get_titles_dir(path)
+    # Path to the database of the 'sqlite' storage format, filled with the movies from path when it is created
+    # LINUX
+    db_path = './movies.sqlite'
+    # WINDOWS
+    # db_path = '.\movies.sqlite'
+
+    # Renderer of the cinema hall: 'gui' (an OpenCV window) or 'terminal' (colored text, no display nor OpenCV needed)
+    renderer = 'gui'
+
+    # The biggest screen for the cinema hall image
+    viewport_height = 1000
+    viewport_width = 1800
+
+    # Storage format of the movie files: 'csv', 'journal' (csv files with bookings appended to a journal),
+    # 'bin' (path = './movies_bin/'), 'store' (path = './movies.seats' - a single file with all screenings)
+    # or 'sqlite' (db_path - an SQLite database behind get_csv_data() and save_csv_data())
+    data_format = 'csv'
+
+    if data_format == 'sqlite':
+        try:
+            backend = SqliteBackend(db_path)
+            # Importing the csv files of the movies into a new (empty) database
+            if not backend.titles():
+                backend.import_csv_dir(path)
+        except FileError as e:
+            print(f'Could not open the database ({e.message})')
+            return -2
+        set_storage_backend(backend)
+        # Getting all movie titles from the database
+        movie_list = backend.titles()
+    elif data_format == 'store':
+        # Getting all movie titles from the store file
+        movie_list = get_titles_store(path)
+    else:
+        # Getting all movie titles and their files from the catalog index of a specific directory
+        catalog = get_catalog(path, extension=DATA_FORMATS[data_format])
+        movie_list = list(catalog) if catalog is not None else None
 
     while True:  # loop assures we return to the selecting movies menu
         try:
@@ -64,38 +101,46 @@ def main():
             # If a movie wasn't chosen, break from the loop
             if not chosen_movie:
                 break
-
-            chosen_movie = repair_title(chosen_movie)
         except (TooSmallScreen, IndexError):
             print('Could not open the menu')
             return -1
-        except FileError as e:
-            print(e.message)
-            return -2
 
         # Creating seats array
         try:
-            # LINUX
-            movie_path = f'./movies/{chosen_movie}.csv'
-            # WINDOWS
-            # movie_path = f'.\movies\{chosen_movie}.csv'
-
-            seats_array = get_csv_data(chosen_movie, movie_path)
-            # Setting screen parameters
-            if seats_array.shape[0] > 10:
-                # Setting screen height
-                screen_height = seats_array.shape[0] * 50
+            if data_format == 'store':
+                movie_path = path
+            elif data_format == 'sqlite':
+                movie_path = db_path
             else:
-                # Setting screen height
-                screen_height = seats_array.shape[0] * 74
-            # Setting screen width
-            screen_width = seats_array.shape[1] * 32
-
-            # Creating screen for cv2
-            screen = np.zeros([screen_height, screen_width, 3], np.uint8)
-
-            # Showing the cinema hall
-            booked_seats_array = show_seats(screen, seats_array, row_indices, chosen_movie, screen_height, screen_width)
+                movie_path = catalog[chosen_movie]['path']
+                # A title used by more than one file is listed with the file name in the menu
+                chosen_movie = catalog[chosen_movie]['title']
+
+            # Reading the version before the file, so a save made meanwhile is detected when saving
+            version = get_csv_version(movie_path) if data_format in ('csv', 'journal') else None
+            seats_array = get_seats_data(chosen_movie, movie_path, data_format)
+            # Keeping the loaded array, the bookings are merged if someone else saves the file meanwhile
+            original_array = seats_array.copy()
+            if renderer == 'terminal':
+                # Showing the cinema hall in the terminal
+                booked_seats_array = show_seats_terminal(seats_array, row_indices, chosen_movie)
+            else:
+                # Setting screen parameters, halls bigger than the viewport are scaled down to fit it
+                layout = get_layout(seats_array, viewport_height, viewport_width)
+                if layout is None:
+                    screen_height, screen_width = get_screen_size(seats_array)
+                else:
+                    screen_height, screen_width = layout.screen_height, layout.screen_width
+
+                # Creating screen for cv2, the screen of the last visit is reused if it has the same size
+                screen = acquire_frame((screen_height, screen_width, 3))
+
+                # Showing the cinema hall
+                try:
+                    booked_seats_array = show_seats(screen, seats_array, row_indices, chosen_movie, screen_height,
+                                                    screen_width, layout=layout)
+                finally:
+                    release_frame(screen)
         except FileError as e:
             print(f'''An error occurred while loading the file for movie: {e.movie}
     {e.message}
@@ -111,7 +156,10 @@ def main():
 
         try:
             # Saving the new cinema hall array
-            save_csv_data(chosen_movie, booked_seats_array, movie_path)
+            save_seats_data(chosen_movie, booked_seats_array, movie_path, data_format, version, original_array)
+        except SaveConflict as e:
+            # Another terminal has booked the same seats, the booking has to be repeated
+            print(f'The booking for {e.movie} could not be saved: {e.message}')
         except FileError as e:
             print(f'''An error occurred while saving the file for {e.movie}
     ({e.inner_exception})''')
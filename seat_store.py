@@ -0,0 +1,260 @@
+'''
+Seat_Store Module
+-----------------
+
+This module allows keeping every screening in one memory-mapped file:
+    -a fixed size directory of screenings at the beginning of the file
+    -a fixed size seat region (rows * seats int8 values) for each screening
+
+Seat arrays returned by the store are numpy views on the mapped file,
+so reading them does not copy the data and saving writes only the changed bytes
+'''
+
+
+import numpy as np
+import struct
+import os
+
+
+# Store header: magic, format version, directory capacity, number of screenings (little endian)
+STORE_MAGIC = b'KSTR'
+STORE_VERSION = 1
+STORE_HEADER = struct.Struct('<4sBxxxII')
+# Directory entry: utf-8 title padded with zeros, region offset, number of rows, number of seats
+STORE_ENTRY = struct.Struct('<128sQHH4x')
+STORE_TITLE_SIZE = 128
+
+
+class StoreError(Exception):
+    def __init__(self, message, inner_exception=None, movie=None):
+        super().__init__(message)
+        self.message = message
+        self.inner_exception = inner_exception
+        self.movie = movie
+
+
+class SeatStore:
+    '''Memory-mapped file holding the seat regions of many screenings
+
+    Parameters
+    ----------
+    :param path: str
+        path to an existing store file (use create_store() to create a new one)
+
+    Raises
+    ------
+    :raises StoreError:
+        if the file could not be opened or is not a valid store file
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self._screenings = {}  # title: (offset, rows, seats)
+        self._mmap = None
+        try:
+            with open(path, 'rb') as file:
+                header = file.read(STORE_HEADER.size)
+                if len(header) != STORE_HEADER.size:
+                    raise StoreError(f'Incorrect store file: {path}')
+                magic, version, self.capacity, count = STORE_HEADER.unpack(header)
+                if magic != STORE_MAGIC or version != STORE_VERSION:
+                    raise StoreError(f'Incorrect store file: {path}')
+                directory = file.read(STORE_ENTRY.size * count)
+        except (OSError, TypeError) as e:
+            raise StoreError(f'Store file could not be opened: {path}', e)
+
+        for i in range(count):
+            title, offset, rows, seats = STORE_ENTRY.unpack_from(directory, i * STORE_ENTRY.size)
+            self._screenings[title.rstrip(b'\0').decode('utf-8')] = (offset, rows, seats)
+        self._map_file()
+
+    def _map_file(self):
+        # Mapping the whole file once, seat arrays are views on this map
+        if os.path.getsize(self.path) > self._data_start():
+            self._mmap = np.memmap(self.path, dtype=np.int8, mode='r+')
+        else:
+            self._mmap = None
+
+    def _data_start(self):
+        return STORE_HEADER.size + STORE_ENTRY.size * self.capacity
+
+    def titles(self):
+        '''Returns a list of titles of all screenings in the store'''
+
+        return list(self._screenings)
+
+    def __contains__(self, movie):
+        return movie in self._screenings
+
+    def __len__(self):
+        return len(self._screenings)
+
+    def add_screening(self, movie, seats_array):
+        '''Adds a new screening at the end of the store
+
+        Parameters
+        ----------
+        :param movie: str
+            movie title (at most 128 bytes in utf-8)
+        :param seats_array: numpy array
+            a 2 dimensional numpy array representing a cinema hall
+
+        Raises
+        ------
+        :raises StoreError:
+            if the movie already exists, the title is too long, the directory is full
+            or the seats_array is not a 2 dimensional numpy array
+        '''
+
+        if not isinstance(seats_array, np.ndarray) or seats_array.ndim != 2:
+            raise StoreError('A 2 dimensional numpy array required', movie=movie)
+        if movie in self._screenings:
+            raise StoreError(f'Screening already exists: {movie}', movie=movie)
+        title = str(movie).encode('utf-8')
+        if len(title) > STORE_TITLE_SIZE:
+            raise StoreError(f'Title too long: {movie}', movie=movie)
+        if len(self._screenings) >= self.capacity:
+            raise StoreError('The store directory is full', movie=movie)
+
+        rows, seats = seats_array.shape
+        try:
+            data = seats_array.astype(np.int8).tobytes()
+        except (TypeError, ValueError) as e:
+            raise StoreError('Incorrect data type in array, integer required', e, movie)
+        count = len(self._screenings)
+
+        # Releasing the map before the file grows
+        self._mmap = None
+        with open(self.path, 'r+b') as file:
+            offset = file.seek(0, os.SEEK_END)
+            file.write(data)
+            file.seek(STORE_HEADER.size + STORE_ENTRY.size * count)
+            file.write(STORE_ENTRY.pack(title, offset, rows, seats))
+            file.seek(0)
+            file.write(STORE_HEADER.pack(STORE_MAGIC, STORE_VERSION, self.capacity, count + 1))
+        self._screenings[movie] = (offset, rows, seats)
+        self._map_file()
+
+    def get(self, movie):
+        '''Returns a writable memory-mapped view of the screening seats (no data is copied)
+
+        Parameters
+        ----------
+        :param movie: str
+            movie title
+
+        Returns
+        -------
+        :return: numpy memmap of shape (rows, seats) and dtype int8
+
+        Raises
+        ------
+        :raises StoreError:
+            if the movie is not in the store
+        '''
+
+        try:
+            offset, rows, seats = self._screenings[movie]
+        except (KeyError, TypeError):
+            raise StoreError(f'No screening for {movie} in the store', movie=movie)
+        if rows * seats == 0:
+            return np.zeros([rows, seats], dtype=np.int8)
+        if self._mmap is None or offset + rows * seats > len(self._mmap):
+            raise StoreError(f'Store file is truncated: {self.path}', movie=movie)
+        return self._mmap[offset:offset + rows * seats].reshape(rows, seats)
+
+    def save(self, movie, seats_array):
+        '''Writes the seats_array into the screening region, touching only the changed seats
+
+        Parameters
+        ----------
+        :param movie: str
+            movie title
+        :param seats_array: numpy array
+            a 2 dimensional numpy array with the shape of the screening
+
+        Raises
+        ------
+        :raises StoreError:
+            if the movie is not in the store or the shape does not match
+        '''
+
+        region = self.get(movie)
+        if not isinstance(seats_array, np.ndarray) or seats_array.shape != region.shape:
+            raise StoreError(f'Array shape does not match the screening {movie}', movie=movie)
+        # A view returned by get() is already written through the map
+        if not np.shares_memory(region, seats_array):
+            changed = region != seats_array
+            region[changed] = seats_array[changed]
+        self._mmap.flush()
+
+    def close(self):
+        '''Flushes and releases the file map'''
+
+        if self._mmap is not None:
+            self._mmap.flush()
+        self._mmap = None
+
+
+# Stores opened by open_store(), so every load of a screening reuses the same file map
+_open_stores = {}
+
+
+def create_store(path, capacity=1024):
+    '''Creates an empty store file with room for capacity screenings and returns it opened
+
+    Parameters
+    ----------
+    :param path: str
+        path to the new store file (an existing file is overwritten)
+    :param capacity: int, optional
+        maximum number of screenings in the store (default is 1024)
+
+    Returns
+    -------
+    :return: SeatStore
+
+    Raises
+    ------
+    :raises StoreError:
+        if the capacity is not a positive integer or the file could not be created
+    '''
+
+    if not isinstance(capacity, int) or capacity <= 0:
+        raise StoreError('The capacity must be a positive integer')
+    try:
+        with open(path, 'wb') as file:
+            file.write(STORE_HEADER.pack(STORE_MAGIC, STORE_VERSION, capacity, 0))
+            file.write(bytes(STORE_ENTRY.size * capacity))
+    except (OSError, TypeError) as e:
+        raise StoreError(f'Store file could not be created: {path}', e)
+    store = SeatStore(path)
+    _open_stores[os.path.abspath(path)] = store
+    return store
+
+
+def open_store(path):
+    '''Returns an opened store for path, reusing the already opened one
+
+    Parameters
+    ----------
+    :param path: str
+        path to a store file
+
+    Returns
+    -------
+    :return: SeatStore
+
+    Raises
+    ------
+    :raises StoreError:
+        if the file is not a valid store file
+    '''
+
+    try:
+        key = os.path.abspath(path)
+    except TypeError as e:
+        raise StoreError(f'Incorrect store path: {path}', e)
+    if key not in _open_stores:
+        _open_stores[key] = SeatStore(path)
+    return _open_stores[key]
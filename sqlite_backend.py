@@ -0,0 +1,284 @@
+'''
+Sqlite_Backend Module
+---------------------
+
+This module contains a storage backend for load_save_data keeping the cinema halls in an SQLite database:
+    -each seat is a row of the seats table, a booking is a single UPDATE ... WHERE taken = 0
+    -the number of taken seats of each screening is kept in an indexed counter column
+
+Usage:
+    set_storage_backend(SqliteBackend('./movies.sqlite'))
+makes get_csv_data() and save_csv_data() read and write the database instead of csv files
+'''
+
+
+from load_save_data import FileError, SaveConflict, IncorrectArrayType, CsvBackend, DATA_FORMATS
+import numpy as np
+import threading
+import sqlite3
+import os
+
+
+class SqliteBackend:
+    '''Storage backend keeping the cinema halls in an SQLite database
+
+    Parameters
+    ----------
+    :param db_path: str
+        path to the database file, created if it does not exist
+
+    Raises
+    ------
+    :raises FileError:
+        if the database could not be opened
+    '''
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        # One connection shared by the threads of the process, the database itself locks between processes
+        self._lock = threading.Lock()
+        try:
+            self._connection = sqlite3.connect(db_path, timeout=10, isolation_level=None, check_same_thread=False)
+            self._connection.executescript('''
+                CREATE TABLE IF NOT EXISTS screenings (movie TEXT PRIMARY KEY, rows INTEGER NOT NULL,
+                                                       seats INTEGER NOT NULL, seats_taken INTEGER NOT NULL DEFAULT 0);
+                CREATE INDEX IF NOT EXISTS screenings_seats_taken ON screenings (seats_taken);
+                CREATE TABLE IF NOT EXISTS seats (movie TEXT NOT NULL, row INTEGER NOT NULL, place INTEGER NOT NULL,
+                                                  taken INTEGER NOT NULL DEFAULT 0,
+                                                  PRIMARY KEY (movie, row, place)) WITHOUT ROWID;
+            ''')
+        except (sqlite3.Error, TypeError) as e:
+            raise FileError(f'Could not open the database {db_path}', e)
+
+    def _transaction(self, function, *args):
+        # Running function inside a write transaction, rolled back if it raises an exception
+        with self._lock:
+            try:
+                self._connection.execute('BEGIN IMMEDIATE')
+                try:
+                    result = function(*args)
+                except BaseException:
+                    self._connection.execute('ROLLBACK')
+                    raise
+                self._connection.execute('COMMIT')
+                return result
+            except sqlite3.Error as e:
+                raise FileError(f'Database error ({e})', e)
+
+    def _get_shape(self, chosen_movie):
+        shape = self._connection.execute('SELECT rows, seats FROM screenings WHERE movie = ?',
+                                         (chosen_movie,)).fetchone()
+        if shape is None:
+            raise FileError(f'No screening for {chosen_movie} in the database', movie=chosen_movie)
+        return shape
+
+    def _read(self, chosen_movie):
+        rows, seats = self._get_shape(chosen_movie)
+        seats_array = np.zeros([rows, seats], dtype=np.int8)
+        taken = self._connection.execute('SELECT row, place FROM seats WHERE movie = ? AND taken = 1',
+                                         (chosen_movie,)).fetchall()
+        if taken:
+            seats_array[tuple(np.array(taken).T)] = 1
+        return seats_array
+
+    def titles(self):
+        '''Returns a list with titles of all screenings sorted alphabetically'''
+
+        with self._lock:
+            return [movie for movie, in self._connection.execute('SELECT movie FROM screenings ORDER BY movie')]
+
+    def seats_taken(self, chosen_movie):
+        '''Returns the number of taken seats of the screening, read from the counter column
+
+        Raises
+        ------
+        :raises FileError:
+            if the movie is not in the database
+        '''
+
+        with self._lock:
+            row = self._connection.execute('SELECT seats_taken FROM screenings WHERE movie = ?',
+                                           (chosen_movie,)).fetchone()
+        if row is None:
+            raise FileError(f'No screening for {chosen_movie} in the database', movie=chosen_movie)
+        return row[0]
+
+    def get_occupancy(self, min_seats_taken=0):
+        '''Returns screenings with at least min_seats_taken taken seats, the most occupied first
+
+        Returns
+        -------
+        :return: list
+            list in format [(movie, seats_taken, number of seats), (movie, seats_taken, number of seats)]
+        '''
+
+        with self._lock:
+            return self._connection.execute('''SELECT movie, seats_taken, rows * seats FROM screenings
+                                               WHERE seats_taken >= ? ORDER BY seats_taken DESC, movie''',
+                                            (min_seats_taken,)).fetchall()
+
+    def add_screening(self, chosen_movie, seats_array):
+        '''Adds a screening with the seats of seats_array, replacing an existing one
+
+        Raises
+        ------
+        :raises IncorrectArrayType:
+            if the seats_array is not a 2 dimensional numpy array
+        :raises FileError:
+            if the database could not be written
+        '''
+
+        if not isinstance(seats_array, np.ndarray) or seats_array.ndim != 2:
+            raise IncorrectArrayType('A 2 dimensional numpy array required', chosen_movie)
+        self._transaction(self._insert, chosen_movie, seats_array)
+
+    def _insert(self, chosen_movie, seats_array):
+        # Replacing the screening and all its seats, called inside a transaction
+        taken = seats_array != 0
+        self._connection.execute('DELETE FROM seats WHERE movie = ?', (chosen_movie,))
+        self._connection.execute('INSERT OR REPLACE INTO screenings VALUES (?, ?, ?, ?)',
+                                 (chosen_movie, seats_array.shape[0], seats_array.shape[1], int(taken.sum())))
+        self._connection.executemany('INSERT INTO seats VALUES (?, ?, ?, ?)',
+                                     ((chosen_movie, row, place, int(taken[row, place]))
+                                      for row in range(seats_array.shape[0])
+                                      for place in range(seats_array.shape[1])))
+
+    def book_seats(self, chosen_movie, places):
+        '''Books all places or none of them
+
+        Parameters
+        ----------
+        :param chosen_movie: str
+            chosen movie title
+        :param places: list or numpy array
+            indices of seats to book in format [(row, place), (row, place)] counted from 0
+
+        Raises
+        ------
+        :raises SaveConflict:
+            if one of the places is already taken or does not exist (none of the places is booked)
+        :raises FileError:
+            if the database could not be written
+        '''
+
+        places = [(int(row), int(place)) for row, place in places]
+
+        def book():
+            taken = []
+            for row, place in places:
+                cursor = self._connection.execute('''UPDATE seats SET taken = 1
+                                                     WHERE movie = ? AND row = ? AND place = ? AND taken = 0''',
+                                                  (chosen_movie, row, place))
+                if cursor.rowcount != 1:
+                    taken.append((row, place))
+            if taken:
+                raise SaveConflict(f'Seats have been taken by someone else for {chosen_movie}', taken, chosen_movie)
+            self._connection.execute('UPDATE screenings SET seats_taken = seats_taken + ? WHERE movie = ?',
+                                     (len(places), chosen_movie))
+
+        self._transaction(book)
+
+    def load(self, chosen_movie, path=None):
+        '''Returns the seats of the screening as a numpy array (int8), used by get_csv_data()
+
+        Raises
+        ------
+        :raises FileError:
+            if the movie is not in the database
+        '''
+
+        with self._lock:
+            try:
+                return self._read(chosen_movie)
+            except sqlite3.Error as e:
+                raise FileError(f'Database error ({e})', e, chosen_movie)
+
+    def save(self, chosen_movie, seats_array, path=None, version=None, original_array=None):
+        '''Saves the seats of the screening, used by save_csv_data()
+
+        Seats taken in seats_array (and free in original_array, if it is given) are booked
+        with conditional updates, so a seat booked meanwhile by someone else is detected.
+        Seats free in seats_array (and taken in original_array, if it is given) are released.
+        A screening which is not in the database is added, the check and the changes are made in one transaction
+
+        Raises
+        ------
+        :raises IncorrectArrayType:
+            if the seats_array is not a numpy array
+        :raises SaveConflict:
+            if one of the booked seats has been taken meanwhile
+        :raises FileError:
+            if the shape of seats_array does not match the screening or the database could not be written
+        '''
+
+        if not isinstance(seats_array, np.ndarray):
+            raise IncorrectArrayType('Incorrect array type, numpy array required', chosen_movie)
+
+        def save():
+            if self._connection.execute('SELECT 1 FROM screenings WHERE movie = ?', (chosen_movie,)).fetchone() is None:
+                if seats_array.ndim != 2:
+                    raise IncorrectArrayType('A 2 dimensional numpy array required', chosen_movie)
+                return self._insert(chosen_movie, seats_array)
+            current_array = self._read(chosen_movie)
+            if current_array.shape != seats_array.shape:
+                raise FileError(f'Array shape does not match the screening {chosen_movie}', movie=chosen_movie)
+            base_array = current_array if original_array is None else original_array
+            booked = np.argwhere((seats_array == 1) & (base_array == 0)).tolist()
+            released = np.argwhere((seats_array == 0) & (base_array != 0)).tolist()
+
+            taken = []
+            for row, place in booked:
+                cursor = self._connection.execute('''UPDATE seats SET taken = 1
+                                                     WHERE movie = ? AND row = ? AND place = ? AND taken = 0''',
+                                                  (chosen_movie, row, place))
+                if cursor.rowcount != 1:
+                    taken.append((row, place))
+            if taken:
+                raise SaveConflict(f'Seats have been taken by someone else for {chosen_movie}', taken, chosen_movie)
+            freed = 0
+            for row, place in released:
+                freed += self._connection.execute('''UPDATE seats SET taken = 0
+                                                     WHERE movie = ? AND row = ? AND place = ? AND taken = 1''',
+                                                  (chosen_movie, row, place)).rowcount
+            self._connection.execute('UPDATE screenings SET seats_taken = seats_taken + ? WHERE movie = ?',
+                                     (len(booked) - freed, chosen_movie))
+
+        self._transaction(save)
+
+    def import_csv_dir(self, csv_dir):
+        '''Adds a screening for every csv file in csv_dir
+
+        Returns
+        -------
+        :return: list
+            titles of the imported movies
+
+        Raises
+        ------
+        :raises FileError:
+            if the directory could not be opened
+        '''
+
+        try:
+            file_names = sorted(os.listdir(csv_dir))
+        except (OSError, TypeError) as e:
+            raise FileError('Directory could not be found', e)
+
+        csv_backend = CsvBackend()
+        imported = []
+        for file_name in file_names:
+            movie, extension = os.path.splitext(file_name)
+            if extension != DATA_FORMATS['csv']:
+                continue
+            try:
+                self.add_screening(movie, csv_backend.load(movie, os.path.join(csv_dir, file_name)))
+                imported.append(movie)
+            except (FileError, IncorrectArrayType) as e:
+                print(f'Could not import the file for {movie} ({e})')
+        return imported
+
+    def close(self):
+        '''Closes the database connection'''
+
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,155 @@
+'''
+Terminal_View Module
+--------------------
+
+This module contains a renderer of the cinema hall for text terminals (ex. SSH sessions without a display):
+    -the seat map drawn with ANSI colors, the same free (0), taken (1) and held places and row indices as show_seats()
+    -booking seats for a specific movie without OpenCV
+'''
+
+
+from load_save_data import IncorrectArrayData, IncorrectShape, FileError, IncorrectArrayType
+from visualisation import start_booking
+from booking import HELD
+import numpy as np
+import sys
+
+
+# ANSI escape codes of the free, taken and held places, the screen and the end of a color
+ANSI_FREE = '\033[42m'
+ANSI_TAKEN = '\033[41m'
+ANSI_HELD = '\033[43m'
+ANSI_SCREEN = '\033[44;97m'
+ANSI_RESET = '\033[0m'
+# Places drawn without colors
+TEXT_FREE = '.'
+TEXT_TAKEN = 'X'
+TEXT_HELD = 'H'
+
+
+def render_seats_text(seats_param: np.ndarray, row_indices, movie, color=None):
+    '''Returns the seat map of the cinema hall as text
+
+    Parameters
+    ----------
+    :param seats_param: numpy array
+        a 2 dimensional numpy array representing a cinema hall in format [[row], [row]]
+        where row is a 1 dimensional array containing zeros (free place) or ones (taken seat) ex. [1, 0, 0, 0, 1]
+    :param row_indices: dict
+        dictionary representing row indices in format {row_label: index} ex. {'A':0, 'B':1}
+    :param movie:
+        the chosen movie
+    :param color: bool, optional
+        if True places are drawn with ANSI colors, else with TEXT_FREE, TEXT_TAKEN and TEXT_HELD characters
+        (default is None - colors if the standard output is a terminal)
+
+    Returns
+    -------
+    :returns: str
+        the seat map with the title, the number of taken seats, the screen, seat numbers and row indices
+
+    Raises
+    ------
+    :raises IncorrectArrayData:
+        if the length of seats_param array is 0 or the array contains illegal characters
+    :raises IncorrectArrayType:
+        if the seats_param is not a numpy array
+    :raises IncorrectShape:
+        if the seats_param shape[0] does not match the length of row_indices
+    '''
+
+    if not isinstance(seats_param, np.ndarray):
+        raise IncorrectArrayType('Incorrect array type, numpy array required', movie)
+    if len(seats_param) == 0:
+        raise IncorrectArrayData('The movie array is empty', movie)
+    if color is None:
+        color = sys.stdout.isatty()
+
+    seats_array = np.atleast_2d(seats_param)
+    labels = tuple(row_indices)
+    if len(labels) < seats_array.shape[0]:
+        raise IncorrectShape('Array shape does not match row indices')
+    try:
+        taken_seats = int(np.minimum(seats_array, 1).sum())
+        # 0 - free, 1 - taken, 2 - held place
+        states = np.where(seats_array == 0, 0, np.where(seats_array == HELD, 2, 1))
+    except (TypeError, ValueError):
+        raise IncorrectArrayData('Incorrect data type in array, numeric required', movie)
+
+    # Each place is a cell wide enough for its number
+    cell_width = len(str(seats_array.shape[1])) + 1
+    label_width = max(len(f'{label}') for label in labels[:seats_array.shape[0]]) + 1
+    hall_width = cell_width * seats_array.shape[1]
+    if color:
+        cells = [ANSI_FREE + ' ' * (cell_width - 1) + ANSI_RESET + ' ',
+                 ANSI_TAKEN + ' ' * (cell_width - 1) + ANSI_RESET + ' ',
+                 ANSI_HELD + ' ' * (cell_width - 1) + ANSI_RESET + ' ']
+        screen = ANSI_SCREEN + 'SCREEN'.center(hall_width - 1) + ANSI_RESET
+    else:
+        cells = [TEXT_FREE.center(cell_width - 1) + ' ', TEXT_TAKEN.center(cell_width - 1) + ' ',
+                 TEXT_HELD.center(cell_width - 1) + ' ']
+        screen = 'SCREEN'.center(hall_width - 1, '=')
+
+    lines = [f'{movie}', f'Seats taken: {taken_seats}', '',
+             ' ' * label_width + screen,
+             ' ' * label_width + ''.join(f'{i + 1:<{cell_width}}' for i in range(seats_array.shape[1]))]
+    for j, row in enumerate(states):
+        lines.append(f'{labels[j]:<{label_width}}' + ''.join(cells[seat] for seat in row))
+    lines += ['', 'Press ENTER to book places', 'Press A and ENTER to book the best places',
+              'Press ESC (or q) and ENTER to exit']
+    return '\n'.join(lines)
+
+
+def show_seats_terminal(seats_param: np.ndarray, row_indices, movie):
+    '''Prints the seat map of the cinema hall and waits for a key like show_seats():
+        - if ENTER - proceed to the booking process
+        - if A - proceed to the booking process with the best places chosen automatically
+        - if ESC or q - go back to the menu
+    returns the result of start_booking() which is an array of booked seats in format (row, place)
+
+    Parameters
+    ----------
+    :param seats_param: numpy array
+        a 2 dimensional numpy array representing a cinema hall in format [[row], [row]]
+        where row is a 1 dimensional array containing zeros (free place) or ones (taken seat) ex. [1, 0, 0, 0, 1]
+    :param row_indices: dict
+        dictionary representing row indices in format {row_label: index} ex. {'A':0, 'B':1}
+    :param movie:
+        the chosen movie, if move is None: return None
+
+    Returns
+    -------
+    :returns: None if the movie wasn't chosen (if the movie is None) or ESC was pressed
+    else
+    :returns: the result of start_booking() which is an array of booked seats in format (row, place)
+
+    Raises
+    ------
+    :raises IncorrectArrayData:
+        if the length of seats_param array is 0 or if it occurs in start_booking()
+    :raises FileError:
+        if the seats_param shape[0] does not match the length of row_indices
+    :raises IncorrectArrayType:
+        if the seats_param is not a numpy array or if it occurs in start_booking()
+    :raises IncorrectShape:
+        if it occurs in start_booking()
+    '''
+
+    if len(seats_param) == 0:
+        raise IncorrectArrayData('The movie array is empty', movie)
+    if movie is None:  # if the move wasn't chosen
+        return
+
+    try:
+        print(render_seats_text(seats_param, row_indices, movie))
+    except IncorrectShape as e:
+        raise FileError('Array shape does not match row indices', e, movie)
+
+    while True:
+        key = input()
+        if key.strip().lower() in {'\033', 'q'}:  # if ESC or q - go back to the menu
+            return
+        elif key == '':  # if ENTER key - start the booking
+            return start_booking(movie, seats_param, row_indices)
+        elif key.strip().lower() == 'a':  # if A - start the booking of the best places
+            return start_booking(movie, seats_param, row_indices, auto=True)
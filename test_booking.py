@@ -0,0 +1,356 @@
+import random
+import pytest
+import threading
+import numpy as np
+from load_save_data import IncorrectArrayType, IncorrectArrayData, IncorrectShape, SaveConflict
+from booking import (check_places,
+                     book_places,
+                     SeatMap,
+                     HoldScheduler,
+                     BookingService,
+                     BookingError,
+                     HELD,
+                     ON_HOLD,
+                     NOT_HELD,
+                     UNKNOWN_ROW,
+                     INCORRECT_PLACE,
+                     ALREADY_TAKEN,
+                     DUPLICATED
+                     )
+
+
+def test_check_places():
+    row_indices = {
+        'A': 0,
+        'B': 1,
+        'C': 2
+    }
+    seats_array = np.array([[0, 0, 0, 1],
+                            [1, 1, 0, 0]])
+
+    assert check_places(seats_array, row_indices, [('A', 1), ('b', '3'), ('B', 4)]) == [None, None, None]
+    assert check_places(seats_array, row_indices, [('A', 4), ('C', 1), ('D', 1), ('A', 0), ('A', 5), ('A', 1.5),
+                                                   ('A', 2), (' a ', 2), ('A', 2)]) == \
+        [ALREADY_TAKEN, UNKNOWN_ROW, UNKNOWN_ROW, INCORRECT_PLACE, INCORRECT_PLACE, INCORRECT_PLACE,
+         None, DUPLICATED, DUPLICATED]
+    assert check_places(seats_array, row_indices, []) == []
+
+    with pytest.raises(IncorrectArrayType):
+        check_places([[0, 1]], row_indices, [('A', 1)])
+    with pytest.raises(IncorrectArrayType):
+        check_places(seats_array, row_indices, [('A', 1, 2)])
+
+
+def test_book_places():
+    row_indices = {
+        'A': 0,
+        'B': 1
+    }
+    seats_array = np.array([[0, 0, 0, 1],
+                            [1, 1, 0, 0]])
+
+    assert book_places(seats_array, row_indices, [('A', 1), ('B', 3)]) is seats_array
+    assert seats_array.tolist() == [[1, 0, 0, 1],
+                                    [1, 1, 1, 0]]
+
+    # Nothing is booked if one of the places is rejected
+    with pytest.raises(BookingError) as error:
+        book_places(seats_array, row_indices, [('A', 2), ('B', 3), ('A', 2)], 'movie')
+    assert error.value.rejected == [('B', 3, ALREADY_TAKEN), ('A', 2, DUPLICATED)]
+    assert error.value.movie == 'movie'
+    assert seats_array.tolist() == [[1, 0, 0, 1],
+                                    [1, 1, 1, 0]]
+
+    with pytest.raises(BookingError):
+        book_places(seats_array, row_indices, [])
+
+
+def test_seat_map():
+    seats_array = np.array([[0, 0, 1, 0, 0, 0],
+                            [1, 1, 1, 1, 1, 1],
+                            [0, 1, 0, 0, 1, 0]], np.int8)
+    seat_map = SeatMap(seats_array)
+
+    assert seat_map.free_seats == 9
+    assert seat_map.seats_taken == 9
+    assert seat_map.row_free.tolist() == [5, 0, 4]
+    assert seat_map.longest_runs.tolist() == [3, 0, 2]
+    assert seat_map.has_room(3)
+    assert not seat_map.has_room(4)
+    assert seat_map.has_room(9, adjacent=False)
+    assert not seat_map.has_room(10, adjacent=False)
+
+    # Only the changed rows are counted again, the array is changed in place
+    seat_map.book([(0, 4), (2, 0)])
+    assert seats_array[0, 4] == 1 and seats_array[2, 0] == 1
+    assert seat_map.free_seats == 7
+    assert seat_map.row_free.tolist() == [4, 0, 3]
+    assert seat_map.longest_runs.tolist() == [2, 0, 2]
+    seat_map.release([(1, 2), (1, 3), (1, 4)])
+    assert seat_map.longest_runs.tolist() == [2, 3, 2]
+    assert seat_map.has_room(3)
+
+    # Nothing is changed if one of the places is rejected
+    with pytest.raises(BookingError) as error:
+        seat_map.book([(0, 0), (0, 2), (0, 0)])
+    assert error.value.rejected == [(0, 2, ALREADY_TAKEN), (0, 0, DUPLICATED)]
+    assert seat_map.free_seats == 10
+    assert seats_array[0, 0] == 0
+    with pytest.raises(IncorrectShape):
+        seat_map.book([(3, 0)])
+
+    # Counters follow changes made without the SeatMap after update_rows()
+    seats_array[2] = 0
+    seat_map.update_rows([2])
+    assert seat_map.free_seats == 13
+    assert seat_map.longest_runs.tolist() == [2, 3, 6]
+    assert seat_map.row_free.tolist() == (seats_array == 0).sum(axis=1).tolist()
+
+    with pytest.raises(IncorrectArrayType):
+        SeatMap([[0, 1]])
+    with pytest.raises(IncorrectArrayData):
+        SeatMap(np.array([['0', '1']]))
+
+
+def test_hold_scheduler():
+    now = [100.0]
+    scheduler = HoldScheduler(ttl=60, clock=lambda: now[0])
+    seats_array = np.zeros([3, 4], np.int8)
+    seats_array[0, 0] = 1
+    seat_map = scheduler.add_hall('movie', seats_array)
+
+    assert scheduler.hold('movie', [(1, 1), (1, 2)]) == 160
+    assert scheduler.hold('movie', [(2, 0)], ttl=10) == 110
+    assert seats_array.tolist() == [[1, 0, 0, 0],
+                                    [0, HELD, HELD, 0],
+                                    [HELD, 0, 0, 0]]
+    assert len(scheduler) == 3
+    assert seat_map.free_seats == 8
+    assert scheduler.next_deadline() == 110
+    assert check_places(seats_array, {'A': 0, 'B': 1}, [('B', 2), ('A', 1)]) == [ON_HOLD, ALREADY_TAKEN]
+
+    # Nothing is held if one of the places is not free
+    with pytest.raises(BookingError) as error:
+        scheduler.hold('movie', [(0, 3), (1, 1), (0, 0)])
+    assert error.value.rejected == [(1, 1, ON_HOLD), (0, 0, ALREADY_TAKEN)]
+    assert seats_array[0, 3] == 0
+
+    # Only the lapsed holds are freed
+    now[0] = 110
+    assert scheduler.expire() == [('movie', 2, 0)]
+    assert seats_array[2, 0] == 0
+    assert scheduler.next_deadline() == 160
+    with pytest.raises(BookingError) as error:
+        scheduler.confirm('movie', [(1, 1), (2, 0)])
+    assert error.value.rejected == [(2, 0, NOT_HELD)]
+
+    scheduler.confirm('movie', [(1, 1)])
+    scheduler.release('movie', [(1, 2)])
+    assert seats_array[1].tolist() == [0, 1, 0, 0]
+    assert len(scheduler) == 0
+    assert scheduler.next_deadline() is None
+    now[0] = 1000
+    assert scheduler.expire() == []
+    assert seat_map.free_seats == (seats_array == 0).sum()
+
+    with pytest.raises(BookingError):
+        scheduler.hold('other movie', [(0, 0)])
+
+
+def test_booking_service():
+    now = [0.0]
+    service = BookingService(ttl=60, clock=lambda: now[0])
+    row_indices = {'A': 0, 'B': 1}
+    seats_array = np.array([[0, 0, 1],
+                            [0, 0, 0]])
+    service.add_screening('movie', seats_array, row_indices)
+
+    assert 'movie' in service
+    assert service.titles() == ['movie']
+    assert service.free_seats('movie') == 5
+    assert service.has_room('movie', 3)
+    assert service.check('movie', [('A', 3), ('a', 1)]) == [ALREADY_TAKEN, None]
+
+    service.book('movie', [('A', 1), ('A', 2)])
+    assert service.get_seats('movie').tolist() == [[1, 1, 1],
+                                                   [0, 0, 0]]
+    # The seats are copied
+    assert seats_array[0, 0] == 0
+    with pytest.raises(BookingError) as error:
+        service.book('movie', [('B', 1), ('A', 1)])
+    assert error.value.rejected == [('A', 1, ALREADY_TAKEN)]
+    assert service.free_seats('movie') == 3
+
+    # Holds are confirmed, released or lapse
+    assert service.hold('movie', [('B', 1), ('B', 2)]) == 60
+    with pytest.raises(BookingError) as error:
+        service.book('movie', [('B', 2)])
+    assert error.value.rejected == [('B', 2, ON_HOLD)]
+    service.confirm('movie', [('B', 1)])
+    service.release('movie', [('B', 2)])
+    service.hold('movie', [('B', 3)])
+    with pytest.raises(BookingError) as error:
+        service.confirm('movie', [('B', 2), ('B', 3)])
+    assert error.value.rejected == [('B', 2, NOT_HELD)]
+    now[0] = 60
+    assert service.expire() == [('movie', 1, 2)]
+    assert service.get_seats('movie').tolist() == [[1, 1, 1],
+                                                   [1, 0, 0]]
+
+    with pytest.raises(BookingError):
+        service.add_screening('movie', seats_array, row_indices)
+    with pytest.raises(BookingError):
+        service.book('other movie', [('A', 1)])
+
+
+def test_booking_service_save_holds():
+    # Held places are saved as free, only the bookings reach the file
+    saved = []
+    service = BookingService(save=lambda movie, seats_array: saved.append(seats_array))
+    service.add_screening('movie', np.zeros([2, 3], np.int8), {'A': 0, 'B': 1})
+    service.hold('movie', [('A', 1), ('A', 2)])
+    service.book('movie', [('B', 3)])
+    service.confirm('movie', [('A', 1)])
+
+    assert [seats.tolist() for seats in saved] == [[[0, 0, 0], [0, 0, 1]],
+                                                  [[1, 0, 0], [0, 0, 1]]]
+    # Only the displayed seats show the hold
+    assert service.get_seats('movie').tolist() == saved[-1].tolist()
+    assert service.get_display_seats('movie')[0, 1] == HELD
+
+
+def test_booking_service_expire():
+    # Only the screenings with lapsed holds are locked by expire()
+    now = [0.0]
+    service = BookingService(ttl=60, clock=lambda: now[0])
+    for movie in ['first', 'second', 'third']:
+        service.add_screening(movie, np.zeros([2, 3], np.int8), {'A': 0, 'B': 1})
+    service.hold('first', [('A', 1)], ttl=10)
+    service.hold('second', [('B', 3)])
+    service.hold('third', [('A', 2), ('B', 2)], ttl=20)
+    service.confirm('third', [('B', 2)])
+    now[0] = 30
+
+    lock = service._screenings['second'][0]
+    with lock:
+        expired = []
+        thread = threading.Thread(target=lambda: expired.extend(service.expire()))
+        thread.start()
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+    assert expired == [('first', 0, 0), ('third', 0, 1)]
+    assert service.get_seats('third').tolist() == [[0, 0, 0], [0, 1, 0]]
+    assert service.expire() == []
+
+    now[0] = 60
+    assert service.expire() == [('second', 1, 2)]
+    assert service.free_seats('second') == 6
+
+
+def test_booking_service_save_error():
+    # The places are booked in memory only if they are saved
+    now = [0.0]
+    failing = [True]
+
+    def save(movie, seats_array):
+        if failing[0]:
+            raise SaveConflict('Seats have been taken by someone else', [(0, 0)], movie)
+
+    service = BookingService(ttl=60, clock=lambda: now[0], save=save)
+    service.add_screening('movie', np.zeros([2, 3], np.int8), {'A': 0, 'B': 1})
+    with pytest.raises(SaveConflict):
+        service.book('movie', [('A', 1), ('B', 2)])
+    assert service.free_seats('movie') == 6
+
+    service.hold('movie', [('A', 2)])
+    with pytest.raises(SaveConflict):
+        service.confirm('movie', [('A', 2)])
+    assert service.get_display_seats('movie')[0, 1] == HELD
+
+    # The hold still lapses at its deadline, or is confirmed when the save works again
+    failing[0] = False
+    service.confirm('movie', [('A', 2)])
+    service.book('movie', [('A', 1)])
+    assert service.get_seats('movie').tolist() == [[1, 1, 0], [0, 0, 0]]
+    service.hold('movie', [('B', 1)])
+    failing[0] = True
+    with pytest.raises(SaveConflict):
+        service.confirm('movie', [('B', 1)])
+    now[0] = 60
+    assert service.expire() == [('movie', 1, 0)]
+    assert service.free_seats('movie') == 4
+
+
+def test_booking_service_threads():
+    # Many sessions book and hold random places of two screenings, no place may be booked twice
+    service = BookingService()
+    row_indices = {chr(ord('A') + i): i for i in range(10)}
+    movies = ['first', 'second']
+    for movie in movies:
+        service.add_screening(movie, np.zeros([10, 20], np.int8), row_indices)
+    booked = {movie: [] for movie in movies}
+
+    def session(seed):
+        rng = random.Random(seed)
+        for _ in range(300):
+            movie = rng.choice(movies)
+            places = [(rng.choice('ABCDEFGHIJ'), rng.randint(1, 20)) for _ in range(rng.randint(1, 3))]
+            try:
+                if rng.random() < 0.5:
+                    service.book(movie, places)
+                else:
+                    service.hold(movie, places)
+                    service.confirm(movie, places)
+            except BookingError:
+                continue
+            booked[movie].extend(places)
+
+    threads = [threading.Thread(target=session, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for movie in movies:
+        seats = service.get_seats(movie)
+        assert len(booked[movie]) == len(set(booked[movie])) == seats.sum()
+        assert all(seats[row_indices[row], place - 1] == 1 for row, place in booked[movie])
+        assert service.free_seats(movie) == (seats == 0).sum()
+
+
+def test_booking_service_screening_locks():
+    # A booking is saved while its screening is locked, sessions of other screenings do not wait for it
+    saving = threading.Event()
+    finish_saving = threading.Event()
+
+    def save(movie, seats_array):
+        if movie == 'first':
+            saving.set()
+            assert finish_saving.wait(timeout=5)
+
+    service = BookingService(save=save)
+    for movie in ['first', 'second']:
+        service.add_screening(movie, np.zeros([2, 5], np.int8), {'A': 0, 'B': 1})
+
+    first = threading.Thread(target=service.book, args=('first', [('A', 1)]))
+    first.start()
+    assert saving.wait(timeout=5)
+
+    # The first screening is locked by the saving session, the second one is booked meanwhile
+    second = threading.Thread(target=service.book, args=('second', [('A', 1)]))
+    second.start()
+    second.join(timeout=5)
+    assert not second.is_alive()
+    assert service.get_seats('second')[0, 0] == 1
+
+    # A session of the first screening waits until the booking is saved
+    waiting = threading.Thread(target=service.free_seats, args=('first',))
+    waiting.start()
+    waiting.join(timeout=0.1)
+    assert waiting.is_alive()
+
+    finish_saving.set()
+    for thread in [first, waiting]:
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+    assert service.get_seats('first')[0, 0] == 1
@@ -1,5 +1,6 @@
 import numpy as np
 import pytest
+import os
 from load_save_data import (create_txt_info,
                             create_seats_array,
                             get_csv_data,
@@ -8,11 +9,32 @@ from load_save_data import (create_txt_info,
                             IncorrectArrayData,
                             IncorrectShape,
                             FileError,
-                            repair_title)
+                            repair_title,
+                            get_bin_data,
+                            save_bin_data,
+                            get_seats_data,
+                            save_seats_data,
+                            convert_csv_to_bin,
+                            convert_csv_to_store,
+                            get_journal_path,
+                            replay_journal,
+                            append_journal,
+                            compact_journal,
+                            save_journal_data,
+                            get_csv_version,
+                            SaveConflict,
+                            get_cache_info,
+                            clear_cache,
+                            create_seats_arrays,
+                            parse_csv_data,
+                            _file_lock,
+                            _remove_stale_lock)
 
 
 def test_create_txt_info():
     assert create_txt_info('Teletubisie', np.array([0, 0, 1, 0])) == 'Title: Teletubisie\n' + '+'*45 + f'\nSeats taken: 1\n'
+    # Held seats (2) are counted once, like in the image
+    assert 'Seats taken: 3\n' in create_txt_info('Teletubisie', np.array([[1, 2], [2, 0]]))
 
     with pytest.raises(IncorrectArrayType):
         create_txt_info('Teletubisie', [1, 2, 3])
@@ -100,4 +122,539 @@ def test_repair_title():
         repair_title([1, 2, 3])
 
 
+def test_save_get_bin_data(tmp_path):
+    path = str(tmp_path / 'film.bin')
+    seats_array = np.array([[0, 1, 0], [1, 1, 0]])
+    save_bin_data('film', seats_array, path)
 
+    loaded = get_bin_data('film', path)
+    assert loaded.dtype == np.int8
+    assert np.array_equal(loaded, seats_array)
+
+    assert get_bin_data(None, path) is None
+    save_bin_data(None, seats_array, path)
+
+    with pytest.raises(IncorrectArrayType):
+        save_bin_data('film', [0, 1], path)
+
+    with pytest.raises(FileError):
+        save_bin_data('film', np.array([0, 1]), path)
+
+    with pytest.raises(FileError):
+        get_bin_data('film', str(tmp_path / 'missing.bin'))
+
+
+def test_save_bin_data_conflict(tmp_path, monkeypatch):
+    path = str(tmp_path / 'film.bin')
+    save_bin_data('film', np.zeros([2, 3]), path)
+
+    # Two terminals load the hall, the bookings of different seats are merged
+    first = get_bin_data('film', path)
+    second = get_bin_data('film', path)
+    first_original, second_original = first.copy(), second.copy()
+    first[0, 0] = 1
+    second[1, 2] = 1
+    save_seats_data('film', first, path, 'bin', original_array=first_original)
+    save_seats_data('film', second, path, 'bin', original_array=second_original)
+    assert get_bin_data('film', path).tolist() == [[1, 0, 0], [0, 0, 1]]
+
+    # The same seat can not be booked twice
+    second_original = second.copy()
+    second[0, 0] = 1
+    with pytest.raises(SaveConflict) as error:
+        save_bin_data('film', second, path, second_original)
+    assert error.value.seats == [(0, 0)]
+    assert get_bin_data('film', path).tolist() == [[1, 0, 0], [0, 0, 1]]
+
+    # The file is locked while it is saved
+    monkeypatch.setattr('load_save_data.LOCK_TIMEOUT', 0.05)
+    (tmp_path / 'film.bin.lock').write_text('')
+    with pytest.raises(FileError):
+        save_bin_data('film', first, path)
+
+
+def test_get_bin_data_invalid(tmp_path):
+    empty_path = tmp_path / 'empty.bin'
+    empty_path.write_bytes(b'')
+    with pytest.raises(FileError):
+        get_bin_data('empty', str(empty_path))
+
+    csv_path = tmp_path / 'film.bin'
+    csv_path.write_bytes(b'# Title: film\n0,0,1\n')
+    with pytest.raises(FileError):
+        get_bin_data('film', str(csv_path))
+
+    path = str(tmp_path / 'truncated.bin')
+    save_bin_data('truncated', np.zeros([4, 5], np.int8), path)
+    with open(path, 'rb+') as file:
+        file.truncate(30)
+    with pytest.raises(FileError):
+        get_bin_data('truncated', path)
+
+
+def test_get_save_seats_data(tmp_path):
+    seats_array = np.array([[0, 1], [0, 0]])
+    for data_format in ('csv', 'bin'):
+        path = str(tmp_path / f'film.{data_format}')
+        save_seats_data('film', seats_array, path, data_format)
+        assert np.array_equal(get_seats_data('film', path, data_format), seats_array)
+
+    with pytest.raises(FileError):
+        get_seats_data('film', path, 'xml')
+
+    with pytest.raises(FileError):
+        save_seats_data('film', seats_array, path, 'xml')
+
+
+def test_convert_csv_to_bin(tmp_path):
+    bin_dir = tmp_path / 'movies_bin'
+    converted = convert_csv_to_bin('./movies', str(bin_dir))
+
+    assert 'Enchanted' in converted
+    assert 'pusty_plik' not in converted
+    assert np.array_equal(get_bin_data('Enchanted', str(bin_dir / 'Enchanted.bin')),
+                          get_csv_data('Enchanted', './movies/Enchanted.csv'))
+
+    with pytest.raises(FileError):
+        convert_csv_to_bin('./not_a_directory', str(bin_dir))
+
+
+def test_get_save_store_data(tmp_path):
+    store_path = str(tmp_path / 'movies.seats')
+    converted = convert_csv_to_store('./movies', store_path)
+    assert 'Enchanted' in converted
+
+    seats_array = get_seats_data('Enchanted', store_path, 'store')
+    assert not isinstance(seats_array, np.memmap)
+    assert np.array_equal(seats_array, get_csv_data('Enchanted', './movies/Enchanted.csv'))
+
+    # Picked seats reach the store file only when they are saved
+    original_array = seats_array.copy()
+    seats_array[0, 0] = 1
+    assert get_seats_data('Enchanted', store_path, 'store')[0, 0] == 0
+    save_seats_data('Enchanted', seats_array, store_path, 'store', original_array=original_array)
+    assert get_seats_data('Enchanted', store_path, 'store')[0, 0] == 1
+
+    # Another terminal which loaded the screening before can not book the same seat
+    other = original_array.copy()
+    other[0, 0] = other[0, 1] = 1
+    with pytest.raises(SaveConflict) as error:
+        save_seats_data('Enchanted', other, store_path, 'store', original_array=original_array)
+    assert error.value.seats == [(0, 0)]
+    other[0, 0] = 0
+    save_seats_data('Enchanted', other, store_path, 'store', original_array=original_array)
+    assert get_seats_data('Enchanted', store_path, 'store')[0, :2].tolist() == [1, 1]
+
+    assert get_seats_data(None, store_path, 'store') is None
+
+    with pytest.raises(FileError):
+        get_seats_data('missing', store_path, 'store')
+
+    with pytest.raises(FileError):
+        save_seats_data('Enchanted', np.zeros([2, 2]), store_path, 'store')
+
+
+def test_append_replay_journal(tmp_path):
+    path = str(tmp_path / 'film.csv')
+    save_csv_data('film', np.zeros([3, 4]), path)
+
+    assert append_journal('film', [(0, 1), (2, 3)], path) == 2
+    assert append_journal('film', np.array([[1, 1]]), path) == 3
+
+    seats_array = get_csv_data('film', path)
+    assert seats_array.sum() == 3
+    assert seats_array[0, 1] == seats_array[2, 3] == seats_array[1, 1] == 1
+
+    # A partially written record is skipped
+    with open(get_journal_path(path), 'a') as journal:
+        journal.write('{"movie": "film", "ro')
+    assert get_csv_data('film', path).sum() == 3
+
+    assert replay_journal('film', np.zeros([3, 4]), str(tmp_path / 'missing.journal')) == 0
+
+    append_journal('film', [(5, 1)], path)
+    with pytest.raises(FileError):
+        get_csv_data('film', path)
+
+
+def test_compact_journal(tmp_path):
+    path = str(tmp_path / 'film.csv')
+    save_csv_data('film', np.zeros([3, 4]), path)
+    append_journal('film', [(0, 1), (2, 3)], path)
+
+    compact_journal('film', path)
+    assert not (tmp_path / 'film.csv.journal').exists()
+    assert get_csv_data('film', path).sum() == 2
+    assert 'Seats taken: 2' in (tmp_path / 'film.csv').read_text()
+
+
+def test_save_csv_data_journal(tmp_path):
+    path = str(tmp_path / 'film.csv')
+    save_csv_data('film', np.zeros([3, 4]), path)
+    append_journal('film', [(0, 1), (2, 3)], path)
+
+    # Releasing a seat booked in the journal with a csv save
+    version = get_csv_version(path)
+    seats_array = get_seats_data('film', path, 'csv')
+    original_array = seats_array.copy()
+    seats_array[0, 1] = 0
+    save_seats_data('film', seats_array, path, 'csv', version, original_array)
+    assert not (tmp_path / 'film.csv.journal').exists()
+    assert not (tmp_path / 'film.csv.journal.count').exists()
+    assert get_seats_data('film', path, 'journal')[0, 1] == 0
+    assert get_seats_data('film', path, 'journal').sum() == 1
+
+    # A booking appended to the journal after loading is merged, not dropped
+    version = get_csv_version(path)
+    seats_array = get_seats_data('film', path, 'csv')
+    original_array = seats_array.copy()
+    append_journal('film', [(1, 1)], path)
+    seats_array[1, 0] = 1
+    save_seats_data('film', seats_array, path, 'csv', version, original_array)
+    assert not (tmp_path / 'film.csv.journal').exists()
+    assert get_csv_data('film', path)[1].tolist() == [1, 1, 0, 0]
+
+    # A seat taken in the journal after loading is a conflict
+    version = get_csv_version(path)
+    seats_array = get_seats_data('film', path, 'csv')
+    original_array = seats_array.copy()
+    append_journal('film', [(0, 0)], path)
+    seats_array[0, 0] = 1
+    with pytest.raises(SaveConflict):
+        save_seats_data('film', seats_array, path, 'csv', version, original_array)
+    assert (tmp_path / 'film.csv.journal').exists()
+
+
+def test_save_journal_data(tmp_path, monkeypatch):
+    path = str(tmp_path / 'film.csv')
+    save_csv_data('film', np.zeros([3, 4]), path)
+    snapshot = (tmp_path / 'film.csv').read_text()
+
+    seats_array = get_seats_data('film', path, 'journal')
+    seats_array[1, 2] = 1
+    save_seats_data('film', seats_array, path, 'journal')
+
+    # Only the journal has been written
+    assert (tmp_path / 'film.csv').read_text() == snapshot
+    assert len((tmp_path / 'film.csv.journal').read_text().splitlines()) == 1
+    assert get_csv_data('film', path)[1, 2] == 1
+
+    # Saving the same array again does not add records
+    save_journal_data('film', seats_array, path)
+    assert len((tmp_path / 'film.csv.journal').read_text().splitlines()) == 1
+
+    monkeypatch.setattr('load_save_data.JOURNAL_COMPACT_SIZE', 2)
+    seats_array[0, 0] = 1
+    save_journal_data('film', seats_array, path)
+    assert not (tmp_path / 'film.csv.journal').exists()
+    assert get_csv_data('film', path).sum() == 2
+
+    with pytest.raises(IncorrectArrayType):
+        save_journal_data('film', [[1]], path)
+
+    with pytest.raises(FileError):
+        save_journal_data('film', np.zeros([2, 2]), path)
+
+
+def test_save_journal_data_conflict(tmp_path):
+    path = str(tmp_path / 'film.csv')
+    save_csv_data('film', np.zeros([3, 4]), path)
+
+    # Two terminals load the hall and book the same seat
+    first = get_seats_data('film', path, 'journal')
+    second = get_seats_data('film', path, 'journal')
+    first_original, second_original = first.copy(), second.copy()
+    first[0, 0] = 1
+    second[0, 0] = second[2, 3] = 1
+
+    save_seats_data('film', first, path, 'journal', original_array=first_original)
+    with pytest.raises(SaveConflict) as error:
+        save_seats_data('film', second, path, 'journal', original_array=second_original)
+    assert error.value.seats == [(0, 0)]
+    assert len((tmp_path / 'film.csv.journal').read_text().splitlines()) == 1
+
+    # A booking of other seats is still saved
+    second = get_seats_data('film', path, 'journal')
+    second_original = second.copy()
+    second[2, 3] = 1
+    save_seats_data('film', second, path, 'journal', original_array=second_original)
+    assert get_csv_data('film', path).sum() == 2
+
+
+def test_save_journal_data_version(tmp_path, monkeypatch):
+    path = str(tmp_path / 'film.csv')
+    save_csv_data('film', np.zeros([3, 4]), path)
+    version = get_csv_version(path)
+    first = get_seats_data('film', path, 'journal')
+    second, original_array = first.copy(), first.copy()
+    first[0, 0] = 1
+    second[0, 0] = second[1, 1] = 1
+
+    # The snapshot has not been rewritten, the conflict is found in the journal without loading the snapshot
+    def load(chosen_movie, path):
+        raise AssertionError('The snapshot should not be loaded')
+    monkeypatch.setattr('load_save_data._csv_backend.load', load)
+    save_journal_data('film', first, path, version, original_array)
+    with pytest.raises(SaveConflict) as error:
+        save_journal_data('film', second, path, version, original_array)
+    assert error.value.seats == [(0, 0)]
+    assert (tmp_path / 'film.csv.journal.count').read_text() == '1'
+    monkeypatch.undo()
+
+    # After a compaction the snapshot is loaded to find the conflict
+    compact_journal('film', path)
+    assert not (tmp_path / 'film.csv.journal.count').exists()
+    with pytest.raises(SaveConflict):
+        save_journal_data('film', second, path, version, original_array)
+    second[0, 0] = 0
+    save_journal_data('film', second, path, version, original_array)
+    assert get_csv_data('film', path).sum() == 2
+
+
+def test_save_csv_data_version(tmp_path):
+    path = str(tmp_path / 'film.csv')
+    assert get_csv_version(path) == 0
+
+    assert save_csv_data('film', np.zeros([2, 3]), path) == 1
+    assert save_csv_data('film', np.zeros([2, 3]), path) == 2
+    assert get_csv_version(path) == 2
+    assert 'Version: 2' in (tmp_path / 'film.csv').read_text()
+    assert get_csv_data('film', path).shape == (2, 3)
+
+    # No temporary or lock files are left
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['film.csv']
+
+
+def test_save_csv_data_conflict(tmp_path):
+    path = str(tmp_path / 'film.csv')
+    save_csv_data('film', np.zeros([2, 3]), path)
+
+    # Two terminals load the same version
+    version = get_csv_version(path)
+    first = get_csv_data('film', path)
+    second = get_csv_data('film', path)
+    first_original, second_original = first.copy(), second.copy()
+
+    first[0, 0] = 1
+    save_csv_data('film', first, path, version, first_original)
+
+    # Different seats are merged
+    second[1, 2] = 1
+    save_csv_data('film', second, path, version, second_original)
+    merged = get_csv_data('film', path)
+    assert merged[0, 0] == merged[1, 2] == 1
+
+    # The same seat is rejected
+    third = second_original.copy()
+    third[0, 0] = 1
+    with pytest.raises(SaveConflict) as e:
+        save_csv_data('film', third, path, version, second_original)
+    assert e.value.seats == [(0, 0)]
+
+    # Without the original array a changed file can not be merged
+    with pytest.raises(SaveConflict):
+        save_csv_data('film', third, path, version)
+
+    assert get_csv_data('film', path).sum() == 2
+
+
+def test_save_csv_data_atomic(tmp_path, monkeypatch):
+    path = str(tmp_path / 'film.csv')
+    save_csv_data('film', np.zeros([2, 3]), path)
+    content = (tmp_path / 'film.csv').read_text()
+
+    def failing_savetxt(*args, **kwargs):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(np, 'savetxt', failing_savetxt)
+    with pytest.raises(OSError):
+        save_csv_data('film', np.ones([2, 3]), path)
+
+    assert (tmp_path / 'film.csv').read_text() == content
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['film.csv']
+
+
+def test_save_csv_data_locked(tmp_path, monkeypatch):
+    path = str(tmp_path / 'film.csv')
+    (tmp_path / 'film.csv.lock').write_text('')
+    monkeypatch.setattr('load_save_data.LOCK_TIMEOUT', 0.05)
+
+    with pytest.raises(FileError):
+        save_csv_data('film', np.zeros([2, 3]), path)
+
+    # A stale lock is removed
+    monkeypatch.setattr('load_save_data.LOCK_STALE_TIME', -1)
+    assert save_csv_data('film', np.zeros([2, 3]), path) == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['film.csv']
+
+
+def test_file_lock_broken(tmp_path):
+    path = str(tmp_path / 'film.csv')
+    lock_path = tmp_path / 'film.csv.lock'
+
+    # A process which found a stale lock does not remove the lock taken by another process meanwhile
+    lock_path.write_text('stale')
+    stale_stat = os.stat(lock_path)
+    os.remove(lock_path)
+    lock_path.write_text('fresh')
+    os.utime(lock_path, ns=(stale_stat.st_mtime_ns + 10**9, stale_stat.st_mtime_ns + 10**9))
+    _remove_stale_lock(str(lock_path), stale_stat)
+    assert lock_path.read_text() == 'fresh'
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['film.csv.lock']
+    os.remove(lock_path)
+
+    # A lock broken by another process while it is held is not removed at the end, nor raises an error
+    with _file_lock('film', path):
+        os.remove(lock_path)
+        lock_path.write_text('other')
+    assert lock_path.read_text() == 'other'
+    os.remove(lock_path)
+    with _file_lock('film', path):
+        os.remove(lock_path)
+    assert not lock_path.exists()
+
+
+def test_get_csv_data_cache(tmp_path):
+    clear_cache()
+    path = str(tmp_path / 'film.csv')
+    save_csv_data('film', np.zeros([2, 3]), path)
+
+    # The saved array is cached
+    first = get_csv_data('film', path)
+    assert get_cache_info()['hits'] == 1
+    assert get_cache_info()['misses'] == 0
+
+    # The returned arrays are independent copies
+    first[0, 0] = 1
+    second = get_csv_data('film', path)
+    assert second[0, 0] == 0
+    assert get_cache_info()['hits'] == 2
+
+    # A change of the file made by someone else is detected
+    (tmp_path / 'film.csv').write_text('# Title: film\n#\n# Seats taken: 1\n#\n1,0,0\n0,0,0\n')
+    assert get_csv_data('film', path)[0, 0] == 1
+    assert get_cache_info()['misses'] == 1
+
+    # A change of the journal is detected
+    append_journal('film', [(1, 1)], path)
+    assert get_csv_data('film', path)[1, 1] == 1
+    assert get_cache_info()['misses'] == 2
+
+    clear_cache()
+    assert get_cache_info() == {'hits': 0, 'misses': 0, 'size': 0, 'max_size': 32}
+
+
+def test_get_csv_data_cache_size(tmp_path, monkeypatch):
+    clear_cache()
+    monkeypatch.setattr('load_save_data.CACHE_SIZE', 2)
+    for name in ('a', 'b', 'c'):
+        save_csv_data(name, np.zeros([2, 2]), str(tmp_path / f'{name}.csv'))
+
+    assert get_cache_info()['size'] == 2
+    get_csv_data('a', str(tmp_path / 'a.csv'))
+    assert get_cache_info()['misses'] == 1
+    get_csv_data('c', str(tmp_path / 'c.csv'))
+    assert get_cache_info()['hits'] == 1
+    clear_cache()
+
+
+def test_create_seats_arrays(tmp_path):
+    halls = [('film', 2, 3), ('Zły: film', 4, 5), ('inny', 2, 3)]
+    report = create_seats_arrays(halls, str(tmp_path), workers=2)
+
+    assert report['files'] == 3
+    assert report['files_per_second'] > 0
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['Zy film.csv', 'film.csv', 'inny.csv']
+    assert get_csv_data('Zły: film', str(tmp_path / 'Zy film.csv')).shape == (4, 5)
+
+    # The files are the same as the ones saved by np.savetxt
+    seats_array = np.zeros([2, 3], dtype=np.int8)
+    np.savetxt(str(tmp_path / 'expected.csv'), seats_array, delimiter=',', fmt='%1d',
+               header=create_txt_info('film', seats_array))
+    assert (tmp_path / 'film.csv').read_text() == (tmp_path / 'expected.csv').read_text()
+
+
+def test_create_seats_arrays_atomic(tmp_path, monkeypatch):
+    # A failed write leaves the previous file, a locked file is not overwritten
+    path = str(tmp_path / 'film.csv')
+    save_csv_data('film', np.ones([2, 3]), path)
+    content = (tmp_path / 'film.csv').read_text()
+
+    def fail(*args, **kwargs):
+        raise OSError('Disk full')
+    monkeypatch.setattr('load_save_data.os.fsync', fail)
+    with pytest.raises(FileError):
+        create_seats_arrays([('film', 2, 3)], str(tmp_path))
+    assert (tmp_path / 'film.csv').read_text() == content
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['film.csv']
+    monkeypatch.undo()
+
+    monkeypatch.setattr('load_save_data.LOCK_TIMEOUT', 0.05)
+    (tmp_path / 'film.csv.lock').write_text('')
+    with pytest.raises(FileError):
+        create_seats_arrays([('film', 2, 3)], str(tmp_path))
+    assert (tmp_path / 'film.csv').read_text() == content
+
+
+def test_create_seats_arrays_invalid(tmp_path):
+    with pytest.raises(IncorrectShape):
+        create_seats_arrays([('film', 2, 3.5)], str(tmp_path))
+
+    with pytest.raises(IncorrectShape):
+        create_seats_arrays([('film', 0, 3)], str(tmp_path))
+
+    with pytest.raises(IncorrectShape):
+        create_seats_arrays([('film', 3)], str(tmp_path))
+
+    with pytest.raises(FileError):
+        create_seats_arrays([('film', 2, 3)], str(tmp_path / 'missing'))
+
+    assert create_seats_arrays([], str(tmp_path))['files'] == 0
+
+
+def test_parse_csv_data():
+    data = b'# Title: film\n# +++\n# Seats taken: 2\n# Version: 3\n# \n0,1,0\n1,0,0\n'
+    seats_array, info = parse_csv_data(data)
+    assert seats_array.dtype == np.int8
+    assert np.array_equal(seats_array, [[0, 1, 0], [1, 0, 0]])
+    assert info == {'title': 'film', 'seats_taken': 2, 'version': 3}
+
+    # Windows line endings, no header, a single row
+    seats_array, info = parse_csv_data(b'0,1,1\r\n')
+    assert np.array_equal(seats_array, [[0, 1, 1]])
+    assert info == {}
+
+    # Other numbers are parsed by np.genfromtxt
+    seats_array, _ = parse_csv_data(b'0.0,1.0\n0.0,0.0\n')
+    assert np.array_equal(seats_array, [[0, 1], [0, 0]])
+    assert seats_array.dtype == np.int8
+    seats_array, _ = parse_csv_data(b'0, 1,10\n1, 0,0\n')
+    assert seats_array.dtype == np.int8
+    assert np.array_equal(seats_array, [[0, 1, 10], [1, 0, 0]])
+
+
+def test_parse_csv_data_invalid():
+    with pytest.raises(FileError):
+        parse_csv_data(b'# Seats taken: 5\n0,1\n0,0\n')
+
+    with pytest.raises(FileError):
+        parse_csv_data(b'0,1,0\n0,0\n')
+
+    with pytest.raises(FileError):
+        parse_csv_data(b'# Title: film\n')
+
+    with pytest.raises(FileError):
+        parse_csv_data(b'some notes')
+
+    with pytest.raises(FileError):
+        parse_csv_data(b'0.5,1\n0,0\n')
+
+    with pytest.raises(FileError):
+        parse_csv_data(b'300,1\n0,0\n')
+
+
+def test_get_csv_data_parser():
+    # The files in the movies directory are loaded the same as with np.genfromtxt
+    for title in ('Enchanted', 'Fireproof', 'many_cols', 'pelny_plik'):
+        path = f'./movies/{title}.csv'
+        assert np.array_equal(get_csv_data(title, path), np.genfromtxt(path, delimiter=',', skip_header=4))
@@ -1,6 +1,9 @@
 import numpy as np
-from meta_data import get_movie_titles, get_titles_dir
+from meta_data import get_movie_titles, get_titles_dir, get_titles_store, get_catalog, get_titles_index
+from load_save_data import save_csv_data, save_bin_data, append_journal
+from seat_store import create_store
 import pytest
+import pandas as pd
 
 
 def test_get_movie_titles_correct():
@@ -37,3 +40,122 @@ def test_get_titles_dir_inc_path():
     get_titles_dir('./movies/Dear John.csv')
 
     assert get_titles_dir() is None
+
+
+def test_get_titles_store(tmp_path):
+    path = str(tmp_path / 'movies.seats')
+    store = create_store(path)
+    store.add_screening('film', np.zeros([2, 3]))
+
+    assert get_titles_store(path) == ['film']
+    assert get_titles_store() is None
+    assert get_titles_store(str(tmp_path / 'missing.seats')) is None
+
+
+def test_get_catalog(tmp_path):
+    movies_dir = tmp_path / 'movies'
+    movies_dir.mkdir()
+    index_path = str(tmp_path / 'movies.catalog')
+    seats_array = np.zeros([3, 4])
+    seats_array[0, 1] = 1
+    save_csv_data("He's a film", seats_array, str(movies_dir / 'Hes a film.csv'))
+    save_csv_data('Another', np.zeros([2, 2]), str(movies_dir / 'Another.csv'))
+    (movies_dir / 'notes.txt').write_text('not a movie')
+    (movies_dir / 'empty.csv').write_text('')
+
+    catalog = get_catalog(str(movies_dir), index_path)
+    assert list(catalog) == ['Another', "He's a film"]
+    assert catalog["He's a film"] == {'title': "He's a film", 'path': str(movies_dir / 'Hes a film.csv'),
+                                      'rows': 3, 'seats': 4, 'seats_taken': 1}
+
+    # The index is updated after a change in the directory
+    (movies_dir / 'Another.csv').unlink()
+    save_csv_data('New', np.zeros([5, 6]), str(movies_dir / 'New.csv'))
+    assert list(get_catalog(str(movies_dir), index_path)) == ["He's a film", 'New']
+    assert get_titles_index(str(movies_dir), index_path) == ["He's a film", 'New']
+
+
+def test_get_catalog_bin(tmp_path):
+    save_bin_data('film', np.ones([2, 3]), str(tmp_path / 'film.bin'))
+    save_csv_data('csv film', np.ones([2, 3]), str(tmp_path / 'csv film.csv'))
+    index_path = str(tmp_path / 'index')
+
+    catalog = get_catalog(str(tmp_path), index_path, '.bin')
+    assert catalog == {'film': {'title': 'film', 'path': str(tmp_path / 'film.bin'), 'rows': 2, 'seats': 3,
+                                'seats_taken': 6}}
+    assert list(get_catalog(str(tmp_path), index_path)) == ['csv film']
+
+
+def test_get_catalog_journal(tmp_path):
+    index_path = str(tmp_path / 'index')
+    movies_dir = tmp_path / 'movies'
+    movies_dir.mkdir()
+    path = str(movies_dir / 'film.csv')
+    save_csv_data('film', np.zeros([2, 3]), path)
+    append_journal('film', [(0, 0)], path)
+
+    assert get_catalog(str(movies_dir), index_path)['film']['seats_taken'] == 1
+    # Appending to the journal does not change the directory
+    append_journal('film', [(1, 1), (1, 2)], path)
+    assert get_catalog(str(movies_dir), index_path)['film']['seats_taken'] == 3
+    assert get_titles_index(str(movies_dir), index_path) == ['film']
+
+
+def test_get_catalog_duplicate_title(tmp_path, capsys):
+    index_path = str(tmp_path / 'index')
+    save_csv_data('film', np.zeros([2, 3]), str(tmp_path / 'film.csv'))
+    save_csv_data('film', np.ones([2, 3]), str(tmp_path / 'film 2.csv'))
+
+    catalog = get_catalog(str(tmp_path), index_path)
+    assert list(catalog) == ['film', 'film (film.csv)']
+    assert catalog['film']['path'] == str(tmp_path / 'film 2.csv')
+    assert catalog['film (film.csv)'] == {'title': 'film', 'path': str(tmp_path / 'film.csv'), 'rows': 2,
+                                          'seats': 3, 'seats_taken': 0}
+    assert 'film (film.csv)' in capsys.readouterr().out
+
+
+def test_get_titles_dir_side_files(tmp_path):
+    path = str(tmp_path / 'film.csv')
+    save_csv_data('film', np.zeros([2, 3]), path)
+    append_journal('film', [(0, 0)], path)
+    for side_file in ('film.csv.lock', '.film.csv.abc.tmp', 'film.csv.lock.1.2.stale'):
+        (tmp_path / side_file).write_text('')
+
+    assert get_titles_dir(str(tmp_path)) == ['film']
+
+
+def test_get_catalog_inc_path(tmp_path):
+    assert get_catalog() is None
+    assert get_catalog(str(tmp_path / 'missing')) is None
+    assert get_titles_index(str(tmp_path / 'missing')) is None
+
+
+def test_get_movie_titles_chunks(tmp_path):
+    path = str(tmp_path / 'movies.csv')
+    films = [f'film {i % 70}' for i in range(200)]
+    pd.DataFrame({'Film': films, 'Year': 2010}).to_csv(path, index=False)
+    expected = pd.read_csv(path).loc[60:, 'Film'].drop_duplicates().values
+
+    titles = get_movie_titles(path, chunk_size=7, cache_dir=None)
+    assert list(titles) == list(expected)
+
+
+def test_get_movie_titles_cache(tmp_path, monkeypatch):
+    path = str(tmp_path / 'movies.csv')
+    cache_dir = str(tmp_path / 'cache')
+    pd.DataFrame({'Film': [f'film {i}' for i in range(65)]}).to_csv(path, index=False)
+
+    titles = get_movie_titles(path, cache_dir=cache_dir)
+    assert list(titles) == ['film 60', 'film 61', 'film 62', 'film 63', 'film 64']
+
+    # An unchanged file is not parsed again
+    def failing_read_csv(*args, **kwargs):
+        raise AssertionError('the file should not be parsed')
+
+    monkeypatch.setattr(pd, 'read_csv', failing_read_csv)
+    assert list(get_movie_titles(path, cache_dir=cache_dir)) == list(titles)
+    monkeypatch.undo()
+
+    # A changed file is parsed again
+    pd.DataFrame({'Film': [f'other {i}' for i in range(62)]}).to_csv(path, index=False)
+    assert list(get_movie_titles(path, cache_dir=cache_dir)) == ['other 60', 'other 61']
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+from seat_store import SeatStore, StoreError, create_store, open_store
+
+
+def test_create_store(tmp_path):
+    path = str(tmp_path / 'movies.seats')
+    store = create_store(path, 4)
+
+    assert len(store) == 0
+    assert store.titles() == []
+    assert open_store(path) is store
+
+    with pytest.raises(StoreError):
+        create_store(path, 0)
+
+    with pytest.raises(StoreError):
+        create_store(str(tmp_path / 'missing' / 'movies.seats'))
+
+
+def test_add_get_screening(tmp_path):
+    path = str(tmp_path / 'movies.seats')
+    store = create_store(path, 2)
+    first = np.array([[0, 1, 0], [1, 0, 0]])
+    second = np.zeros([4, 5], np.int8)
+    store.add_screening('film', first)
+    store.add_screening('Zażółć', second)
+
+    assert store.titles() == ['film', 'Zażółć']
+    assert 'film' in store
+    assert np.array_equal(store.get('film'), first)
+    assert store.get('Zażółć').shape == (4, 5)
+
+    # Reopening the file reads the directory back
+    reopened = SeatStore(path)
+    assert reopened.titles() == ['film', 'Zażółć']
+    assert np.array_equal(reopened.get('film'), first)
+
+    with pytest.raises(StoreError):
+        store.add_screening('film', first)
+    with pytest.raises(StoreError):
+        store.add_screening('third', first)  # the directory is full
+    with pytest.raises(StoreError):
+        store.get('missing')
+
+
+def test_add_screening_invalid(tmp_path):
+    store = create_store(str(tmp_path / 'movies.seats'))
+
+    with pytest.raises(StoreError):
+        store.add_screening('film', [[0, 1]])
+    with pytest.raises(StoreError):
+        store.add_screening('film', np.array([0, 1]))
+    with pytest.raises(StoreError):
+        store.add_screening('x' * 200, np.zeros([2, 2]))
+
+
+def test_save_screening(tmp_path):
+    path = str(tmp_path / 'movies.seats')
+    store = create_store(path)
+    store.add_screening('film', np.zeros([3, 4], np.int8))
+    store.add_screening('other', np.zeros([2, 2], np.int8))
+
+    # Writing through the view
+    view = store.get('film')
+    view[1, 2] = 1
+    store.save('film', view)
+    assert SeatStore(path).get('film')[1, 2] == 1
+
+    # Writing a separate array
+    seats_array = np.zeros([2, 2], np.int8)
+    seats_array[0, 0] = 1
+    store.save('other', seats_array)
+    assert np.array_equal(SeatStore(path).get('other'), seats_array)
+    assert SeatStore(path).get('film')[1, 2] == 1
+
+    with pytest.raises(StoreError):
+        store.save('film', np.zeros([2, 2]))
+
+    # A screening without seats does not need the file map
+    empty = create_store(str(tmp_path / 'empty.seats'))
+    empty.add_screening('empty', np.zeros([0, 3], np.int8))
+    assert empty.get('empty').shape == (0, 3)
+
+
+def test_open_store_invalid(tmp_path):
+    invalid_path = tmp_path / 'invalid.seats'
+    invalid_path.write_bytes(b'# Title: film\n')
+
+    with pytest.raises(StoreError):
+        open_store(str(invalid_path))
+    with pytest.raises(StoreError):
+        open_store(str(tmp_path / 'missing.seats'))
@@ -0,0 +1,132 @@
+import numpy as np
+import pytest
+from load_save_data import (get_csv_data,
+                            save_csv_data,
+                            set_storage_backend,
+                            get_storage_backend,
+                            CsvBackend,
+                            FileError,
+                            SaveConflict,
+                            IncorrectArrayType)
+from sqlite_backend import SqliteBackend
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SqliteBackend(str(tmp_path / 'movies.sqlite'))
+    yield backend
+    backend.close()
+
+
+def test_add_screening(backend):
+    seats_array = np.zeros([3, 4])
+    seats_array[1, 2] = 1
+    backend.add_screening('film', seats_array)
+    backend.add_screening('another', np.ones([2, 2]))
+
+    assert backend.titles() == ['another', 'film']
+    assert backend.seats_taken('film') == 1
+    assert np.array_equal(backend.load('film'), seats_array)
+    assert backend.get_occupancy(1) == [('another', 4, 4), ('film', 1, 12)]
+
+    with pytest.raises(IncorrectArrayType):
+        backend.add_screening('film', [[0, 1]])
+
+    with pytest.raises(FileError):
+        backend.load('missing')
+
+    with pytest.raises(FileError):
+        backend.seats_taken('missing')
+
+
+def test_book_seats(backend):
+    backend.add_screening('film', np.zeros([3, 4]))
+    backend.book_seats('film', [(0, 0), (2, 3)])
+    assert backend.seats_taken('film') == 2
+
+    # All or nothing
+    with pytest.raises(SaveConflict) as e:
+        backend.book_seats('film', [(1, 1), (0, 0)])
+    assert e.value.seats == [(0, 0)]
+    assert backend.seats_taken('film') == 2
+    assert backend.load('film')[1, 1] == 0
+
+    with pytest.raises(SaveConflict):
+        backend.book_seats('film', [(5, 5)])
+
+
+def test_save(backend):
+    backend.save('film', np.zeros([2, 3]))
+    original = backend.load('film')
+
+    # Someone else books a seat meanwhile
+    backend.book_seats('film', [(0, 0)])
+
+    seats_array = original.copy()
+    seats_array[1, 1] = 1
+    backend.save('film', seats_array, original_array=original)
+    assert backend.load('film').sum() == 2
+    assert backend.seats_taken('film') == 2
+
+    seats_array = original.copy()
+    seats_array[0, 0] = 1
+    with pytest.raises(SaveConflict):
+        backend.save('film', seats_array, original_array=original)
+
+    # Without the original array the saved array replaces the seats
+    backend.save('film', np.zeros([2, 3]))
+    assert backend.seats_taken('film') == 0
+
+    with pytest.raises(FileError):
+        backend.save('film', np.zeros([3, 3]))
+
+
+def test_save_new_screening(backend, tmp_path):
+    # Two terminals save a screening which was not in the database when they loaded it
+    other = SqliteBackend(backend.db_path)
+    original = np.zeros([2, 3], np.int8)
+    first, second = original.copy(), original.copy()
+    first[0, 0] = 1
+    second[1, 2] = 1
+
+    backend.save('film', first, original_array=original)
+    other.save('film', second, original_array=original)
+    assert backend.load('film').tolist() == [[1, 0, 0], [0, 0, 1]]
+    assert backend.seats_taken('film') == 2
+
+    second[0, 0] = 1
+    with pytest.raises(SaveConflict):
+        other.save('film', second, original_array=original)
+    other.close()
+
+    with pytest.raises(IncorrectArrayType):
+        backend.save('new film', np.zeros(3))
+    assert 'new film' not in backend.titles()
+
+
+def test_storage_backend_facade(backend, tmp_path):
+    set_storage_backend(backend)
+    try:
+        assert get_storage_backend() is backend
+        save_csv_data('film', np.zeros([2, 3]), None)
+        seats_array = get_csv_data('film', None)
+        seats_array[0, 2] = 1
+        save_csv_data('film', seats_array, None, None, get_csv_data('film', None))
+
+        assert backend.seats_taken('film') == 1
+        assert not list(tmp_path.glob('*.csv'))
+    finally:
+        set_storage_backend()
+    assert isinstance(get_storage_backend(), CsvBackend)
+
+
+def test_import_csv_dir(backend):
+    imported = backend.import_csv_dir('./movies')
+
+    assert 'Enchanted' in imported
+    assert 'pusty_plik' not in imported
+    assert backend.seats_taken('Enchanted') == 2
+    assert np.array_equal(backend.load('Enchanted'), get_csv_data('Enchanted', './movies/Enchanted.csv'))
+
+    with pytest.raises(FileError):
+        backend.import_csv_dir('./missing')
@@ -0,0 +1,79 @@
+import sys
+import pytest
+import subprocess
+import numpy as np
+from load_save_data import IncorrectArrayType, IncorrectArrayData, IncorrectShape, FileError
+from terminal_view import (render_seats_text,
+                           show_seats_terminal,
+                           ANSI_FREE,
+                           ANSI_TAKEN,
+                           ANSI_HELD
+                           )
+
+
+def test_render_seats_text():
+    row_indices = {
+        'A': 0,
+        'B': 1,
+        'C': 2
+    }
+    seats_array = np.array([[0, 0, 0, 1],
+                            [1, 1, 0, 0],
+                            [0, 0, 0, 0]])
+
+    lines = render_seats_text(seats_array, row_indices, 'movie', color=False).splitlines()
+    assert lines[:2] == ['movie', 'Seats taken: 3']
+    assert 'SCREEN' in lines[3]
+    assert lines[4].split() == ['1', '2', '3', '4']
+    assert lines[5].split() == ['A', '.', '.', '.', 'X']
+    assert lines[6].split() == ['B', 'X', 'X', '.', '.']
+    assert lines[7].split() == ['C', '.', '.', '.', '.']
+
+    text = render_seats_text(seats_array, row_indices, 'movie', color=True)
+    assert text.count(ANSI_FREE) == 9
+    assert text.count(ANSI_TAKEN) == 3
+
+    # Held places are counted as taken
+    seats_array[2, 1] = 2
+    lines = render_seats_text(seats_array, row_indices, 'movie', color=False).splitlines()
+    assert lines[1] == 'Seats taken: 4'
+    assert lines[7].split() == ['C', '.', 'H', '.', '.']
+    assert render_seats_text(seats_array, row_indices, 'movie', color=True).count(ANSI_HELD) == 1
+
+
+def test_render_seats_text_incorrect():
+    row_indices = {
+        'A': 0,
+        'B': 1
+    }
+
+    with pytest.raises(IncorrectArrayType):
+        render_seats_text([[0, 1]], row_indices, 'movie')
+    with pytest.raises(IncorrectArrayData):
+        render_seats_text(np.array([]), row_indices, 'movie')
+    with pytest.raises(IncorrectShape):
+        render_seats_text(np.zeros([3, 4]), row_indices, 'movie')
+
+
+def test_show_seats_terminal(monkeypatch):
+    row_indices = {
+        'A': 0,
+        'B': 1
+    }
+    seats_array = np.zeros([2, 4])
+
+    monkeypatch.setattr('builtins.input', lambda *args: 'q')
+    assert show_seats_terminal(seats_array, row_indices, 'movie') is None
+    assert show_seats_terminal(seats_array, row_indices, None) is None
+
+    with pytest.raises(FileError):
+        show_seats_terminal(np.zeros([3, 4]), row_indices, 'movie')
+    with pytest.raises(IncorrectArrayData):
+        show_seats_terminal(np.array([]), row_indices, 'movie')
+
+
+def test_terminal_view_without_cv2():
+    # OpenCV is imported only when the GUI renderer draws something
+    code = 'import sys, terminal_view, run; print("cv2" in sys.modules)'
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == 'False'
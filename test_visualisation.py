@@ -2,10 +2,12 @@ import cv2
 import pytest
 import curses
 import numpy as np
-from load_save_data import IncorrectArrayType, IncorrectArrayData, IncorrectShape
+from load_save_data import IncorrectArrayType, IncorrectArrayData, IncorrectShape, FileError
 from visualisation import (display_chosen_seats,
                            validate_num_places,
                            book_seats,
+                           find_best_seats,
+                           book_best_seats,
                            validate_row,
                            validate_place,
                            display_text_info,
@@ -16,6 +18,28 @@ from visualisation import (display_chosen_seats,
                            create_row,
                            display_image,
                            show_seats,
+                           create_rows,
+                           render_seats,
+                           get_layer_cache_info,
+                           clear_layer_cache,
+                           refresh_seats,
+                           clear_frame_cache,
+                           acquire_frame,
+                           release_frame,
+                           get_frame_pool_info,
+                           clear_frame_pool,
+                           encode_seats,
+                           get_encoded_cache_info,
+                           clear_encoded_cache,
+                           IncorrectImageFormat,
+                           render_halls,
+                           get_screen_size,
+                           HallLayout,
+                           render_layout,
+                           get_layout,
+                           navigate_layout,
+                           put_texts,
+                           clear_sprite_cache,
                            IncorrectlyChosenSeats,
                            IncorrectFont,
                            IncorrectCoordinates
@@ -134,6 +158,46 @@ def test_validate_place_str():
     assert validate_place(3, seats_array) is True
 
 
+def test_find_best_seats():
+    seats_array = np.array([[0, 0, 0, 0, 0, 0, 0],
+                            [1, 0, 0, 1, 0, 0, 0],
+                            [0, 0, 1, 1, 1, 0, 0],
+                            [0, 0, 0, 0, 0, 0, 0],
+                            [0, 0, 0, 0, 0, 0, 1]])
+
+    # The best block is in the middle of the hall, the rows in the same distance from it are scored equally
+    assert find_best_seats(seats_array, 1) == (3, 3)
+    assert find_best_seats(seats_array, 2) == (3, 2)
+    assert find_best_seats(seats_array, 3) == (3, 2)
+    assert find_best_seats(seats_array, 7) == (3, 0)
+    # The row closer to the screen is chosen if scores are equal
+    assert find_best_seats(np.zeros([4, 5]), 3) == (1, 1)
+    assert find_best_seats(seats_array, 8) is None
+    assert find_best_seats(seats_array, 0) is None
+    assert find_best_seats(np.ones([3, 4]), 1) is None
+
+    with pytest.raises(IncorrectArrayType):
+        find_best_seats([[0, 0]], 1)
+
+
+def test_book_best_seats(monkeypatch):
+    monkeypatch.setattr('visualisation.sleep', lambda *args: None)
+    monkeypatch.setattr('visualisation.system', lambda *args: None)
+    row_indices = {'A': 0, 'B': 1, 'C': 2}
+    seats_array = np.array([[0, 0, 0, 0, 0],
+                            [0, 1, 0, 0, 0],
+                            [0, 0, 0, 0, 0]])
+
+    booked = book_best_seats(seats_array, row_indices, 3)
+    assert booked is seats_array
+    assert booked.tolist() == [[0, 0, 0, 0, 0],
+                               [0, 1, 1, 1, 1],
+                               [0, 0, 0, 0, 0]]
+
+    with pytest.raises(IncorrectShape):
+        book_best_seats(np.zeros([3, 5]), {'A': 0}, 5)
+
+
 def test_display_text_info():
     seats_array = np.array([[0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
                             [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]])
@@ -284,3 +348,357 @@ def test_show_seats():
 
     with pytest.raises(IncorrectArrayData):
         show_seats(scr, empty_seats_array, row_indices, 'movie', 20, 20)
+
+
+def _render_seats_by_row(scr, seats_array, row_indices, movie, screen_height, screen_width):
+    # The cinema hall image drawn square by square, the way show_seats() drew it before render_seats()
+    margin_x = screen_height // 5
+    font = cv2.FONT_HERSHEY_DUPLEX
+    new_screen = scr.copy()
+    for j, row in enumerate(seats_array):
+        new_screen = display_row_indices(new_screen, font, row_indices, j, margin_x, 110)
+        new_screen = display_key_info(new_screen, font, margin_x, screen_height)
+        create_row(row, j, new_screen, font, margin_x, 110, 6)
+    display_screen(new_screen, font, margin_x, screen_width)
+    return display_text_info(new_screen, movie, font, seats_array, margin_x)
+
+
+def test_render_seats():
+    rng = np.random.default_rng(0)
+    row_indices = {chr(ord('A') + i): i for i in range(20)}
+
+    for rows, seats, screen_height, screen_width in [(1, 1, 300, 400), (3, 14, 200, 300), (10, 20, 720, 1280),
+                                                      (20, 30, 740, 1000), (12, 40, 500, 600)]:
+        for occupancy in (0, 0.3, 1):
+            seats_array = (rng.random([rows, seats]) < occupancy).astype(np.int8)
+            scr = np.zeros([screen_height, screen_width, 3], np.uint8)
+            expected = _render_seats_by_row(scr, seats_array, row_indices, 'movie', screen_height, screen_width)
+            assert np.array_equal(render_seats(scr, seats_array, row_indices, 'movie', screen_height, screen_width),
+                                  expected)
+
+    scr = np.zeros([20, 20, 3], np.uint8)
+    assert render_seats(scr, np.zeros([2, 2]), row_indices, None, 200, 300) is None
+    with pytest.raises(IncorrectArrayData):
+        render_seats(scr, np.array([]), row_indices, 'movie', 20, 20)
+
+
+def test_create_rows():
+    scr = np.zeros([200, 200, 3], np.uint8)
+    seats_array = np.array([[0, 1, 0],
+                            [1, 0, 0]])
+
+    create_rows(seats_array, scr, 10, 20, 6)
+    assert tuple(scr[20 + 6, 10 + 6]) == (0, 255, 0)
+    assert tuple(scr[20 + 35, 10 + 25]) == (0, 255, 0)
+    assert tuple(scr[20 + 6, 10 + 25 + 6]) == (0, 0, 255)
+    assert tuple(scr[20 + 35 + 6, 10 + 6]) == (0, 0, 255)
+    assert tuple(scr[20 + 5, 10 + 6]) == (0, 0, 0)
+
+    # Held places are yellow
+    create_rows(np.array([[2, 0]]), scr, 10, 20, 6)
+    assert tuple(scr[20 + 6, 10 + 6]) == (0, 255, 255)
+    assert tuple(scr[20 + 6, 10 + 25 + 6]) == (0, 255, 0)
+
+    with pytest.raises(IncorrectCoordinates):
+        create_rows(seats_array, scr, -10, 20)
+    with pytest.raises(IncorrectArrayType):
+        create_rows([[0, 1]], scr, 10, 20)
+
+
+def test_render_seats_layer_cache():
+    clear_layer_cache()
+    row_indices = {chr(ord('A') + i): i for i in range(20)}
+    seats_array = np.zeros([10, 20], np.int8)
+    scr = np.zeros([500, 640, 3], np.uint8)
+
+    first = render_seats(scr, seats_array, row_indices, 'movie', 500, 640)
+    seats_array[2, 3] = 1
+    second = render_seats(scr, seats_array, row_indices, 'movie', 500, 640)
+    assert get_layer_cache_info() == {'hits': 1, 'misses': 1, 'size': 1, 'max_size': 8}
+    assert np.array_equal(second, _render_seats_by_row(scr, seats_array, row_indices, 'movie', 500, 640))
+    assert not np.array_equal(first, second)
+
+    # The last row is under the key info, so its seats are a part of the layer
+    seats_array[-1, 0] = 1
+    third = render_seats(scr, seats_array, row_indices, 'movie', 500, 640)
+    assert get_layer_cache_info()['misses'] == 2
+    assert np.array_equal(third, _render_seats_by_row(scr, seats_array, row_indices, 'movie', 500, 640))
+
+    # A different background is not taken from the cache
+    scr[:] = 40
+    fourth = render_seats(scr, seats_array, row_indices, 'movie', 500, 640)
+    assert get_layer_cache_info()['misses'] == 3
+    assert np.array_equal(fourth, _render_seats_by_row(scr, seats_array, row_indices, 'movie', 500, 640))
+    clear_layer_cache()
+    assert get_layer_cache_info() == {'hits': 0, 'misses': 0, 'size': 0, 'max_size': 8}
+
+
+def test_refresh_seats():
+    clear_frame_cache()
+    row_indices = {chr(ord('A') + i): i for i in range(20)}
+    seats_array = np.zeros([10, 20], np.int8)
+    scr = np.zeros([500, 640, 3], np.uint8)
+
+    frame = refresh_seats(scr, seats_array, row_indices, 'movie', 500, 640)
+    assert np.array_equal(frame, render_seats(scr, seats_array, row_indices, 'movie', 500, 640))
+
+    for places in ([(0, 0)], [(2, 3), (2, 4), (5, 19)], [(9, 0)], [(0, 0), (9, 0)]):
+        for row, place in places:
+            seats_array[row, place] = 1 - seats_array[row, place]
+        assert np.array_equal(refresh_seats(scr, seats_array, row_indices, 'movie', 500, 640),
+                              _render_seats_by_row(scr, seats_array, row_indices, 'movie', 500, 640))
+
+    # Held places, also under the key info
+    for value in (2, 1, 0):
+        seats_array[[1, 9], [5, 7]] = value
+        assert np.array_equal(refresh_seats(scr, seats_array, row_indices, 'movie', 500, 640),
+                              _render_seats_by_row(scr, seats_array, row_indices, 'movie', 500, 640))
+
+    # A frame is kept for each movie
+    other = refresh_seats(scr, np.ones([3, 5], np.int8), row_indices, 'other movie', 500, 640)
+    assert np.array_equal(other, render_seats(scr, np.ones([3, 5], np.int8), row_indices, 'other movie', 500, 640))
+    assert np.array_equal(refresh_seats(scr, seats_array, row_indices, 'movie', 500, 640),
+                          render_seats(scr, seats_array, row_indices, 'movie', 500, 640))
+
+    assert refresh_seats(scr, seats_array, row_indices, None, 500, 640) is None
+    with pytest.raises(IncorrectArrayData):
+        refresh_seats(scr, np.array([]), row_indices, 'movie', 500, 640)
+    clear_frame_cache()
+
+
+def test_frame_pool():
+    clear_frame_cache()
+    clear_frame_pool()
+    frame = acquire_frame((20, 30, 3))
+    assert frame.shape == (20, 30, 3) and frame.dtype == np.uint8 and not frame.any()
+    frame[:] = 7
+    release_frame(frame)
+    release_frame(frame)
+    release_frame(frame[:10])
+    assert get_frame_pool_info() == {'hits': 0, 'misses': 1, 'size': 1, 'max_size': 4}
+
+    # The released frame is reused and cleared, a frame of other shape is allocated
+    assert acquire_frame((20, 30, 3)) is frame and not frame.any()
+    release_frame(frame)
+    assert acquire_frame((20, 30, 3), fill=None) is frame
+    assert acquire_frame((30, 20, 3)) is not frame
+    assert get_frame_pool_info()['hits'] == 2
+
+    # Rendering on a frame from the pool, the frames of refresh_seats() are reused after clear_frame_cache()
+    row_indices = {chr(ord('A') + i): i for i in range(10)}
+    seats_array = np.zeros([10, 20], np.int8)
+    seats_array[2, 3] = 1
+    scr = np.zeros([500, 640, 3], np.uint8)
+    expected = _render_seats_by_row(scr, seats_array, row_indices, 'movie', 500, 640)
+    out = acquire_frame(scr.shape, fill=None)
+    assert render_seats(scr, seats_array, row_indices, 'movie', 500, 640, out) is out
+    assert np.array_equal(out, expected)
+    assert not scr.any()
+
+    frame = refresh_seats(scr, seats_array, row_indices, 'movie', 500, 640)
+    assert refresh_seats(scr, seats_array, row_indices, 'movie', 500, 640) is frame
+    clear_frame_cache()
+    assert get_frame_pool_info()['size'] == 2
+    assert np.array_equal(refresh_seats(scr, seats_array, row_indices, 'movie', 500, 640), expected)
+    assert get_frame_pool_info()['size'] == 0
+    clear_frame_cache()
+    clear_frame_pool()
+
+
+def test_show_seats_headless():
+    clear_encoded_cache()
+    row_indices = {'A': 0, 'B': 1, 'C': 2}
+    seats_array = np.array([[0, 0, 0, 0, 1],
+                            [0, 1, 1, 0, 0],
+                            [0, 0, 0, 0, 0]])
+    scr = np.zeros([300, 400, 3], np.uint8)
+
+    image = show_seats(scr, seats_array, row_indices, 'movie', 300, 400, headless=True)
+    assert np.array_equal(image, render_seats(scr, seats_array, row_indices, 'movie', 300, 400))
+
+    png = show_seats(scr, seats_array, row_indices, 'movie', 300, 400, headless=True, image_format='png')
+    assert png.startswith(b'\x89PNG')
+    assert np.array_equal(cv2.imdecode(np.frombuffer(png, np.uint8), cv2.IMREAD_COLOR), image)
+    jpg = encode_seats(scr, seats_array, row_indices, 'movie', 300, 400, 'jpg')
+    assert jpg.startswith(b'\xff\xd8')
+    assert show_seats(scr, seats_array, row_indices, None, 300, 400, headless=True, image_format='png') is None
+
+    with pytest.raises(IncorrectImageFormat):
+        encode_seats(scr, seats_array, row_indices, 'movie', 300, 400, 'gif')
+
+
+def test_encode_seats_cache():
+    clear_encoded_cache()
+    row_indices = {'A': 0, 'B': 1}
+    seats_array = np.zeros([2, 6], np.int8)
+    scr = np.zeros([300, 400, 3], np.uint8)
+
+    first = encode_seats(scr, seats_array, row_indices, 'movie', 300, 400)
+    assert encode_seats(scr, seats_array.copy(), row_indices, 'movie', 300, 400) is first
+    assert get_encoded_cache_info() == {'hits': 1, 'misses': 1, 'size': 1, 'max_size': 32}
+
+    seats_array[1, 2] = 1
+    second = encode_seats(scr, seats_array, row_indices, 'movie', 300, 400)
+    assert second != first
+    assert get_encoded_cache_info()['misses'] == 2
+    clear_encoded_cache()
+    assert get_encoded_cache_info()['size'] == 0
+
+
+def test_render_halls(tmp_path):
+    movies_dir = tmp_path / 'movies'
+    movies_dir.mkdir()
+    seats_array = np.zeros([4, 12], np.int8)
+    seats_array[1, 2:5] = 1
+    for movie in ('first', 'second', 'third'):
+        np.savetxt(movies_dir / f'{movie}.csv', seats_array, fmt='%d', delimiter=',',
+                   header=f'Title: {movie}\n+++++++++++++++++++++++++++\nSeats taken: 3\n')
+    (movies_dir / 'broken.csv').write_text('no seats here')
+    (movies_dir / 'notes.txt').write_text('not a movie')
+
+    report = render_halls(str(movies_dir), str(tmp_path / 'halls'), workers=2)
+    assert report['halls'] == 3
+    assert set(report['failed']) == {'broken'}
+    assert sorted(path.name for path in (tmp_path / 'halls').iterdir()) == ['first.png', 'second.png', 'third.png']
+
+    image = cv2.imread(str(tmp_path / 'halls' / 'second.png'))
+    screen_height, screen_width = get_screen_size(seats_array)
+    row_indices = {'A': 0, 'B': 1, 'C': 2, 'D': 3}
+    scr = np.zeros([screen_height, screen_width, 3], np.uint8)
+    assert np.array_equal(image, render_seats(scr, seats_array, row_indices, 'second', screen_height, screen_width))
+
+    with pytest.raises(FileError):
+        render_halls(str(tmp_path / 'missing'), str(tmp_path / 'halls'))
+    with pytest.raises(IncorrectImageFormat):
+        render_halls(str(movies_dir), str(tmp_path / 'halls'), image_format='gif')
+
+
+def test_hall_layout():
+    layout = HallLayout.legacy(3, 14)
+    assert (layout.screen_height, layout.screen_width) == get_screen_size(np.zeros([3, 14]))
+    assert (layout.square_height, layout.square_width, layout.space, layout.margin_x) == (35, 25, 6, 222 // 5)
+    assert layout.is_complete
+
+    layout = HallLayout.fit(50, 120, 900, 1600)
+    assert (layout.screen_height, layout.screen_width) == (900, 1600)
+    assert layout.is_complete
+    assert layout.margin_y + layout.square_height * 50 <= 900 - 50
+    assert layout.margin_x + layout.square_width * 120 <= 1600
+
+    # The zoomed hall is displayed in tiles covering every place once
+    layout = HallLayout.fit(50, 120, 900, 1600, zoom=3)
+    assert not layout.is_complete
+    covered = np.zeros([50, 120], int)
+    for tile in layout.tiles():
+        covered[tile.region] += 1
+    assert (covered == 1).all()
+
+    # A huge hall never gets places smaller than MIN_SQUARE_SIZE
+    layout = HallLayout.fit(400, 1000, 600, 800)
+    assert min(layout.square_height, layout.square_width) == 6
+    assert layout.visible_rows < 400 and layout.visible_seats < 1000
+
+    with pytest.raises(IncorrectShape):
+        HallLayout(0, 10, 100, 100)
+    with pytest.raises(IncorrectCoordinates):
+        HallLayout.fit(10, 10, 100, 50)
+
+
+def test_render_layout():
+    row_indices = {f'{i}': i for i in range(50)}
+    seats_array = np.zeros([50, 120], np.int8)
+    seats_array[0, 0] = 1
+    layout = HallLayout.fit(50, 120, 900, 1600, zoom=2)
+    scr = np.zeros([900, 1600, 3], np.uint8)
+
+    image = render_layout(scr, seats_array, row_indices, 'arena', layout)
+    assert image.shape == (900, 1600, 3)
+    y = layout.margin_y + layout.space + 1
+    x = layout.margin_x + layout.space + 1
+    assert tuple(image[y, x]) == (0, 0, 255)
+    image = render_layout(scr, seats_array, row_indices, 'arena', layout.view(0, 1))
+    assert tuple(image[y, x]) == (0, 255, 0)
+
+    # The legacy layout is still rendered by render_seats()
+    assert get_layout(np.zeros([3, 14]), 1000, 1800) is None
+    assert get_layout(seats_array, 1000, 1800).screen_height == 1000
+
+    assert render_layout(scr, seats_array, row_indices, None, layout) is None
+    with pytest.raises(FileError):
+        render_layout(scr, np.zeros([5, 5]), row_indices, 'arena', layout)
+    with pytest.raises(FileError):
+        render_layout(scr, seats_array, {'A': 0}, 'arena', layout)
+
+
+def test_navigate_layout():
+    layout = HallLayout.fit(50, 120, 900, 1600)
+    assert len(layout.tiles()) == 1
+    assert navigate_layout(layout, 0, 1.0, ord('n')) is None
+    assert navigate_layout(layout, 0, 1.0, ord('-')) is None
+    assert navigate_layout(layout, 0, 1.0, ord('x')) is None
+
+    # Zooming in splits the hall into tiles, N and P move between them and wrap around
+    zoomed, tile, zoom = navigate_layout(layout, 0, 1.0, ord('+'))
+    tiles = zoomed.tiles()
+    assert (tile, zoom) == (0, 2) and len(tiles) > 1
+    assert navigate_layout(zoomed, tile, zoom, ord('N'))[1] == 1
+    assert navigate_layout(zoomed, 0, zoom, ord('p'))[1] == len(tiles) - 1
+
+    # The tile of the new zoom contains the first place of the displayed tile
+    last = tiles[-1]
+    zoomed_in, tile, zoom = navigate_layout(zoomed, len(tiles) - 1, zoom, ord('+'))
+    region = zoomed_in.tiles()[tile].region
+    assert zoom == 4
+    assert region[0].start <= last.first_row < region[0].stop and region[1].start <= last.first_seat < region[1].stop
+    assert navigate_layout(zoomed_in, tile, zoom, ord('-'))[2] == 2
+    assert navigate_layout(zoomed_in, tile, 8, ord('+')) is None
+
+
+def test_display_image_tiles(monkeypatch):
+    # The pressed keys move the image to the next tile and zoom out, ESC closes the window
+    keys = [ord('+'), ord('n'), ord('-'), 27]
+    shown = []
+    monkeypatch.setattr('visualisation.cv2.imshow', lambda title, image: shown.append(image.copy()))
+    monkeypatch.setattr('visualisation.cv2.waitKey', lambda delay: keys.pop(0))
+    monkeypatch.setattr('visualisation.cv2.destroyAllWindows', lambda: None)
+    row_indices = {f'{i}': i for i in range(50)}
+    seats_array = np.zeros([50, 120], np.int8)
+    seats_array[0, 0] = 1
+    layout = HallLayout.fit(50, 120, 900, 1600)
+    scr = np.zeros([900, 1600, 3], np.uint8)
+    screen = render_layout(scr, seats_array, row_indices, 'arena', layout)
+
+    assert display_image('arena', screen, seats_array, row_indices, scr, layout) is None
+    assert len(shown) == 4
+    zoomed = navigate_layout(layout, 0, 1.0, ord('+'))[0]
+    assert np.array_equal(shown[1], render_layout(scr, seats_array, row_indices, 'arena', zoomed.tiles()[0]))
+    assert np.array_equal(shown[2], render_layout(scr, seats_array, row_indices, 'arena', zoomed.tiles()[1]))
+    assert np.array_equal(shown[3], shown[0])
+
+
+def test_put_texts():
+    clear_sprite_cache()
+    font = cv2.FONT_HERSHEY_DUPLEX
+    texts = [f'{i + 1}' for i in range(30)]
+    origins = [(40 + 25 * i, 100) for i in range(30)]
+
+    for background in (0, 70):
+        for x, y in ((0, 0), (13, 7), (-30, 0), (0, -95)):
+            expected = np.full([200, 800, 3], background, np.uint8)
+            for text, (text_x, text_y) in zip(texts, origins):
+                cv2.putText(expected, text, (text_x + x, text_y + y), font, 0.5, (255, 255, 255), 1)
+            screen = np.full([200, 800, 3], background, np.uint8)
+            put_texts(screen, texts, [(text_x + x, text_y + y) for text_x, text_y in origins],
+                      font, 0.5, (255, 255, 255))
+            assert np.array_equal(screen, expected)
+
+    # Texts drawn over other texts
+    screen = np.zeros([200, 800, 3], np.uint8)
+    expected = np.zeros([200, 800, 3], np.uint8)
+    for image in (screen, expected):
+        cv2.putText(image, 'Row', (40, 95), font, 0.5, (255, 255, 255), 1)
+    put_texts(screen, ['A', 'B'], [(38, 100), (60, 100)], font, 0.5, (0, 255, 255))
+    cv2.putText(expected, 'A', (38, 100), font, 0.5, (0, 255, 255), 1)
+    cv2.putText(expected, 'B', (60, 100), font, 0.5, (0, 255, 255), 1)
+    assert np.array_equal(screen, expected)
+    clear_sprite_cache()
@@ -4,15 +4,97 @@ Visualisation Module
 
 This module allows:
     -visualisation of a cinema hall for a specific movie
-    -booking seats for a specific movie
+    -booking seats for a specific movie, chosen by hand or the best free seats found automatically
+    -showing the seats held by other bookings which are not confirmed yet
+    -caching the rendered static layers, frames, text sprites and encoded images of the halls
+    -reusing the image buffers from a pool of frames
+    -encoding the rendered halls into png or jpg images
+    -rendering the halls from a directory into image files with a pool of processes
+    -scaling down halls bigger than the window and zooming into their tiles (HallLayout)
 '''
 
 
-import cv2
 from os import system
 from time import sleep
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-from load_save_data import IncorrectArrayData, IncorrectShape, FileError, IncorrectArrayType
+import importlib
+import hashlib
+import time
+import os
+from load_save_data import IncorrectArrayData, IncorrectShape, FileError, IncorrectArrayType, get_seats_data, DATA_FORMATS
+from booking import SeatMap, HELD
+
+
+class _LazyModule:
+    # A module imported on the first use of its attribute, so the terminal renderer does not load OpenCV
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute):
+        if attribute in ('_name', '_module'):
+            raise AttributeError(attribute)
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+    def is_loaded(self):
+        return self._module is not None
+
+
+cv2 = _LazyModule('cv2')
+
+# Size of a square representing one place
+SQUARE_HEIGHT = 35
+SQUARE_WIDTH = 25
+# Colors of free, taken and held places as BGR tuples
+FREE_COLOR = (0, 255, 0)
+TAKEN_COLOR = (0, 0, 255)
+HELD_COLOR = (0, 255, 255)
+# Height of the key info at the bottom of the screen
+KEY_INFO_HEIGHT = 50
+# Maximum number of static layers (everything but the seats above the key info and text info) kept by render_seats()
+LAYER_CACHE_SIZE = 8
+
+# Height of the text info (title and taken seats) at the top of the screen, seats are drawn below it
+TEXT_INFO_HEIGHT = 80
+# Maximum number of screenings whose last frame is kept by refresh_seats()
+FRAME_CACHE_SIZE = 8
+# Image formats supported by encode_seats() in format {format: file extension used by cv2.imencode()}
+IMAGE_FORMATS = {'png': '.png', 'jpg': '.jpg', 'jpeg': '.jpg'}
+# Maximum number of encoded images kept by encode_seats()
+ENCODED_CACHE_SIZE = 32
+# Smallest square drawn by a fitted HallLayout, larger halls are shown in tiles
+MIN_SQUARE_SIZE = 6
+# Width of the row indices on the left of a fitted HallLayout
+LABEL_MARGIN = 40
+# Smallest distance between two row indices or seat numbers of a fitted HallLayout
+LABEL_SPACING = 14
+# Zoom of a fitted HallLayout changed by one press of + or - in display_image() and the biggest zoom
+ZOOM_STEP = 2
+MAX_ZOOM = 8
+# Maximum number of text sprites (pre-rendered texts) kept by put_texts()
+SPRITE_CACHE_SIZE = 256
+# Maximum number of free frame buffers of one shape kept by release_frame()
+FRAME_POOL_SIZE = 4
+# The best row for find_best_seats() as a part of the hall depth, 0 - the row at the screen, 1 - the last row
+BEST_ROW = 0.5
+
+# Static layers in format {key: (background, layer)}, the least recently used one is removed first
+_layer_cache = OrderedDict()
+_layer_cache_stats = {'hits': 0, 'misses': 0}
+# Last frames in format {movie: (key, background, seats_array, frame without text info, frame)}
+_frame_cache = OrderedDict()
+# Text sprites in format {key: (offset_y, offset_x, sprite)}
+_sprite_cache = OrderedDict()
+# Encoded images in format {key: (background, image bytes)}
+_encoded_cache = OrderedDict()
+_encoded_cache_stats = {'hits': 0, 'misses': 0}
+# Free frame buffers in format {(shape, dtype): [frame]}
+_frame_pool = {}
+_frame_pool_stats = {'hits': 0, 'misses': 0}
 
 
 class IncorrectlyChosenSeats(Exception):
@@ -27,6 +109,12 @@ class IncorrectFont(Exception):
         self.message = message
 
 
+class IncorrectImageFormat(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
 class IncorrectCoordinates(Exception):
     def __init__(self, message):
         super().__init__(message)
@@ -65,7 +153,7 @@ def display_chosen_seats(chosen_seats=None):
         raise IncorrectlyChosenSeats('Incorrect chosen seats array')
 
 
-def validate_num_places(seats_array: np.ndarray, num_places):
+def validate_num_places(seats_array: np.ndarray, num_places, seat_map=None):
     '''Validates the number of places to book
 
     Parameters
@@ -74,6 +162,9 @@ def validate_num_places(seats_array: np.ndarray, num_places):
         a 2 dimensional numpy array representing a cinema hall in format [[row], [row]]
         where row is a 1 dimensional array containing zeros (free place) or ones (taken seat) ex. [1, 0, 0, 0, 1]
     :param num_places: str or int
+    :param seat_map: SeatMap, optional
+        SeatMap of the seats_array, its number of free places is used instead of the sum of the array
+        (default is None)
 
     Returns
     -------
@@ -99,7 +190,10 @@ def validate_num_places(seats_array: np.ndarray, num_places):
             raise IncorrectArrayType('Incorrect array type, numpy array required')
 
         # Calculating free places in the seats array - the maximum places that you can book
-        free_seats = (seats_array.shape[0] * seats_array.shape[1]) - seats_array.sum()
+        if seat_map is not None:
+            free_seats = seat_map.free_seats
+        else:
+            free_seats = (seats_array.shape[0] * seats_array.shape[1]) - np.minimum(seats_array, 1).sum()
 
         # If num_places is not and integer or it is smaller than 0 raise ValueError
         if not isinstance(num_places, int) or num_places < 0:
@@ -118,13 +212,20 @@ def validate_num_places(seats_array: np.ndarray, num_places):
         raise IncorrectArrayData('Incorrect data type in array, integer required')
 
 
+def destroy_windows():
+    '''Destroys all image windows, if OpenCV has been used (the terminal renderer does not open any)'''
+
+    if cv2.is_loaded():
+        cv2.destroyAllWindows()
+
+
 def say_goodbye():
     '''Says goodbye and destroys the image windows'''
 
     print('See you next time!!')
     sleep(2)
     # If the reservation is correct destroy the window
-    cv2.destroyAllWindows()
+    destroy_windows()
     # Clear the screen
     # LINUX
     system('clear')
@@ -146,7 +247,7 @@ def finalize_booking(places_array):
     '''
 
     # If the reservation is correct destroy the window
-    cv2.destroyAllWindows()
+    destroy_windows()
     # Clear the screen
     # LINUX
     system('clear')
@@ -234,7 +335,7 @@ def validate_place(place: int, seats_array: np.ndarray):
         return False
 
 
-def book_seats(seats_array, row_indices, num_places):
+def book_seats(seats_array, row_indices, num_places, seat_map=None):
     '''Creates and returns an array with the chosen seats for the movie
 
     Parameters
@@ -246,6 +347,8 @@ def book_seats(seats_array, row_indices, num_places):
         dictionary representing row indices in format {row_label: index} ex. {'A':0, 'B':1}
     :param num_places: int
         number of places to book
+    :param seat_map: SeatMap, optional
+        SeatMap of the seats_array, the places are booked through it so its counters stay correct (default is None)
 
     Returns
     -------
@@ -273,13 +376,19 @@ def book_seats(seats_array, row_indices, num_places):
                 if validate_place(place, seats_array):  # place has to be between 1 and seats_array.shape[1]
                     # Checking if the seat is not taken
                     if seats_array[row_indices[row], place - 1] == 0:
-                        seats_array[row_indices[row], place - 1] = 1
+                        if seat_map is not None:
+                            seat_map.book([(row_indices[row], place - 1)])
+                        else:
+                            seats_array[row_indices[row], place - 1] = 1
                         # if the choice is correct add the seat to the chosen seats list, thus increase its length
                         places.append((row, place))
                         i += 1  # Increment i representing the seat number for customer's information
                     elif seats_array[row_indices[row], place - 1] == 1:
                         print('This place is already taken! Please choose another one')
                         continue
+                    elif seats_array[row_indices[row], place - 1] == HELD:
+                        print('This place is held by someone else! Please choose another one')
+                        continue
                     else:
                         raise IncorrectArrayData('Incorrect array, should contain zeros and ones')
                 else:
@@ -301,7 +410,208 @@ def book_seats(seats_array, row_indices, num_places):
         print('Could not book the seats')
 
 
-def display_text_info(scr, movie, font, seats_array: np.ndarray, margin_x):
+def find_best_seats(seats_array, num_places):
+    '''Finds the best block of num_places adjacent free places in one row
+
+    Every block of free places is scored by the distance of its middle from the middle of the row
+    and the distance of its row from the BEST_ROW, both relative to the hall size.
+    The block with the lowest score is returned, the one closer to the screen if scores are equal
+
+    Parameters
+    ----------
+    :param seats_array: numpy array
+        a 2 dimensional numpy array representing a cinema hall in format [[row], [row]]
+        where row is a 1 dimensional array containing zeros (free place) or ones (taken seat) ex. [1, 0, 0, 0, 1]
+    :param num_places: int
+        number of adjacent places to find
+
+    Returns
+    -------
+    :returns: None if there are no num_places adjacent free places in any row or num_places is not positive
+    else
+    :returns: tuple
+        indices of the block in format (row, first place)
+
+    Raises
+    ------
+    :raises IncorrectArrayType:
+        if the seats_array is not a numpy array
+    :raises IncorrectArrayData:
+        if the array contains illegal characters (numeric values required)
+    '''
+
+    if not isinstance(seats_array, np.ndarray):
+        raise IncorrectArrayType('Incorrect array type, numpy array required')
+    try:
+        free = np.atleast_2d(seats_array) == 0
+    except (TypeError, ValueError):
+        raise IncorrectArrayData('Incorrect data type in array, numeric required')
+    rows, seats = free.shape
+    if num_places <= 0 or num_places > seats:
+        return None
+
+    # Number of free places in each window of num_places adjacent places, from the cumulative sums of the rows
+    sums = np.zeros([rows, seats + 1], np.int32)
+    np.cumsum(free, axis=1, out=sums[:, 1:])
+    available = (sums[:, num_places:] - sums[:, :-num_places]) == num_places
+    if not available.any():
+        return None
+
+    # Scoring the windows, rows are scanned from the screen so the first of equal scores is the closest one
+    first_places = np.arange(seats - num_places + 1)
+    horizontal = np.abs(first_places + (num_places - 1) / 2 - (seats - 1) / 2) / seats
+    vertical = np.abs(np.arange(rows) - (rows - 1) * BEST_ROW) / rows
+    scores = np.where(available, vertical[:, None] + horizontal[None, :], np.inf)
+    row, place = np.unravel_index(np.argmin(scores), scores.shape)
+    return int(row), int(place)
+
+
+def book_best_seats(seats_array, row_indices, num_places, seat_map=None):
+    '''Books the best num_places adjacent free places chosen by find_best_seats() and returns the array,
+    if there are no such places the places are chosen manually in book_seats()
+
+    Parameters
+    ----------
+    :param seats_array: numpy array
+        a 2 dimensional numpy array representing a cinema hall in format [[row], [row]]
+        where row is a 1 dimensional array containing zeros (free place) or ones (taken seat) ex. [1, 0, 0, 0, 1]
+    :param row_indices: dict
+        dictionary representing row indices in format {row_label: index} ex. {'A':0, 'B':1}
+    :param num_places: int
+        number of places to book
+    :param seat_map: SeatMap, optional
+        SeatMap of the seats_array, the hall is not searched if it has no room for the places
+        and the places are booked through it (default is None)
+
+    Returns
+    -------
+    :returns: numpy array
+        returns a modified seats_array
+
+    Raises
+    ------
+    :raises IncorrectArrayType:
+        if the seats_array is not a numpy array
+    :raises IncorrectArrayData:
+        if the array contains illegal characters
+    :raises IncorrectShape:
+        if the seats_array shape does not match row indices
+    '''
+
+    if seat_map is not None and not seat_map.has_room(num_places):
+        best_seats = None
+    else:
+        best_seats = find_best_seats(seats_array, num_places)
+    if best_seats is None:
+        print(f'There are no {num_places} adjacent free places, please choose them manually')
+        return book_seats(seats_array, row_indices, num_places, seat_map)
+
+    row, first_place = best_seats
+    labels = {index: label for label, index in row_indices.items()}
+    if row not in labels:
+        raise IncorrectShape('Array shape does not match row indices')
+    if seat_map is not None:
+        seat_map.book([(row, place) for place in range(first_place, first_place + num_places)])
+    else:
+        seats_array[row, first_place:first_place + num_places] = 1
+    places = [(labels[row], place + 1) for place in range(first_place, first_place + num_places)]
+
+    # Finalize the booking
+    try:
+        finalize_booking(places)
+        return seats_array  # returns a modified array
+    except IncorrectlyChosenSeats:
+        print('Could not book the seats')
+
+
+def _text_sprite(texts, origins, font, font_scale, color, thickness):
+    # Returns the texts drawn on a black background, cropped to the drawn pixels,
+    # and the offset of its upper left corner from the first origin
+    key = (texts, origins, font, font_scale, color, thickness)
+    entry = _sprite_cache.get(key)
+    if entry is not None:
+        _sprite_cache.move_to_end(key)
+        return entry
+
+    # Antialiased pixels may get out of the text size, so the canvas has a padding
+    padding = 4 + thickness
+    boxes = []
+    for text, (x, y) in zip(texts, origins):
+        (width, height), baseline = cv2.getTextSize(text, font, font_scale, thickness)
+        boxes.append((x, y - height, x + width, y + baseline))
+    left, top = min(box[0] for box in boxes) - padding, min(box[1] for box in boxes) - padding
+    right, bottom = max(box[2] for box in boxes) + padding, max(box[3] for box in boxes) + padding
+
+    canvas = np.zeros([bottom - top, right - left, 3], np.uint8)
+    for text, (x, y) in zip(texts, origins):
+        cv2.putText(canvas, text, (x - left, y - top), font, font_scale, color, thickness)
+    ys, xs = np.nonzero(canvas.any(axis=2))
+    if len(ys) == 0:
+        entry = (0, 0, canvas[:0, :0])
+    else:
+        entry = (top + ys.min(), left + xs.min(), canvas[ys.min():ys.max() + 1, xs.min():xs.max() + 1].copy())
+
+    _sprite_cache[key] = entry
+    while len(_sprite_cache) > SPRITE_CACHE_SIZE:
+        _sprite_cache.popitem(last=False)
+    return entry
+
+
+def put_texts(screen, texts, origins, font, font_scale, color, thickness=1):
+    '''Draws the texts like cv2.putText() for each of them, copying a cached sprite of all the texts
+
+    The texts are rendered once for each font, scale and relative position,
+    the sprite is copied if the screen under it is black, otherwise the texts are drawn with cv2.putText()
+
+    Parameters
+    ----------
+    :param screen: numpy array
+        3 dimensional numpy array representing a screen, modified in place
+    :param texts: list
+        texts to draw
+    :param origins: list
+        bottom left corners of the texts in format [(x, y), (x, y)]
+    :param font: int
+        a font used for text, an integer or cv2 font
+    :param font_scale: float
+        scale of the font
+    :param color: tuple
+        color of the texts (BGR)
+    :param thickness: int, optional
+        thickness of the text lines (default is 1)
+
+    Returns
+    -------
+    :returns: screen with the texts added
+    '''
+
+    if len(texts) == 0:
+        return screen
+    texts = tuple(texts)
+    origin_x, origin_y = origins[0]
+    relative_origins = tuple((x - origin_x, y - origin_y) for x, y in origins)
+    offset_y, offset_x, sprite = _text_sprite(texts, relative_origins, font, font_scale, tuple(color), thickness)
+
+    top, left = origin_y + offset_y, origin_x + offset_x
+    bottom, right = top + sprite.shape[0], left + sprite.shape[1]
+    if top >= 0 and left >= 0 and bottom <= screen.shape[0] and right <= screen.shape[1]:
+        region = screen[top:bottom, left:right]
+        if not region.any():
+            region[...] = sprite
+            return screen
+
+    for text, origin in zip(texts, origins):
+        cv2.putText(screen, text, origin, font, font_scale, color, thickness)
+    return screen
+
+
+def clear_sprite_cache():
+    '''Removes all text sprites kept by put_texts()'''
+
+    _sprite_cache.clear()
+
+
+def display_text_info(scr, movie, font, seats_array: np.ndarray, margin_x, copy=True):
     '''Adds text representing the movie title and number of taken seats to the screen
 
     Parameters
@@ -317,6 +627,8 @@ def display_text_info(scr, movie, font, seats_array: np.ndarray, margin_x):
         where row is a 1 dimensional array containing zeros (free place) or ones (taken seat) ex. [1, 0, 0, 0, 1]
     :param margin_x: int
         left margin of the cinema hall image
+    :param copy: bool, optional
+        if False the text is drawn on the scr array itself (default is True - on a copy of the screen)
 
     Returns
     -------
@@ -341,11 +653,11 @@ def display_text_info(scr, movie, font, seats_array: np.ndarray, margin_x):
         if not isinstance(seats_array, np.ndarray):
             raise IncorrectArrayType
 
-        taken_seats = int(seats_array.sum())  # getting all the taken seats
+        taken_seats = int(np.minimum(seats_array, 1).sum())  # getting all the taken (or held) seats
     except (TypeError, ValueError):
         raise IncorrectArrayData('Incorrect data type in array, numeric required', movie)
 
-    screen_with_text = scr.copy()  # making a copy of the screen array
+    screen_with_text = scr.copy() if copy else scr  # making a copy of the screen array
 
     try:
         # Display title
@@ -430,8 +742,8 @@ def display_row_indices(screen, font, row_indices, j: int, margin_x, margin_y):
         raise IncorrectCoordinates('Incorrect margin! A positive integer required')
 
     try:
-        new_screen = cv2.putText(screen, f'{tuple(row_indices.keys())[j]}', (margin_x - 10, margin_y - 20 + 37 * (j + 1)),
-                                 font, 0.5, (255, 255, 255), 1)
+        new_screen = put_texts(screen, [f'{tuple(row_indices.keys())[j]}'], [(margin_x - 10, margin_y - 20 + 37 * (j + 1))],
+                               font, 0.5, (255, 255, 255), 1)
         return new_screen
     except IndexError:
         raise IncorrectShape('Incorrect array shape, too many rows')
@@ -523,7 +835,7 @@ def display_screen(scr, font, margin_x, scr_width):
 
 def create_row(row, j: int, screen, font, margin_x, margin_y, space=0):
     '''Creates a seats row made of squares and numbers the places.
-    If the seats is 0, creates a green square, else creates a red square
+    If the seats is 0, creates a green square, if it is HELD a yellow square, else creates a red square
 
     Parameters
     ----------
@@ -554,8 +866,8 @@ def create_row(row, j: int, screen, font, margin_x, margin_y, space=0):
         raise IncorrectCoordinates('Incorrect margin or space! A positive integer required')
 
     # Setting square (each place) parameters
-    square_height = 35
-    square_width = 25
+    square_height = SQUARE_HEIGHT
+    square_width = SQUARE_WIDTH
 
     try:
         for i, seat in enumerate(row):
@@ -567,26 +879,169 @@ def create_row(row, j: int, screen, font, margin_x, margin_y, space=0):
 
             # Setting col label (seat numbers)
             if j == 0:
-                new_screen = cv2.putText(screen, f'{i + 1}', (square_x_first + 5, square_y_first - 5),
-                                         font, 0.5, (255, 255, 255), 1)
+                new_screen = put_texts(screen, [f'{i + 1}'], [(square_x_first + 5, square_y_first - 5)],
+                                       font, 0.5, (255, 255, 255), 1)
             if seat == 0:
                 # creating a green square
-                new_screen = create_square(screen, square_x_first, square_y_first, square_x_second, square_y_second, (0, 255, 0), space)
+                new_screen = create_square(screen, square_x_first, square_y_first, square_x_second, square_y_second, FREE_COLOR, space)
+            elif seat == HELD:
+                # creating a yellow square
+                new_screen = create_square(screen, square_x_first, square_y_first, square_x_second, square_y_second, HELD_COLOR, space)
             else:
                 # creating a red square
-                new_screen = create_square(screen, square_x_first, square_y_first, square_x_second, square_y_second, (0, 0, 255), space)
+                new_screen = create_square(screen, square_x_first, square_y_first, square_x_second, square_y_second, TAKEN_COLOR, space)
     except TypeError:
         raise IncorrectFont('Incorrect font, integer or cv2 font required')
     except IncorrectCoordinates:
         raise
 
 
-def display_image(movie, screen, seats_param: np.ndarray, row_indices):
+def _square_spans(start, size, count, space, limit):
+    # For each pixel in range(limit) returns the index of the last square covering it or -1,
+    # squares are drawn like create_square() from start + size * k + space to start + size * (k + 1) inclusive
+    first = start + size * np.arange(count) + space
+    second = start + size * np.arange(1, count + 1)
+    low, high = np.minimum(first, second), np.maximum(first, second)
+    pixels = np.arange(limit)
+    index = np.searchsorted(low, pixels, side='right') - 1
+    covered = (index >= 0) & (pixels <= high[np.maximum(index, 0)])
+    return np.where(covered, index, -1)
+
+
+def _seat_states(seats_array):
+    # Returns the color of each place as an index of (FREE_COLOR, TAKEN_COLOR, HELD_COLOR)
+    return np.where(seats_array == 0, 0, np.where(seats_array == HELD, 2, 1)).astype(np.int8)
+
+
+def _paint_squares(colors, screen, x, y, space, square_height=SQUARE_HEIGHT, square_width=SQUARE_WIDTH):
+    # Painting a square of colors[j, i] for each place, the first square starts at (x, y)
+    num_rows, num_seats = colors.shape[:2]
+    if num_rows == 0 or num_seats == 0:
+        return
+
+    full_rows = full_seats = 0
+    if 0 < space <= min(square_height, square_width) and x >= 0 and y >= 0:
+        # Squares do not overlap, so the squares fully inside the screen are painted through a view
+        # with one block per place, a square covers the last pixels of its block and the first pixel of the next one
+        full_rows = min(num_rows, max(0, (screen.shape[0] - y - 1) // square_height))
+        full_seats = min(num_seats, max(0, (screen.shape[1] - x - 1) // square_width))
+        if full_rows and full_seats:
+            blocks = screen[y + 1:y + 1 + square_height * full_rows, x + 1:x + 1 + square_width * full_seats]
+            blocks = blocks.reshape(full_rows, square_height, full_seats, square_width, -1)
+            # one channel at a time, which is faster than broadcasting whole pixels
+            for channel in range(blocks.shape[-1]):
+                blocks[:, space - 1:, :, space - 1:, channel] = colors[:full_rows, np.newaxis, :full_seats,
+                                                                       np.newaxis, channel]
+        else:
+            full_rows = full_seats = 0
+
+    # The remaining squares (clipped by the screen edge) are painted pixel by pixel
+    row_index = _square_spans(y, square_height, num_rows, space, screen.shape[0])
+    col_index = _square_spans(x, square_width, num_seats, space, screen.shape[1])
+    for ys, xs in ((row_index >= full_rows, col_index >= 0),
+                   (row_index >= 0, col_index >= full_seats)):
+        ys, xs = np.flatnonzero(ys), np.flatnonzero(xs)
+        if len(ys) and len(xs):
+            screen[np.ix_(ys, xs)] = colors[np.ix_(row_index[ys], col_index[xs])]
+
+
+def create_rows(seats_array, screen, margin_x, margin_y, space=0, row_offset=0,
+                square_height=SQUARE_HEIGHT, square_width=SQUARE_WIDTH):
+    '''Creates the squares of all places at once, the same squares as create_row() for each row
+
+    Instead of drawing each square, the color of every place is painted with one numpy assignment
+
+    Parameters
+    ----------
+    :param seats_array: numpy array
+        a 2 dimensional numpy array representing a cinema hall in format [[row], [row]]
+        where row is a 1 dimensional array containing zeros (free place) or ones (taken seat) ex. [1, 0, 0, 0, 1]
+    :param screen: numpy array
+        3 dimensional numpy array representing a screen, modified in place
+    :param margin_x: int
+        left margin of the cinema hall image
+    :param margin_y: int
+        upper margin of the cinema hall image
+    :param space: int, optional
+        space between each square (default is 0)
+    :param row_offset: int, optional
+        index of the hall row drawn as the first row of seats_array (default is 0)
+    :param square_height: int, optional
+        height of a square (default is SQUARE_HEIGHT)
+    :param square_width: int, optional
+        width of a square (default is SQUARE_WIDTH)
+
+    Returns
+    -------
+    :returns: screen with the squares added
+
+    Raises
+    ------
+    :raises IncorrectCoordinates:
+        if the margin_x, margin_y, space or row_offset parameter is < 0
+    :raises IncorrectArrayType:
+        if the seats_array is not a 2 dimensional numpy array
+    '''
+
+    if min(margin_x, margin_y, space, row_offset) < 0:
+        raise IncorrectCoordinates('Incorrect margin or space! A positive integer required')
+    if not isinstance(seats_array, np.ndarray) or seats_array.ndim != 2:
+        raise IncorrectArrayType('Incorrect array type, 2 dimensional numpy array required')
+
+    colors = np.array([FREE_COLOR, TAKEN_COLOR, HELD_COLOR], screen.dtype)[_seat_states(seats_array)]
+    _paint_squares(colors, screen, margin_x, margin_y + square_height * row_offset, space, square_height, square_width)
+    return screen
+
+
+def display_seat_numbers(screen, font, num_seats, margin_x, margin_y):
+    '''Displays the seat numbers above the first row, like create_row() for the row 0
+
+    Parameters
+    ----------
+    :param screen: numpy array
+        3 dimensional numpy array representing a screen
+    :param font: int
+        a font used for text, an integer or cv2 font
+    :param num_seats: int
+        number of seats in a row
+    :param margin_x: int
+        left margin of the cinema hall image
+    :param margin_y: int
+        upper margin of the cinema hall image
+
+    Returns
+    -------
+    :returns: screen with the seat numbers added
+
+    Raises
+    ------
+    :raises IncorrectCoordinates:
+        if the margin_x or margin_y parameter is < 0
+    :raises IncorrectFont:
+        if the font is not an integer or a cv2 font
+    '''
+
+    if min(margin_x, margin_y) < 0:
+        raise IncorrectCoordinates('Incorrect margin! A positive integer required')
+
+    try:
+        # All seat numbers are copied as one sprite
+        return put_texts(screen, [f'{i + 1}' for i in range(num_seats)],
+                         [(margin_x + SQUARE_WIDTH * i + 5, margin_y - 5) for i in range(num_seats)],
+                         font, 0.5, (255, 255, 255), 1)
+    except TypeError:
+        raise IncorrectFont('Incorrect font, integer or cv2 font required')
+
+
+def display_image(movie, screen, seats_param: np.ndarray, row_indices, scr=None, layout=None):
     '''Displays the cinema hall image with seats
 
     Waits for a pressed key:
         - if ENTER - proceed to the booking process
+        - if A - proceed to the booking process with the best places chosen automatically
         - if ESC - close the window and go back to the menu
+        - if N or P - show the next or previous tile of the hall (with a layout only)
+        - if + or - - zoom in or out, keeping the first place of the tile displayed (with a layout only)
     returns the result of book_seats() which is an array of booked seats in format (row, place)
 
     Parameters
@@ -600,6 +1055,11 @@ def display_image(movie, screen, seats_param: np.ndarray, row_indices):
         where row is a 1 dimensional array containing zeros (free place) or ones (taken seat) ex. [1, 0, 0, 0, 1]
     :param row_indices: dict
         dictionary representing row indices in format {row_label: index} ex. {'A':0, 'B':1}
+    :param scr: numpy array, optional
+        the empty screen the tiles are drawn on by render_layout() (default is None)
+    :param layout: HallLayout, optional
+        the fitted layout of the displayed image, starting at the first place of the hall
+        (default is None - the image can not be moved nor zoomed)
 
     Returns
     -------
@@ -625,6 +1085,8 @@ def display_image(movie, screen, seats_param: np.ndarray, row_indices):
     if len(row_indices) < seats_param.shape[0]:
         raise IncorrectShape('Array shape does not match row indices')
 
+    # The displayed tile of the layout and its zoom
+    tile, zoom = 0, 1.0
     while True:
         # Showing the cinema hall image
         cv2.imshow(f'Seats for {movie}', screen)
@@ -634,42 +1096,235 @@ def display_image(movie, screen, seats_param: np.ndarray, row_indices):
             cv2.destroyAllWindows()
             break
         elif key in {10, 13}:  # if ENTER key - start the booking
-            try:
-                # if the cinema hall array is not full
-                if seats_param.sum() != (seats_param.shape[0] * seats_param.shape[1]):
-                    print('Proceeding to place booking')
-                    sleep(1.5)
-                    # LINUX
-                    system('clear')
-                    # WINDOWS
-                    # system('cls')
-
-                    while True:
-                        # Get the number of places to book
-                        num_places = input('How many places you want to book?: ')
-                        # Validate if the number of places to book is correct
-                        num_places = validate_num_places(seats_param, num_places)
-                        if num_places is not None:
-                            break
-                    if num_places == 0:
-                        say_goodbye()
-                        return
-                    booked_seats = book_seats(seats_param, row_indices, num_places)  # return the new array with chosen seats
-                    return booked_seats
-                else:
-                    print('No available places for this movie :(')
-                    sleep(2)
-                    cv2.destroyAllWindows()
-                    return
-            except (ValueError, TypeError):
-                raise IncorrectArrayData('Incorrect data type in array, integer required', movie)
-            except (IncorrectArrayData, IncorrectShape, IncorrectArrayType):
-                raise
+            return start_booking(movie, seats_param, row_indices)
+        elif key in {ord('a'), ord('A')}:  # if A key - start the booking of the best places
+            return start_booking(movie, seats_param, row_indices, auto=True)
+        elif layout is not None and scr is not None:
+            moved = navigate_layout(layout, tile, zoom, key)
+            if moved is not None:  # if N, P, + or - key - draw the new part of the hall on the same screen
+                layout, tile, zoom = moved
+                screen = render_layout(scr, seats_param, row_indices, movie, layout.tiles()[tile], out=screen)
 
 
-def show_seats(scr, seats_param: np.ndarray, row_indices, movie, screen_height, screen_width):
-    '''Displays the cinema hall with all places
-    returns the result of display_image() which is an array of booked seats in format (row, place)
+def navigate_layout(layout, tile, zoom, key):
+    '''Returns the layout, tile and zoom displayed after pressing a key in display_image()
+
+    Parameters
+    ----------
+    :param layout: HallLayout
+        the fitted layout (HallLayout.fit()) starting at the first place of the hall
+    :param tile: int
+        index of the displayed tile in layout.tiles()
+    :param zoom: float
+        zoom of the layout
+    :param key: int
+        the pressed key: N or P - the next or previous tile, + (or =) or - - zoom in or out by ZOOM_STEP,
+        the tile of the new zoom starts in the same row and seat as the displayed one or right before it
+
+    Returns
+    -------
+    :returns: None if the key does not change the displayed part of the hall
+    else
+    :returns: tuple
+        (layout, tile, zoom), the displayed part is layout.tiles()[tile]
+    '''
+
+    tiles = layout.tiles()
+    if key in {ord('n'), ord('N')}:
+        return (layout, (tile + 1) % len(tiles), zoom) if len(tiles) > 1 else None
+    if key in {ord('p'), ord('P')}:
+        return (layout, (tile - 1) % len(tiles), zoom) if len(tiles) > 1 else None
+    if key in {ord('+'), ord('=')}:
+        new_zoom = min(MAX_ZOOM, zoom * ZOOM_STEP)
+    elif key == ord('-'):
+        new_zoom = max(1.0, zoom / ZOOM_STEP)
+    else:
+        return None
+    if new_zoom == zoom:
+        return None
+
+    displayed = tiles[tile]
+    layout = HallLayout.fit(layout.rows, layout.seats, layout.screen_height, layout.screen_width, new_zoom)
+    columns = len(range(0, layout.seats, layout.visible_seats))
+    tile = displayed.first_row // layout.visible_rows * columns + displayed.first_seat // layout.visible_seats
+    return layout, tile, new_zoom
+
+
+def start_booking(movie, seats_param: np.ndarray, row_indices, auto=False, seat_map=None):
+    '''Asks for the number of places and books them, used by the GUI and the terminal renderer
+
+    returns the result of book_seats() or book_best_seats() which is an array of booked seats in format (row, place)
+
+    Parameters
+    ----------
+    :param movie:
+        the chosen movie
+    :param seats_param: numpy array
+        a 2 dimensional numpy array representing a cinema hall in format [[row], [row]]
+        where row is a 1 dimensional array containing zeros (free place) or ones (taken seat) ex. [1, 0, 0, 0, 1]
+    :param row_indices: dict
+        dictionary representing row indices in format {row_label: index} ex. {'A':0, 'B':1}
+    :param auto: bool, optional
+        if True the best adjacent places are chosen by book_best_seats() (default is False - chosen manually)
+    :param seat_map: SeatMap, optional
+        SeatMap of the seats_param (default is None - created from the seats_param),
+        the free places are counted once instead of at each question about the number of places
+
+    Returns
+    -------
+    :return: None if the hall is full or no places are booked
+    else
+    :return: booked_seats_array
+        the result of book_seats() which is an array of booked seats in format [(row, place), (row, place)]
+
+    Raises
+    ------
+    :raises IncorrectArrayData:
+        if the array contains illegal characters (only 0 and 1 permitted)
+    :raises IncorrectShape, IncorrectArrayType:
+        if it occurs in book_seats() or book_best_seats()
+    '''
+
+    try:
+        if seat_map is None:
+            seat_map = SeatMap(seats_param)
+        # if the cinema hall array is not full
+        if not seat_map.is_full:
+            print('Proceeding to place booking')
+            sleep(1.5)
+            # LINUX
+            system('clear')
+            # WINDOWS
+            # system('cls')
+
+            while True:
+                # Get the number of places to book
+                num_places = input('How many places you want to book?: ')
+                # Validate if the number of places to book is correct
+                num_places = validate_num_places(seats_param, num_places, seat_map)
+                if num_places is not None:
+                    break
+            if num_places == 0:
+                say_goodbye()
+                return
+            if auto:
+                booked_seats = book_best_seats(seats_param, row_indices, num_places, seat_map)
+            else:
+                # return the new array with chosen seats
+                booked_seats = book_seats(seats_param, row_indices, num_places, seat_map)
+            return booked_seats
+        else:
+            print('No available places for this movie :(')
+            sleep(2)
+            destroy_windows()
+            return
+    except (ValueError, TypeError):
+        raise IncorrectArrayData('Incorrect data type in array, integer required', movie)
+    except (IncorrectArrayData, IncorrectShape, IncorrectArrayType):
+        raise
+
+
+def _render_static_layer(scr, seats_array, row_indices, font, margin_x, margin_y, space,
+                         screen_width, screen_height, rows_above):
+    # Drawing everything that does not depend on the seats above the key info in the create_row() loop order
+    new_screen = scr.copy()
+    for j in range(len(seats_array)):
+        # Adding row indices
+        new_screen = display_row_indices(new_screen, font, row_indices, j, margin_x, margin_y)
+
+        # Adding text how to exit and how to book seats
+        new_screen = display_key_info(new_screen, font, margin_x, screen_height)
+
+        if j == 0:
+            # Adding seat numbers
+            new_screen = display_seat_numbers(new_screen, font, seats_array.shape[1], margin_x, margin_y)
+        if j >= rows_above:
+            create_rows(seats_array[j:j + 1], new_screen, margin_x, margin_y, space, j)
+
+    # Show the screen
+    return display_screen(new_screen, font, margin_x, screen_width)
+
+
+def _keep_background(scr):
+    # Returns the background kept by the caches, None for a black screen (the screen created by run.main())
+    return None if not scr.any() else scr.copy()
+
+
+def _same_background(background, scr):
+    # Compares a kept background with the screen without allocating an array of the screen size
+    if background is None:
+        return not scr.any()
+    return background.shape == scr.shape and np.array_equal(background, scr)
+
+
+def _get_static_layer(scr, seats_array, row_indices, font, margin_x, margin_y, space,
+                      screen_width, screen_height, rows_above, out=None):
+    # Returns a copy of the cached static layer (copied to out if given),
+    # the layer is rendered if the cache does not contain it
+    key = (scr.shape, scr.dtype.str, seats_array.shape, tuple(row_indices), font, screen_width, screen_height,
+           _seat_states(seats_array[rows_above:]).tobytes())
+    entry = _layer_cache.get(key)
+    if entry is not None and _same_background(entry[0], scr):
+        _layer_cache.move_to_end(key)
+        _layer_cache_stats['hits'] += 1
+        if out is None:
+            return entry[1].copy()
+        np.copyto(out, entry[1])
+        return out
+
+    _layer_cache_stats['misses'] += 1
+    layer = _render_static_layer(scr, seats_array, row_indices, font, margin_x, margin_y, space,
+                                 screen_width, screen_height, rows_above)
+    _layer_cache[key] = (_keep_background(scr), layer)
+    _layer_cache.move_to_end(key)
+    while len(_layer_cache) > LAYER_CACHE_SIZE:
+        _layer_cache.popitem(last=False)
+    if out is None:
+        return layer.copy()
+    np.copyto(out, layer)
+    return out
+
+
+def get_layer_cache_info():
+    '''Returns statistics of the static layer cache used by render_seats()
+
+    Returns
+    -------
+    :return: dict
+        dictionary in format {'hits': int, 'misses': int, 'size': int, 'max_size': int}
+    '''
+
+    return {'hits': _layer_cache_stats['hits'], 'misses': _layer_cache_stats['misses'],
+            'size': len(_layer_cache), 'max_size': LAYER_CACHE_SIZE}
+
+
+def clear_layer_cache():
+    '''Removes all layers from the static layer cache used by render_seats() and resets its statistics'''
+
+    _layer_cache.clear()
+    _layer_cache_stats['hits'] = 0
+    _layer_cache_stats['misses'] = 0
+
+
+def _rows_above_key_info(seats_array, margin_y, screen_height):
+    # The key info is drawn once for each row like in create_row() loop and its antialiased text
+    # gets brighter with every drawing, so the rows below the top of the key info are part of the static layer
+    # drawn between them, the rows above it are created at once on a copy of the layer
+    return max(0, min(len(seats_array), (screen_height - KEY_INFO_HEIGHT - margin_y) // SQUARE_HEIGHT))
+
+
+def _render_hall(scr, seats_array, row_indices, font, margin_x, margin_y, space, screen_width, screen_height,
+                 out=None):
+    # Returns the cinema hall image without the text info, drawn on out if given
+    rows_above = _rows_above_key_info(seats_array, margin_y, screen_height)
+    # Row indices, seat numbers, key info and the screen are the same for each hall shape and screen size
+    new_screen = _get_static_layer(scr, seats_array, row_indices, font, margin_x, margin_y, space,
+                                   screen_width, screen_height, rows_above, out)
+    return create_rows(seats_array[:rows_above], new_screen, margin_x, margin_y, space)
+
+
+def render_seats(scr, seats_param: np.ndarray, row_indices, movie, screen_height, screen_width, out=None):
+    '''Returns the cinema hall image with all places, the image displayed by show_seats()
 
     Parameters
     ----------
@@ -686,39 +1341,33 @@ def show_seats(scr, seats_param: np.ndarray, row_indices, movie, screen_height,
         height of the screen
     :param screen_width: int
         width of the screen
+    :param out: numpy array, optional
+        array of the screen shape the image is drawn on, ex. acquire_frame() (default is None - a new array)
 
     Returns
     -------
-    :returns: None if the movie wasn't chosen (if the movie is None)
+    :returns: None if the movie wasn't chosen (if the movie is None) or the screen size is not positive
     else
-    :returns: the result of display_image() which is an array of booked seats in format (row, place)
+    :returns: numpy array
+        3 dimensional numpy array with the cinema hall image
 
     Raises
     ------
     :raises IncorrectArrayData
         if the length of seats_param array is 0
-        or if it occurs in following functions:
-        display_text_info()
-        display_image()
+        or if it occurs in display_text_info()
     :raises FileError
         if IncorrectShape occurs in following functions:
         display_screen(),
-        create_row(),
+        create_rows(),
         display_key_info(),
         display_row_indices()
     :raises IncorrectFont
-        if it occurs in the functions above and display_text_info(), display_image()
+        if it occurs in the functions above and display_text_info()
     :raises IncorrectCoordinates
-        if it occurs in the functions above and display_text_info(), display_image()
+        if it occurs in the functions above and display_text_info()
     :raises IncorrectArrayType
-        if it occurs in following functions:
-        display_text_info()
-        display_image()
-    :raises IncorrectShape
-        if it occurs in following functions:
-        display_text_info()
-        display_image()
-
+        if it occurs in display_text_info()
     '''
 
     if len(seats_param) == 0:
@@ -733,37 +1382,779 @@ def show_seats(scr, seats_param: np.ndarray, row_indices, movie, screen_height,
     margin_y = 110
     space = 6
 
-    new_screen = scr.copy()  # making a copy of the screen array
     # Setting a font
     font = cv2.FONT_HERSHEY_DUPLEX
+    seats_array = np.atleast_2d(np.asarray(seats_param))
 
     try:
-        # Creating a square for each seat in a row
-        for j, row in enumerate(seats_param):
-            # Adding row indices
-            new_screen = display_row_indices(new_screen, font, row_indices, j, margin_x, margin_y)
-
-            # Adding text how to exit and how to book seats
-            new_screen = display_key_info(new_screen, font, margin_x, screen_height)
-
-            # Creates a row
-            create_row(row, j, new_screen, font, margin_x, margin_y, space)
-
-        # Show the screen
-        display_screen(new_screen, font, margin_x, screen_width)
+        new_screen = _render_hall(scr, seats_array, row_indices, font, margin_x, margin_y, space,
+                                  screen_width, screen_height, out)
     except IncorrectShape as e:
         raise FileError('Array shape does not match row indices', e, movie)
     except (IncorrectFont, IncorrectCoordinates):
         raise
 
-    try:
-        # Displaying text info on the screen
-        new_screen = display_text_info(new_screen, movie, font, seats_param, margin_x)
+    # Displaying text info on the screen, new_screen is not the cached layer so no copy is needed
+    return display_text_info(new_screen, movie, font, seats_param, margin_x, copy=False)
+
+
+def refresh_seats(scr, seats_param: np.ndarray, row_indices, movie, screen_height, screen_width):
+    '''Returns the same cinema hall image as render_seats(), reusing the last frame rendered for the movie
 
+    Only the places which changed since the last frame and the text info are drawn again.
+    The whole image is rendered if there is no frame for the movie, the screen or the hall shape has changed
+    or a changed place is under the key info.
+    The returned frame is kept for the next refresh, so it must not be modified (copy it first),
+    it is drawn again by the next refresh of the movie and reused by acquire_frame() after clear_frame_cache()
+
+    Parameters
+    ----------
+    :param scr: numpy array
+        3 dimensional numpy array representing a screen
+    :param seats_param: numpy array
+        a 2 dimensional numpy array representing a cinema hall in format [[row], [row]]
+        where row is a 1 dimensional array containing zeros (free place) or ones (taken seat) ex. [1, 0, 0, 0, 1]
+    :param row_indices: dict
+        dictionary representing row indices in format {row_label: index} ex. {'A':0, 'B':1}
+    :param movie:
+        the chosen movie, if move is None: return None
+    :param screen_height: int
+        height of the screen
+    :param screen_width: int
+        width of the screen
+
+    Returns
+    -------
+    :returns: None if the movie wasn't chosen (if the movie is None) or the screen size is not positive
+    else
+    :returns: numpy array
+        3 dimensional numpy array with the cinema hall image
+
+    Raises
+    ------
+    :raises IncorrectArrayData, FileError, IncorrectFont, IncorrectCoordinates, IncorrectArrayType
+        like render_seats()
+    '''
+
+    if len(seats_param) == 0:
+        raise IncorrectArrayData('The movie array is empty', movie)
+    if screen_height <= 0 or screen_width <= 0:
+        return
+    if movie is None:  # if the move wasn't chosen
+        return
+
+    # Setting screen parameters
+    margin_x = screen_height // 5
+    margin_y = 110
+    space = 6
+
+    # Setting a font
+    font = cv2.FONT_HERSHEY_DUPLEX
+    seats_array = np.atleast_2d(np.asarray(seats_param))
+    rows_above = _rows_above_key_info(seats_array, margin_y, screen_height)
+
+    key = (scr.shape, scr.dtype.str, seats_array.shape, tuple(row_indices), screen_width, screen_height)
+    entry = _frame_cache.get(movie)
+    if entry is not None and entry[0] == key and _same_background(entry[1], scr):
+        _, _, last_array, base_screen, new_screen = entry
+        states = _seat_states(seats_array)
+        changed = _seat_states(last_array) != states
+        if not changed[rows_above:].any():
+            # Drawing again only the changed places, the text info does not overlap any place
+            for j, i in np.argwhere(changed):
+                color = (FREE_COLOR, TAKEN_COLOR, HELD_COLOR)[states[j, i]]
+                square_x_first = margin_x + SQUARE_WIDTH * i
+                square_y_first = margin_y + SQUARE_HEIGHT * j
+                for screen in (base_screen, new_screen):
+                    create_square(screen, square_x_first, square_y_first, square_x_first + SQUARE_WIDTH,
+                                  square_y_first + SQUARE_HEIGHT, color, space)
+            if changed.any() or last_array.sum() != seats_array.sum():
+                new_screen[:TEXT_INFO_HEIGHT] = base_screen[:TEXT_INFO_HEIGHT]
+                display_text_info(new_screen[:TEXT_INFO_HEIGHT], movie, font, seats_param, margin_x, copy=False)
+            last_array[...] = seats_array
+            _frame_cache.move_to_end(movie)
+            return new_screen
+
+    # Drawing again on the frames of the movie, so a screening shown again does not allocate new frames
+    if entry is not None and entry[3].shape == scr.shape and entry[3].dtype == scr.dtype:
+        base_screen, new_screen = entry[3], entry[4]
+    else:
+        if entry is not None:
+            _release_frames(entry)
+        base_screen = acquire_frame(scr.shape, scr.dtype, fill=None)
+        new_screen = acquire_frame(scr.shape, scr.dtype, fill=None)
+    _frame_cache.pop(movie, None)
+
+    try:
+        _render_hall(scr, seats_array, row_indices, font, margin_x, margin_y, space,
+                     screen_width, screen_height, base_screen)
+    except IncorrectShape as e:
+        release_frame(base_screen)
+        release_frame(new_screen)
+        raise FileError('Array shape does not match row indices', e, movie)
+    np.copyto(new_screen, base_screen)
+    display_text_info(new_screen, movie, font, seats_param, margin_x, copy=False)
+    _frame_cache[movie] = (key, _keep_background(scr), seats_array.copy(), base_screen, new_screen)
+    while len(_frame_cache) > FRAME_CACHE_SIZE:
+        _release_frames(_frame_cache.popitem(last=False)[1])
+    return new_screen
+
+
+def _release_frames(entry):
+    # Returns both frames of a _frame_cache entry to the frame pool
+    release_frame(entry[3])
+    release_frame(entry[4])
+
+
+def clear_frame_cache():
+    '''Removes all frames kept by refresh_seats(), the frames are returned to the frame pool'''
+
+    while _frame_cache:
+        _release_frames(_frame_cache.popitem()[1])
+
+
+def acquire_frame(shape, dtype=np.uint8, fill=0):
+    '''Returns a frame buffer of the shape from the frame pool, a new array is allocated if the pool is empty
+
+    Parameters
+    ----------
+    :param shape: tuple
+        shape of the frame, ex. (screen_height, screen_width, 3)
+    :param dtype: numpy dtype, optional
+        type of the frame elements (default is np.uint8)
+    :param fill: int, optional
+        value the frame is filled with (default is 0 - a black screen like np.zeros()),
+        if None the frame contains the pixels of its last use
+
+    Returns
+    -------
+    :returns: numpy array
+        the frame, it should be given back by release_frame() when it is no longer used
+    '''
+
+    key = (tuple(shape), np.dtype(dtype).str)
+    frames = _frame_pool.get(key)
+    if frames:
+        _frame_pool_stats['hits'] += 1
+        frame = frames.pop()
+    else:
+        _frame_pool_stats['misses'] += 1
+        frame = np.empty(shape, dtype)
+    if fill is not None:
+        frame.fill(fill)
+    return frame
+
+
+def release_frame(frame):
+    '''Gives the frame back to the frame pool, so acquire_frame() returns it instead of allocating a new one.
+    At most FRAME_POOL_SIZE frames of one shape are kept, the frame must not be used after the release
+
+    Parameters
+    ----------
+    :param frame: numpy array
+        a frame returned by acquire_frame(), other arrays (ex. views) are not kept
+    '''
+
+    if not isinstance(frame, np.ndarray) or frame.base is not None or not frame.flags.c_contiguous:
+        return
+    frames = _frame_pool.setdefault((frame.shape, frame.dtype.str), [])
+    if len(frames) < FRAME_POOL_SIZE and not any(kept is frame for kept in frames):
+        frames.append(frame)
+
+
+def get_frame_pool_info():
+    '''Returns statistics of the frame pool used by acquire_frame()
+
+    Returns
+    -------
+    :return: dict
+        dictionary in format {'hits': int, 'misses': int, 'size': int, 'max_size': int}
+        where size is the number of free frames and max_size the maximum number of free frames of one shape
+    '''
+
+    return {'hits': _frame_pool_stats['hits'], 'misses': _frame_pool_stats['misses'],
+            'size': sum(len(frames) for frames in _frame_pool.values()), 'max_size': FRAME_POOL_SIZE}
+
+
+def clear_frame_pool():
+    '''Removes all free frames from the frame pool and resets its statistics'''
+
+    _frame_pool.clear()
+    _frame_pool_stats['hits'] = 0
+    _frame_pool_stats['misses'] = 0
+
+
+def encode_seats(scr, seats_param: np.ndarray, row_indices, movie, screen_height, screen_width, image_format='png',
+                 layout=None):
+    '''Returns the cinema hall image rendered by refresh_seats() encoded as PNG or JPEG bytes
+
+    Encoded images are cached and keyed by a hash of the seat matrix,
+    so a hall which has not changed is not rendered nor encoded again
+
+    Parameters
+    ----------
+    :param scr: numpy array
+        3 dimensional numpy array representing a screen
+    :param seats_param: numpy array
+        a 2 dimensional numpy array representing a cinema hall in format [[row], [row]]
+        where row is a 1 dimensional array containing zeros (free place) or ones (taken seat) ex. [1, 0, 0, 0, 1]
+    :param row_indices: dict
+        dictionary representing row indices in format {row_label: index} ex. {'A':0, 'B':1}
+    :param movie:
+        the chosen movie, if move is None: return None
+    :param screen_height: int
+        height of the screen
+    :param screen_width: int
+        width of the screen
+    :param image_format: str, optional
+        one of IMAGE_FORMATS: 'png', 'jpg' or 'jpeg' (default is 'png')
+    :param layout: HallLayout, optional
+        the image is rendered by render_layout() with this layout (default is None - refresh_seats() is used)
+
+    Returns
+    -------
+    :returns: None if the movie wasn't chosen (if the movie is None) or the screen size is not positive
+    else
+    :returns: bytes
+        the encoded image
+
+    Raises
+    ------
+    :raises IncorrectImageFormat
+        if the image_format is not supported or the image could not be encoded
+    :raises IncorrectArrayData, FileError, IncorrectFont, IncorrectCoordinates, IncorrectArrayType
+        like render_seats()
+    '''
+
+    if image_format not in IMAGE_FORMATS:
+        raise IncorrectImageFormat(f'Incorrect image format, one of {", ".join(IMAGE_FORMATS)} required')
+    if len(seats_param) == 0:
+        raise IncorrectArrayData('The movie array is empty', movie)
+    if screen_height <= 0 or screen_width <= 0:
+        return
+    if movie is None:  # if the move wasn't chosen
+        return
+
+    try:
+        seats_array = np.ascontiguousarray(seats_param)
+        seats_hash = hashlib.sha1(seats_array.tobytes()).hexdigest()
+    except (TypeError, ValueError):
+        raise IncorrectArrayData('Incorrect data type in array, numeric required', movie)
+    key = (movie, IMAGE_FORMATS[image_format], seats_hash, seats_array.shape, seats_array.dtype.str,
+           scr.shape, scr.dtype.str, tuple(row_indices), screen_height, screen_width,
+           None if layout is None else tuple(vars(layout).items()))
+    entry = _encoded_cache.get(key)
+    if entry is not None and _same_background(entry[0], scr):
+        _encoded_cache.move_to_end(key)
+        _encoded_cache_stats['hits'] += 1
+        return entry[1]
+
+    _encoded_cache_stats['misses'] += 1
+    if layout is None:
+        new_screen = refresh_seats(scr, seats_param, row_indices, movie, screen_height, screen_width)
+    else:
+        new_screen = render_layout(scr, seats_param, row_indices, movie, layout)
+    try:
+        encoded, buffer = cv2.imencode(IMAGE_FORMATS[image_format], new_screen)
+    except cv2.error:
+        encoded = False
+    if not encoded:
+        raise IncorrectImageFormat(f'The image could not be encoded as {image_format}')
+
+    image = buffer.tobytes()
+    _encoded_cache[key] = (_keep_background(scr), image)
+    _encoded_cache.move_to_end(key)
+    while len(_encoded_cache) > ENCODED_CACHE_SIZE:
+        _encoded_cache.popitem(last=False)
+    return image
+
+
+def get_encoded_cache_info():
+    '''Returns statistics of the encoded image cache used by encode_seats()
+
+    Returns
+    -------
+    :return: dict
+        dictionary in format {'hits': int, 'misses': int, 'size': int, 'max_size': int}
+    '''
+
+    return {'hits': _encoded_cache_stats['hits'], 'misses': _encoded_cache_stats['misses'],
+            'size': len(_encoded_cache), 'max_size': ENCODED_CACHE_SIZE}
+
+
+def clear_encoded_cache():
+    '''Removes all images from the encoded image cache used by encode_seats() and resets its statistics'''
+
+    _encoded_cache.clear()
+    _encoded_cache_stats['hits'] = 0
+    _encoded_cache_stats['misses'] = 0
+
+
+def get_screen_size(seats_array):
+    '''Returns the screen size used to display the cinema hall
+
+    Parameters
+    ----------
+    :param seats_array: numpy array
+        a 2 dimensional numpy array representing a cinema hall
+
+    Returns
+    -------
+    :returns: tuple
+        (screen_height, screen_width)
+    '''
+
+    if seats_array.shape[0] > 10:
+        # Setting screen height
+        screen_height = seats_array.shape[0] * 50
+    else:
+        # Setting screen height
+        screen_height = seats_array.shape[0] * 74
+    # Setting screen width
+    screen_width = seats_array.shape[1] * 32
+    return screen_height, screen_width
+
+
+def _render_hall_file(task):
+    # Rendering one hall in a worker process, returns an error message or None
+    movie, path, image_path, data_format, image_format = task
+    try:
+        seats_array = get_seats_data(movie, path, data_format)
+        screen_height, screen_width = get_screen_size(seats_array)
+        row_indices = {chr(ord('A') + i): i for i in range(seats_array.shape[0])}
+        screen = np.zeros([screen_height, screen_width, 3], np.uint8)
+        image = encode_seats(screen, seats_array, row_indices, movie, screen_height, screen_width, image_format)
+        with open(image_path, 'wb') as file:
+            file.write(image)
+    except (FileError, IncorrectArrayData, IncorrectArrayType, IncorrectShape, IncorrectImageFormat,
+            IncorrectFont, IncorrectCoordinates) as e:
+        return f'{e}'
+    except OSError as e:
+        return f'The image could not be written ({e})'
+
+
+def render_halls(movies_dir, output_dir, data_format='csv', image_format='png', workers=None):
+    '''Renders the cinema hall of every movie in movies_dir into an image in output_dir
+
+    The halls are loaded with get_seats_data() and rendered headless by encode_seats()
+    in a pool of processes, no display is needed
+
+    Parameters
+    ----------
+    :param movies_dir: str
+        directory with the movie files
+    :param output_dir: str
+        directory for the images, created if it does not exist
+    :param data_format: str, optional
+        format of the movie files, 'csv', 'journal' or 'bin' (default is 'csv')
+    :param image_format: str, optional
+        one of IMAGE_FORMATS (default is 'png')
+    :param workers: int, optional
+        number of processes (default is None - the number of processors)
+
+    Returns
+    -------
+    :returns: dict
+        dictionary in format {'halls': int, 'seconds': float, 'halls_per_second': float, 'failed': {movie: error}}
+
+    Raises
+    ------
+    :raises FileError:
+        if the data format is not supported or a directory could not be opened
+    :raises IncorrectImageFormat:
+        if the image_format is not supported
+    '''
+
+    if data_format not in ('csv', 'journal', 'bin'):
+        raise FileError(f'Unsupported data format: {data_format}')
+    if image_format not in IMAGE_FORMATS:
+        raise IncorrectImageFormat(f'Incorrect image format, one of {", ".join(IMAGE_FORMATS)} required')
+
+    start = time.perf_counter()
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        tasks = []
+        for file_name in sorted(os.listdir(movies_dir)):
+            movie, extension = os.path.splitext(file_name)
+            if extension == DATA_FORMATS[data_format]:
+                tasks.append((movie, os.path.join(movies_dir, file_name),
+                              os.path.join(output_dir, movie + IMAGE_FORMATS[image_format]), data_format, image_format))
+    except (OSError, TypeError) as e:
+        raise FileError('Directory could not be found', e)
+
+    failed = {}
+    if tasks:
+        workers = workers or os.cpu_count() or 1
+        # A few chunks for each process, so a process does not wait for the others at the end
+        chunk_size = max(1, len(tasks) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for task, error in zip(tasks, executor.map(_render_hall_file, tasks, chunksize=chunk_size)):
+                if error is not None:
+                    failed[task[0]] = error
+
+    seconds = time.perf_counter() - start
+    halls = len(tasks) - len(failed)
+    return {'halls': halls, 'seconds': seconds, 'halls_per_second': halls / seconds if seconds else 0.0,
+            'failed': failed}
+
+
+class HallLayout:
+    '''Position and size of the places of a cinema hall (or of its part) on the screen
+
+    HallLayout.legacy() returns the layout used by render_seats(),
+    HallLayout.fit() computes the size of places from the hall shape and the viewport,
+    so the screen never gets bigger than the viewport, a hall which does not fit is shown in tiles
+
+    Parameters
+    ----------
+    :param rows: int
+        number of rows of the hall
+    :param seats: int
+        number of seats in a row
+    :param screen_height: int
+        height of the screen
+    :param screen_width: int
+        width of the screen
+    :param square_height: int, optional
+        height of a place with the space (default is SQUARE_HEIGHT)
+    :param square_width: int, optional
+        width of a place with the space (default is SQUARE_WIDTH)
+    :param space: int, optional
+        space between places (default is 6)
+    :param margin_x: int, optional
+        left margin of the places (default is None - screen_height // 5)
+    :param margin_y: int, optional
+        upper margin of the places (default is 110)
+    :param first_row: int, optional
+        index of the first displayed row (default is 0)
+    :param first_seat: int, optional
+        index of the first displayed seat (default is 0)
+    :param visible_rows: int, optional
+        number of displayed rows (default is None - all rows)
+    :param visible_seats: int, optional
+        number of displayed seats (default is None - all seats)
+
+    Raises
+    ------
+    :raises IncorrectShape:
+        if the number of rows or seats is not a positive integer
+    :raises IncorrectCoordinates:
+        if one of the sizes is not positive or a margin is < 0
+    '''
+
+    def __init__(self, rows, seats, screen_height, screen_width, square_height=SQUARE_HEIGHT, square_width=SQUARE_WIDTH,
+                 space=6, margin_x=None, margin_y=110, first_row=0, first_seat=0, visible_rows=None, visible_seats=None):
+        if not isinstance(rows, (int, np.integer)) or not isinstance(seats, (int, np.integer)) or min(rows, seats) <= 0:
+            raise IncorrectShape('The number of rows and seats must be a positive integer')
+        if margin_x is None:
+            margin_x = screen_height // 5
+        if min(screen_height, screen_width, square_height, square_width) <= 0 or min(space, margin_x, margin_y) < 0:
+            raise IncorrectCoordinates('Incorrect size or margin! A positive integer required')
+
+        self.rows, self.seats = int(rows), int(seats)
+        self.screen_height, self.screen_width = screen_height, screen_width
+        self.square_height, self.square_width, self.space = square_height, square_width, space
+        self.margin_x, self.margin_y = margin_x, margin_y
+        self.first_row = min(max(0, first_row), self.rows - 1)
+        self.first_seat = min(max(0, first_seat), self.seats - 1)
+        self.visible_rows = self.rows - self.first_row if visible_rows is None else visible_rows
+        self.visible_seats = self.seats - self.first_seat if visible_seats is None else visible_seats
+        self.visible_rows = max(1, min(self.visible_rows, self.rows - self.first_row))
+        self.visible_seats = max(1, min(self.visible_seats, self.seats - self.first_seat))
+
+    @classmethod
+    def legacy(cls, rows, seats):
+        '''Returns the layout of render_seats(): 35x25 places on a screen of get_screen_size()'''
+
+        screen_height, screen_width = get_screen_size(np.empty([rows, seats]))
+        return cls(rows, seats, screen_height, screen_width)
+
+    @classmethod
+    def fit(cls, rows, seats, viewport_height, viewport_width, zoom=1.0, first_row=0, first_seat=0):
+        '''Returns a layout with places scaled to fit the hall into the viewport
+
+        Parameters
+        ----------
+        :param rows: int
+            number of rows of the hall
+        :param seats: int
+            number of seats in a row
+        :param viewport_height: int
+            height of the screen
+        :param viewport_width: int
+            width of the screen
+        :param zoom: float, optional
+            scale of places relative to the fitted size, with zoom > 1 only a part of the hall is displayed
+            (default is 1.0)
+        :param first_row: int, optional
+            index of the first displayed row (default is 0)
+        :param first_seat: int, optional
+            index of the first displayed seat (default is 0)
+
+        Returns
+        -------
+        :returns: HallLayout
+            places are never bigger than SQUARE_HEIGHT x SQUARE_WIDTH (unless zoomed)
+            and never smaller than MIN_SQUARE_SIZE, the rows and seats which do not fit are not displayed
+
+        Raises
+        ------
+        :raises IncorrectCoordinates:
+            if the viewport is too small for the text info and one place or the zoom is not positive
+        '''
+
+        margin_y = 110
+        available_height = viewport_height - margin_y - KEY_INFO_HEIGHT
+        available_width = viewport_width - 2 * LABEL_MARGIN
+        if available_height < MIN_SQUARE_SIZE or available_width < MIN_SQUARE_SIZE or zoom <= 0:
+            raise IncorrectCoordinates('The viewport is too small')
+
+        scale = zoom * min(available_height / (SQUARE_HEIGHT * rows), available_width / (SQUARE_WIDTH * seats), 1)
+        square_height = max(MIN_SQUARE_SIZE, int(SQUARE_HEIGHT * scale))
+        square_width = max(MIN_SQUARE_SIZE, int(SQUARE_WIDTH * scale))
+        space = max(1, min(int(6 * scale), square_height // 4, square_width // 4))
+        return cls(rows, seats, viewport_height, viewport_width, square_height, square_width, space,
+                   LABEL_MARGIN, margin_y, first_row, first_seat,
+                   max(1, available_height // square_height), max(1, available_width // square_width))
+
+    def view(self, first_row, first_seat):
+        '''Returns the same layout displaying the part of the hall starting at (first_row, first_seat)'''
+
+        return HallLayout(self.rows, self.seats, self.screen_height, self.screen_width, self.square_height,
+                          self.square_width, self.space, self.margin_x, self.margin_y, first_row, first_seat,
+                          self.visible_rows, self.visible_seats)
+
+    def tiles(self):
+        '''Returns a list of layouts displaying together the whole hall, row by row'''
+
+        return [self.view(first_row, first_seat)
+                for first_row in range(0, self.rows, self.visible_rows)
+                for first_seat in range(0, self.seats, self.visible_seats)]
+
+    @property
+    def is_complete(self):
+        '''True if the whole hall is displayed'''
+
+        return self.visible_rows == self.rows and self.visible_seats == self.seats
+
+    @property
+    def region(self):
+        '''Returns the displayed part of the hall as a tuple of slices (rows, seats)'''
+
+        return (slice(self.first_row, self.first_row + self.visible_rows),
+                slice(self.first_seat, self.first_seat + self.visible_seats))
+
+
+def _label_step(pitch):
+    # Every n-th row index or seat number is displayed, so the labels do not overlap
+    return max(1, -(-LABEL_SPACING // pitch))
+
+
+def render_layout(scr, seats_param: np.ndarray, row_indices, movie, layout: HallLayout, out=None):
+    '''Returns the image of the part of the cinema hall displayed by the layout
+
+    The screen has the size of the layout, so the memory and the drawing time
+    depend on the viewport and not on the size of the hall
+
+    Parameters
+    ----------
+    :param scr: numpy array
+        3 dimensional numpy array representing a screen of the layout size
+    :param seats_param: numpy array
+        a 2 dimensional numpy array representing the whole cinema hall
+    :param row_indices: dict
+        dictionary representing row indices in format {row_label: index} ex. {'A':0, 'B':1}
+    :param movie:
+        the chosen movie, if move is None: return None
+    :param layout: HallLayout
+        the layout of the hall, ex. HallLayout.fit()
+    :param out: numpy array, optional
+        array of the screen shape the image is drawn on, ex. acquire_frame() (default is None - a new array)
+
+    Returns
+    -------
+    :returns: None if the movie wasn't chosen (if the movie is None)
+    else
+    :returns: numpy array
+        3 dimensional numpy array with the cinema hall image
+
+    Raises
+    ------
+    :raises IncorrectArrayData
+        if the length of seats_param array is 0
+        or if it occurs in display_text_info()
+    :raises FileError
+        if the array shape does not match the layout or the row indices
+    :raises IncorrectFont, IncorrectCoordinates, IncorrectArrayType
+        if it occurs in display_screen(), display_key_info() or display_text_info()
+    '''
+
+    if len(seats_param) == 0:
+        raise IncorrectArrayData('The movie array is empty', movie)
+    if movie is None:  # if the move wasn't chosen
+        return
+    seats_array = np.atleast_2d(np.asarray(seats_param))
+    if seats_array.shape != (layout.rows, layout.seats):
+        raise FileError('Array shape does not match the layout', movie=movie)
+    if len(row_indices) < layout.rows:
+        raise FileError('Array shape does not match row indices', IncorrectShape('Incorrect array shape, too many rows'),
+                        movie)
+
+    if out is None:
+        new_screen = scr.copy()  # making a copy of the screen array
+    else:
+        new_screen = out
+        np.copyto(new_screen, scr)
+    # Setting a font
+    font = cv2.FONT_HERSHEY_DUPLEX
+    font_scale = min(0.5, 0.5 * layout.square_height / SQUARE_HEIGHT + 0.15)
+    rows, seats = layout.region
+    labels = tuple(row_indices)
+
+    # Adding row indices, in the middle of the rows
+    step = _label_step(layout.square_height)
+    visible = range(0, layout.visible_rows, step)
+    put_texts(new_screen, [f'{labels[layout.first_row + j]}' for j in visible],
+              [(max(0, layout.margin_x - 30),
+                layout.margin_y + layout.square_height * j + (layout.square_height + layout.space) // 2 + 5)
+               for j in visible], font, font_scale, (255, 255, 255), 1)
+    # Adding seat numbers
+    step = _label_step(layout.square_width) * (2 if layout.square_width < 20 and layout.seats > 99 else 1)
+    visible = range(0, layout.visible_seats, step)
+    put_texts(new_screen, [f'{layout.first_seat + i + 1}' for i in visible],
+              [(layout.margin_x + layout.square_width * i + layout.space, layout.margin_y - 5) for i in visible],
+              font, font_scale, (255, 255, 255), 1)
+
+    create_rows(seats_array[rows, seats], new_screen, layout.margin_x, layout.margin_y, layout.space,
+                square_height=layout.square_height, square_width=layout.square_width)
+
+    # Adding text how to exit and how to book seats, showing the screen
+    new_screen = display_key_info(new_screen, font, layout.margin_x, layout.screen_height)
+    new_screen = display_screen(new_screen, font, layout.margin_x, layout.screen_width)
+    # Adding the displayed part of the hall and the keys changing it (see display_image())
+    if layout.is_complete:
+        keys_info = 'Press +/- to zoom'
+    else:
+        keys_info = (f'Rows {labels[rows.start]}-{labels[rows.stop - 1]}, seats {seats.start + 1}-{seats.stop} '
+                     '(N/P - next/previous part, +/- - zoom)')
+    cv2.putText(new_screen, keys_info, (layout.margin_x, 85), font, 0.5, (255, 255, 255), 1)
+
+    # Displaying text info on the screen
+    return display_text_info(new_screen, movie, font, seats_array, layout.margin_x, copy=False)
+
+
+def get_layout(seats_array, viewport_height, viewport_width):
+    '''Returns None if the hall displayed by render_seats() fits into the viewport,
+    else a layout fitting the hall into the viewport (HallLayout.fit())
+
+    Parameters
+    ----------
+    :param seats_array: numpy array
+        a 2 dimensional numpy array representing a cinema hall
+    :param viewport_height: int
+        height of the biggest screen
+    :param viewport_width: int
+        width of the biggest screen
+
+    Returns
+    -------
+    :returns: None or HallLayout
+    '''
+
+    screen_height, screen_width = get_screen_size(seats_array)
+    if screen_height <= viewport_height and screen_width <= viewport_width:
+        return None
+    return HallLayout.fit(*seats_array.shape, viewport_height, viewport_width)
+
+
+def show_seats(scr, seats_param: np.ndarray, row_indices, movie, screen_height, screen_width,
+               headless=False, image_format=None, layout=None):
+    '''Displays the cinema hall with all places
+    returns the result of display_image() which is an array of booked seats in format (row, place)
+    or, in the headless mode, the cinema hall image without displaying it
+
+    Parameters
+    ----------
+    :param scr: numpy array
+        3 dimensional numpy array representing a screen
+    :param seats_param: numpy array
+        a 2 dimensional numpy array representing a cinema hall in format [[row], [row]]
+        where row is a 1 dimensional array containing zeros (free place) or ones (taken seat) ex. [1, 0, 0, 0, 1]
+    :param row_indices: dict
+        dictionary representing row indices in format {row_label: index} ex. {'A':0, 'B':1}
+    :param movie:
+        the chosen movie, if move is None: return None
+    :param screen_height: int
+        height of the screen
+    :param screen_width: int
+        width of the screen
+    :param headless: bool, optional
+        if True the image is returned instead of displayed, no window is opened (default is False)
+    :param image_format: str, optional
+        in the headless mode one of IMAGE_FORMATS to return the image encoded by encode_seats(),
+        None to return the image as a numpy array (default is None)
+    :param layout: HallLayout, optional
+        the layout of the hall, ex. a fitted layout for halls too big for the screen,
+        the scr must have the layout size (default is None - the layout of render_seats())
+
+    Returns
+    -------
+    :returns: None if the movie wasn't chosen (if the movie is None)
+    else
+    :returns: the result of display_image() which is an array of booked seats in format (row, place)
+    or in the headless mode
+    :returns: numpy array or bytes
+        the cinema hall image as a 3 dimensional numpy array or encoded in the image_format
+
+    Raises
+    ------
+    :raises IncorrectArrayData
+        if the length of seats_param array is 0
+        or if it occurs in following functions:
+        refresh_seats()
+        display_image()
+    :raises FileError
+        if it occurs in refresh_seats()
+    :raises IncorrectFont
+        if it occurs in refresh_seats()
+    :raises IncorrectCoordinates
+        if it occurs in refresh_seats()
+    :raises IncorrectArrayType
+        if it occurs in following functions:
+        refresh_seats()
+        display_image()
+    :raises IncorrectShape
+        if it occurs in display_image()
+    :raises IncorrectImageFormat
+        if it occurs in encode_seats()
+
+    '''
+
+    if headless and image_format is not None:
+        return encode_seats(scr, seats_param, row_indices, movie, screen_height, screen_width, image_format, layout)
+
+    frame = None
+    if layout is not None:
+        # A displayed image is drawn on a frame from the frame pool, a headless one is returned to the caller
+        frame = None if headless else acquire_frame(scr.shape, scr.dtype, fill=None)
+        new_screen = render_layout(scr, seats_param, row_indices, movie, layout, frame)
+    else:
+        # Only the places changed since the last display of the movie are drawn again
+        new_screen = refresh_seats(scr, seats_param, row_indices, movie, screen_height, screen_width)
+    if headless:
+        # The frame is kept by refresh_seats(), so a copy is returned
+        return new_screen.copy() if layout is None and new_screen is not None else new_screen
+
+    try:
+        if new_screen is None:
+            return
         # Returning chosen seats or None if the pressed key was ESC (exit from the seat booking section)
-        booked_seats = display_image(movie, new_screen, seats_param, row_indices)
+        booked_seats = display_image(movie, new_screen, seats_param, row_indices, scr, layout)
         return booked_seats
     except (IncorrectArrayData, IncorrectArrayType, IncorrectShape):
         raise
     except (IncorrectFont, IncorrectCoordinates):
         raise
+    finally:
+        if frame is not None:
+            release_frame(frame)